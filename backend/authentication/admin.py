@@ -1 +1,67 @@
-# Register your models here.
+from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.auth.models import User
+from django.db.models import Q
+
+from authentication.revocation import revoke_all_tokens
+from common.changelist import LargeTableAdminMixin
+from common.hashers import current_password_prefix
+
+
+class PasswordSchemeFilter(admin.SimpleListFilter):
+    """Split accounts by whether their hash uses the current hasher
+    parameters; use "Show counts" to see how many are left to upgrade"""
+
+    title = "password hash"
+    parameter_name = "hash_scheme"
+
+    def lookups(self, request, model_admin):
+        return (
+            ("current", "Current parameters"),
+            ("outdated", "Outdated parameters"),
+            ("unusable", "Unusable password"),
+        )
+
+    def queryset(self, request, queryset):
+        unusable = Q(password__startswith="!")
+        if self.value() == "current":
+            return queryset.filter(
+                password__startswith=current_password_prefix()
+            )
+        if self.value() == "outdated":
+            return queryset.exclude(unusable).exclude(
+                password__startswith=current_password_prefix()
+            )
+        if self.value() == "unusable":
+            return queryset.filter(unusable)
+        return queryset
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
+    list_filter = (*BaseUserAdmin.list_filter, PasswordSchemeFilter)
+    # Only indexed columns, see get_search_results()
+    search_fields = ("username", "email")
+    search_help_text = (
+        "Start of a username or email (case-sensitive), or a user id."
+    )
+    sortable_by = ("username",)
+    actions = ("log_out_everywhere",)
+
+    @admin.action(description="Log selected users out of all devices")
+    def log_out_everywhere(self, request, queryset):
+        revoke_all_tokens(queryset.values_list("pk", flat=True))
+
+    def get_search_results(self, request, queryset, search_term):
+        """Match prefixes of username and email, which their indexes serve,
+        instead of the default icontains over four columns"""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        match = Q(username__startswith=term) | Q(email__startswith=term)
+        if term.isdigit():
+            match |= Q(pk=int(term))
+        return queryset.filter(match), False
@@ -0,0 +1,156 @@
+"""
+Username and email availability answered from in-process Bloom filters.
+
+A value the filters have never seen is free without touching the database;
+only possible hits are confirmed with a query. Users registered by this
+process are added immediately. Users created elsewhere (other workers,
+bulk inserts) are picked up by an id-ordered catch-up query at most every
+AVAILABILITY_SYNC_SECONDS, and the filters are rebuilt from scratch every
+AVAILABILITY_REBUILD_SECONDS or once they fill up, which also covers
+changed usernames and emails. Registration still enforces uniqueness; this
+only spares the signup form from hitting it.
+
+Workers build the filters when they load the application (backend.asgi,
+backend.wsgi), so no request waits for the scan of every user.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connections
+
+from common.bloom import BloomFilter
+
+from .models import UserDirectoryEntry
+from .sharding import is_sharded
+
+BUILD_CHUNK_SIZE = 2000
+MIN_CAPACITY = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def user_rows():
+    """Where usernames and emails are looked up: the users table, or the
+    directory when users are sharded"""
+    return UserDirectoryEntry.objects if is_sharded() else User.objects
+
+
+class UserIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._usernames = None
+        self._emails = None
+        self._max_id = 0
+        self._built_at = 0.0
+        self._synced_at = 0.0
+
+    def build(self):
+        """Build the filters now instead of on the first check"""
+        with self._lock:
+            self._build(time.monotonic())
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if (
+            self._usernames is not None
+            and now - self._synced_at < settings.AVAILABILITY_SYNC_SECONDS
+        ):
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._usernames is None
+                or self._usernames.saturated
+                or self._emails.saturated
+                or now - self._built_at >= settings.AVAILABILITY_REBUILD_SECONDS
+            ):
+                self._build(now)
+            elif now - self._synced_at >= settings.AVAILABILITY_SYNC_SECONDS:
+                self._catch_up(now)
+
+    def _build(self, now):
+        """Stream every user into freshly sized filters"""
+        capacity = max(MIN_CAPACITY, user_rows().count() * 2)
+        error_rate = settings.AVAILABILITY_ERROR_RATE
+        usernames = BloomFilter(capacity, error_rate)
+        emails = BloomFilter(capacity, error_rate)
+        max_id = self._stream_into(
+            user_rows().all(), usernames, emails, max_id=0
+        )
+        self._usernames, self._emails = usernames, emails
+        self._max_id = max_id
+        self._built_at = self._synced_at = now
+
+    def _catch_up(self, now):
+        """Add users created since the last build or catch-up"""
+        self._max_id = self._stream_into(
+            user_rows().filter(id__gt=self._max_id),
+            self._usernames,
+            self._emails,
+            max_id=self._max_id,
+        )
+        self._synced_at = now
+
+    @staticmethod
+    def _stream_into(queryset, usernames, emails, max_id):
+        rows = queryset.values_list("id", "username", "email").iterator(
+            chunk_size=BUILD_CHUNK_SIZE
+        )
+        for user_id, username, email in rows:
+            usernames.add(username)
+            if email:
+                emails.add(normalize_email(email))
+            max_id = max(max_id, user_id)
+        return max_id
+
+    def add(self, user):
+        """Record a user created or renamed by this process"""
+        if self._usernames is None:
+            return
+        self._usernames.add(user.username)
+        if user.email:
+            self._emails.add(normalize_email(user.email))
+
+    def username_available(self, username):
+        self._ensure_fresh()
+        username = User.normalize_username(username)
+        if username not in self._usernames:
+            return True
+        return not user_rows().filter(username=username).exists()
+
+    def email_available(self, email):
+        self._ensure_fresh()
+        email = normalize_email(email)
+        if email not in self._emails:
+            return True
+        return not user_rows().filter(email__iexact=email).exists()
+
+
+user_index = UserIndex()
+
+
+def prebuild_user_index():
+    """Build the availability filters at startup. The connection used is
+    closed again: under gunicorn --preload this runs in the master, whose
+    connections must not be shared with the workers it forks. Without a
+    usable database the filters are left to the first check."""
+    try:
+        user_index.build()
+    except DatabaseError:
+        logger.warning(
+            "Availability filters not built at startup", exc_info=True
+        )
+    finally:
+        connections.close_all()
@@ -0,0 +1,84 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+    TokenError,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import check_generation
+from .sharding import get_user_by_id, get_user_by_username, is_sharded
+
+
+class ShardedModelBackend(ModelBackend):
+    """ModelBackend that finds users on their shard"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if not is_sharded():
+            return super().authenticate(
+                request, username=username, password=password, **kwargs
+            )
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = get_user_by_username(username)
+        except User.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as known ones
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        if not is_sharded():
+            return super().get_user(user_id)
+        try:
+            user = get_user_by_id(user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class ShardedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that loads the token's user from their shard and
+    rejects tokens revoked by logging out of all devices"""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        try:
+            check_generation(validated_token)
+        except TokenError as error:
+            raise InvalidToken(
+                {
+                    "detail": _("Given token not valid for any token type"),
+                    "messages": [{"message": error.args[0]}],
+                }
+            ) from None
+        return validated_token
+
+    def get_user(self, validated_token):
+        if not is_sharded():
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from None
+        try:
+            user = get_user_by_id(user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            ) from None
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        return user
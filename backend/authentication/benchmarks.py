@@ -0,0 +1,96 @@
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import User
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from common.benchmarks import benchmark
+
+from .backends import ShardedJWTAuthentication
+from .serializers import (
+    UserLoginSerializer,
+    UserRegistrationSerializer,
+    UserSerializer,
+)
+from .sharding import create_user
+from .tokens import RefreshToken
+from .urls import urlpatterns
+
+PASSWORD = "bench-password-123"
+
+
+def bench_user():
+    user = User.objects.filter(username="bench").first()
+    return user or create_user("bench", "bench@example.com", PASSWORD)
+
+
+@benchmark("serializers.user")
+def user_serializer():
+    user = User(
+        pk=1,
+        username="bench",
+        email="bench@example.com",
+        first_name="Bench",
+        last_name="Mark",
+        date_joined=timezone.now(),
+    )
+    return lambda: UserSerializer(user).data
+
+
+@benchmark("serializers.registration_validation")
+def registration_validation():
+    data = {
+        "username": "newcomer",
+        "email": "newcomer@example.com",
+        "first_name": "New",
+        "last_name": "Comer",
+        "password": PASSWORD,
+        "password_confirm": PASSWORD,
+    }
+    return lambda: UserRegistrationSerializer(data=data).is_valid(
+        raise_exception=True
+    )
+
+
+@benchmark("serializers.login_validation")
+def login_validation():
+    bench_user()
+    data = {"username": "bench", "password": PASSWORD}
+    return lambda: UserLoginSerializer(data=data).is_valid(raise_exception=True)
+
+
+@benchmark("tokens.refresh_for_user")
+def refresh_for_user():
+    user = bench_user()
+    return lambda: str(RefreshToken.for_user(user))
+
+
+@benchmark("tokens.access_verification")
+def access_verification():
+    raw_token = str(RefreshToken.for_user(bench_user()).access_token).encode()
+    authentication = ShardedJWTAuthentication()
+    return lambda: authentication.get_validated_token(raw_token)
+
+
+@benchmark("hashers.make_password")
+def hash_password():
+    return lambda: make_password(PASSWORD)
+
+
+@benchmark("hashers.check_password")
+def verify_password():
+    encoded = make_password(PASSWORD)
+    return lambda: check_password(PASSWORD, encoded)
+
+
+@benchmark("urls.resolve")
+def url_resolution():
+    """Resolve every path of authentication/urls.py once per call"""
+    paths = [
+        reverse(f"authentication:{pattern.name}") for pattern in urlpatterns
+    ]
+
+    def resolve_all():
+        for path in paths:
+            resolve(path)
+
+    return resolve_all
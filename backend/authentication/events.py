@@ -0,0 +1,17 @@
+"""
+Events pushed to a user's open event streams (see streams.py).
+
+- ``profile_updated``: the profile changed; data is the new profile
+- ``session_revoked``: a session logged out (``{"scope": "session"}``) or
+  every session was revoked (``{"scope": "all"}``)
+"""
+
+from common.events import publish_on_commit
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def publish_user_event(user_id, event, data, using=None):
+    publish_on_commit(user_channel(user_id), event, data, using=using)
@@ -0,0 +1,175 @@
+"""
+Refresh token families: one row per login session instead of a row per
+refresh token.
+
+A login creates a TokenFamily and a refresh token carrying ``fam``, the
+family id, and ``fgen``, its generation in the family (0 at login).
+Rotating a token is a single compare-and-swap UPDATE moving the family
+from the token's generation to the next one, and the new token carries
+the new generation. Nothing is inserted per refresh and nothing is
+blacklisted: older generations simply stop matching.
+
+Presenting an older generation means the token was rotated and someone
+kept a copy, so the family is deleted, ending the session for both the
+thief and the user. The generation rotated away from within the last
+JWT_REFRESH_GRACE_SECONDS is only rejected, since that is a client
+retrying a refresh whose response it lost or two tabs racing.
+
+Refresh tokens issued before families carry no ``fam``. They are still
+checked against the blacklist tables, and their first rotation blacklists
+them and starts a family, so every live session moves over within one
+refresh. Once the last of them expired (REFRESH_TOKEN_LIFETIME after the
+upgrade), ``manage.py flushexpiredtokens`` empties the blacklist tables.
+``manage.py flush_token_families`` deletes expired families.
+
+Refreshing and logging out read the family from the database. Token
+introspection reads family generations from the cache, like token
+generations (see revocation.py): a worker without a shared cache
+(REDIS_URL) may report the latest token of a family revoked by another
+worker as active for up to TOKEN_GENERATION_CACHE_SECONDS.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .events import publish_user_event
+from .models import TokenFamily
+
+FAMILY_CLAIM = "fam"
+FAMILY_GENERATION_CLAIM = "fgen"
+# Cached generation of families that do not exist (anymore)
+REVOKED = -1
+
+logger = logging.getLogger(__name__)
+
+
+def family_key(family_id):
+    return f"auth:token-family:{family_id}"
+
+
+def forget_family(token):
+    key = family_key(token[FAMILY_CLAIM])
+    cache.delete(key)
+    # Again once committed, in case a reader cached the old value since
+    transaction.on_commit(lambda: cache.delete(key), using=token.db)
+
+
+def start_family(token, user_id):
+    """Open a session for a new refresh token"""
+    family = TokenFamily.objects.using(token.db).create(
+        user_id=user_id,
+        created_at=timezone.now(),
+        expires_at=datetime_from_epoch(token["exp"]),
+    )
+    token[FAMILY_CLAIM] = str(family.pk)
+    token[FAMILY_GENERATION_CLAIM] = 0
+    cache.set(family_key(family.pk), 0, settings.TOKEN_GENERATION_CACHE_SECONDS)
+
+
+def revoke_family(token):
+    """End the session of a refresh token, whatever its generation"""
+    TokenFamily.objects.using(token.db).filter(pk=token[FAMILY_CLAIM]).delete()
+    forget_family(token)
+
+
+def is_rotated_recently(generation, rotated_at, token_generation):
+    """Whether a token is the one rotated away from within the grace
+    window"""
+    if rotated_at is None or token_generation != generation - 1:
+        return False
+    grace = timedelta(seconds=settings.JWT_REFRESH_GRACE_SECONDS)
+    return timezone.now() - rotated_at <= grace
+
+
+def check_family(token):
+    """Reject a refresh token that is not the latest of a live session;
+    revoke the session if it is an older one"""
+    family = (
+        TokenFamily.objects.using(token.db)
+        .filter(pk=token[FAMILY_CLAIM])
+        .values_list("generation", "rotated_at")
+        .first()
+    )
+    if family is None:
+        raise TokenError(_("Token is blacklisted"))
+    generation, rotated_at = family
+    token_generation = token.payload.get(FAMILY_GENERATION_CLAIM)
+    if token_generation == generation:
+        return
+    if is_rotated_recently(generation, rotated_at, token_generation):
+        raise TokenError(_("Token was already rotated"))
+
+    revoke_family(token)
+    user_id = token.payload.get(api_settings.USER_ID_CLAIM)
+    logger.warning(
+        "Refresh token reuse: revoked token family %s of user %s",
+        token[FAMILY_CLAIM],
+        user_id,
+    )
+    publish_user_event(
+        user_id, "session_revoked", {"scope": "session"}, using=token.db
+    )
+    raise TokenError(_("Token reuse detected"))
+
+
+def advance_family(token):
+    """Move the family of a checked token to the next generation and give
+    the token that generation. ``exp`` must already be the new token's."""
+    generation = token[FAMILY_GENERATION_CLAIM]
+    advanced = (
+        TokenFamily.objects.using(token.db)
+        .filter(pk=token[FAMILY_CLAIM], generation=generation)
+        .update(
+            generation=generation + 1,
+            rotated_at=timezone.now(),
+            expires_at=datetime_from_epoch(token["exp"]),
+        )
+    )
+    if not advanced:
+        # Another request rotated it since the token was checked
+        raise TokenError(_("Token was already rotated"))
+    forget_family(token)
+    token[FAMILY_GENERATION_CLAIM] = generation + 1
+
+
+def family_generations(ids_by_db):
+    """{family id: current generation, or REVOKED} for these families,
+    from the cache or with one query per shard on a miss"""
+    keys = {
+        family_key(family_id): family_id
+        for ids in ids_by_db.values()
+        for family_id in ids
+    }
+    cached = cache.get_many(keys)
+    generations = {keys[key]: value for key, value in cached.items()}
+
+    fetched = {}
+    for db, ids in ids_by_db.items():
+        missing = set(ids) - generations.keys()
+        if not missing:
+            continue
+        found = {
+            str(pk): generation
+            for pk, generation in TokenFamily.objects.using(db)
+            .filter(pk__in=missing)
+            .values_list("pk", "generation")
+        }
+        fetched.update(
+            {family_id: found.get(family_id, REVOKED) for family_id in missing}
+        )
+    if fetched:
+        cache.set_many(
+            {family_key(fid): value for fid, value in fetched.items()},
+            settings.TOKEN_GENERATION_CACHE_SECONDS,
+        )
+    generations.update(fetched)
+    return generations
@@ -0,0 +1,191 @@
+"""
+Roles and permissions carried in tokens.
+
+Tokens are issued with the user's roles (staff, superuser), group names and
+permission codenames, plus ``pv``: the version of those grants. Changing a
+user's flags, groups or permissions, or the permissions of one of their
+groups, stores a new version in the shared cache. Permission checks trust
+the claims of a token whose ``pv`` is current. Otherwise they resolve the
+grants from the database once and keep them in a per-process cache until
+the version changes again. Refreshing a token with an outdated ``pv``
+issues fresh claims.
+
+Each process reuses a version it read for PERMISSIONS_VERSION_CACHE_SECONDS
+(changes made by the process itself apply at once). Without a shared cache
+(REDIS_URL) other workers only see new versions after they restart.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+
+VERSION_CLAIM = "pv"
+ROLES_CLAIM = "roles"
+GROUPS_CLAIM = "groups"
+PERMISSIONS_CLAIM = "perms"
+
+STAFF = "staff"
+SUPERUSER = "superuser"
+
+# Per-process entries kept before the caches are cleared
+LOCAL_CACHE_SIZE = 10_000
+
+_lock = threading.Lock()
+_versions = {}  # user id -> (version, read at)
+_resolved = {}  # user id -> (version, Grants)
+
+
+class Grants:
+    """What a user may do: roles, group names and permission codenames"""
+
+    __slots__ = ("roles", "groups", "permissions")
+
+    def __init__(self, roles=(), groups=(), permissions=()):
+        self.roles = frozenset(roles)
+        self.groups = frozenset(groups)
+        self.permissions = frozenset(permissions)
+
+    @classmethod
+    def from_user(cls, user):
+        if not user.is_active:
+            return cls()
+        roles = []
+        if user.is_staff:
+            roles.append(STAFF)
+        if user.is_superuser:
+            roles.append(SUPERUSER)
+        groups = user.groups.values_list("name", flat=True)
+        # Superusers hold every permission without listing them
+        permissions = () if user.is_superuser else user.get_all_permissions()
+        return cls(roles, groups, permissions)
+
+    @classmethod
+    def from_claims(cls, token):
+        return cls(
+            token.get(ROLES_CLAIM, ()),
+            token.get(GROUPS_CLAIM, ()),
+            token.get(PERMISSIONS_CLAIM, ()),
+        )
+
+    def claims(self):
+        return {
+            ROLES_CLAIM: sorted(self.roles),
+            GROUPS_CLAIM: sorted(self.groups),
+            PERMISSIONS_CLAIM: sorted(self.permissions),
+        }
+
+    @property
+    def is_staff(self):
+        return STAFF in self.roles
+
+    @property
+    def is_superuser(self):
+        return SUPERUSER in self.roles
+
+    def has_perms(self, permissions):
+        return self.is_superuser or self.permissions.issuperset(permissions)
+
+    def in_any_group(self, groups):
+        return self.is_superuser or not self.groups.isdisjoint(groups)
+
+
+NO_GRANTS = Grants()
+
+
+def version_key(user_id):
+    return f"auth:grants:version:{user_id}"
+
+
+def new_version():
+    return time.time_ns() // 1000
+
+
+def _remember(entries, user_id, value):
+    if len(entries) >= LOCAL_CACHE_SIZE:
+        entries.clear()
+    entries[user_id] = value
+
+
+def grants_version(user_id):
+    """Return the current version of a user's grants"""
+    now = time.monotonic()
+    local = _versions.get(user_id)
+    if local is not None and now - local[1] < (
+        settings.PERMISSIONS_VERSION_CACHE_SECONDS
+    ):
+        return local[0]
+
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Unknown after a cache flush: start a version no token carries
+        cache.add(key, new_version(), None)
+        version = cache.get(key)
+    with _lock:
+        _remember(_versions, user_id, (version, now))
+    return version
+
+
+def bump_grants_version(user_ids):
+    """Outdate the grants in the tokens of these users"""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    version = new_version()
+    cache.set_many({version_key(uid): version for uid in user_ids}, None)
+    with _lock:
+        for user_id in user_ids:
+            _versions.pop(user_id, None)
+            _resolved.pop(user_id, None)
+
+
+def add_grant_claims(token, user):
+    """Put the user's current grants and their version into a token"""
+    token[VERSION_CLAIM] = grants_version(user.pk)
+    for claim, value in Grants.from_user(user).claims().items():
+        token[claim] = value
+
+
+def token_is_current(token):
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    return (
+        user_id is not None
+        and VERSION_CLAIM in token
+        and token[VERSION_CLAIM] == grants_version(user_id)
+    )
+
+
+def request_grants(request):
+    """Return the grants of the request's user, from the token when its
+    claims are current and from the per-process cache otherwise"""
+    grants = getattr(request, "_grants", None)
+    if grants is not None:
+        return grants
+
+    user = request.user
+    token = request.auth
+    if not user or not user.is_authenticated:
+        grants = NO_GRANTS
+    elif hasattr(token, "payload") and token_is_current(token):
+        grants = Grants.from_claims(token)
+    else:
+        version = grants_version(user.pk)
+        cached = _resolved.get(user.pk)
+        if cached is not None and cached[0] == version:
+            grants = cached[1]
+        else:
+            grants = Grants.from_user(user)
+            with _lock:
+                _remember(_resolved, user.pk, (version, grants))
+
+    request._grants = grants
+    return grants
+
+
+def clear_local_caches():
+    with _lock:
+        _versions.clear()
+        _resolved.clear()
@@ -0,0 +1,109 @@
+import gzip
+import io
+import timeit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.serializers import UserSerializer
+from common import renderers
+from common.parsers import CBORParser, MessagePackParser
+
+
+def sample_payloads():
+    """Bodies shaped like the ones mobile clients exchange most, built in
+    memory so that nothing is written to the database"""
+    user = User(
+        pk=123456,
+        username="mobile.user",
+        email="mobile.user@example.com",
+        first_name="Mobile",
+        last_name="User",
+        date_joined=timezone.now(),
+    )
+    refresh = RefreshToken()
+    refresh[api_settings.USER_ID_CLAIM] = user.pk
+    tokens = {"access": str(refresh.access_token), "refresh": str(refresh)}
+    return {
+        "login request": {"username": user.username, "password": "s3cret-pw"},
+        "login response": {
+            "message": "Login successful",
+            "user": dict(UserSerializer(user).data),
+            "tokens": tokens,
+        },
+        "refresh request": {"refresh": tokens["refresh"]},
+        "refresh response": tokens,
+        "profile": dict(UserSerializer(user).data),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the size and encode/decode time of typical authentication "
+        "bodies as JSON, MessagePack and CBOR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=10_000,
+            help="Encodes and decodes per timing run",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timing runs; the fastest one is reported",
+        )
+
+    def handle(self, *args, **options):
+        number = max(1, options["number"])
+        repeat = max(1, options["repeat"])
+        formats = [("json", JSONRenderer(), JSONParser())]
+        if renderers.msgpack is not None:
+            formats.append(
+                (
+                    "msgpack",
+                    renderers.MessagePackRenderer(),
+                    MessagePackParser(),
+                )
+            )
+        if renderers.cbor2 is not None:
+            formats.append(("cbor", renderers.CBORRenderer(), CBORParser()))
+
+        for name, payload in sample_payloads().items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            baseline = None
+            for format_name, renderer, parser in formats:
+                body = renderer.render(payload)
+                if parser.parse(io.BytesIO(body)) != payload:
+                    self.stderr.write(f"  {format_name} does not round-trip")
+                encode = min(
+                    timeit.repeat(
+                        lambda r=renderer, d=payload: r.render(d),
+                        number=number,
+                        repeat=repeat,
+                    )
+                )
+                decode = min(
+                    timeit.repeat(
+                        lambda p=parser, b=body: p.parse(io.BytesIO(b)),
+                        number=number,
+                        repeat=repeat,
+                    )
+                )
+                if baseline is None:
+                    baseline = len(body)
+                self.stdout.write(
+                    f"  {format_name:<8} {len(body):5d} B "
+                    f"({len(body) / baseline:4.0%})  "
+                    f"gzip {len(gzip.compress(body)):5d} B  "
+                    f"encode {encode / number * 1e6:6.2f} us  "
+                    f"decode {decode / number * 1e6:6.2f} us"
+                )
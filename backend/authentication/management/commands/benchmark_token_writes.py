@@ -0,0 +1,123 @@
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import (
+    RefreshToken as BlacklistRefreshToken,
+)
+
+from authentication.models import TokenFamily
+from authentication.serializers import DeduplicatedTokenRefreshSerializer
+from authentication.sharding import create_user
+from authentication.tokens import RefreshToken
+from common.benchmarks import isolated_databases, rolled_back
+
+WRITES = ("INSERT", "UPDATE", "DELETE")
+TABLES = (OutstandingToken, BlacklistedToken, TokenFamily)
+
+
+class BlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    """simplejwt's own rotation: an outstanding and a blacklist row per
+    refresh"""
+
+    token_class = BlacklistRefreshToken
+
+
+STORES = {
+    "blacklist tables": (
+        BlacklistRefreshToken,
+        BlacklistTokenRefreshSerializer,
+    ),
+    "token families": (RefreshToken, DeduplicatedTokenRefreshSerializer),
+}
+
+
+class WriteCounter:
+    """Count the writing statements run on every database"""
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        self._captures = [
+            self._stack.enter_context(CaptureQueriesContext(connections[db]))
+            for db in connections
+        ]
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def counts(self):
+        counts = dict.fromkeys(WRITES, 0)
+        for capture in self._captures:
+            for query in capture.captured_queries:
+                verb = query["sql"].lstrip().split(None, 1)[0].upper()
+                if verb in counts:
+                    counts[verb] += 1
+        return counts
+
+
+def row_count():
+    # simplejwt's tokens keep their rows in the default database
+    return sum(
+        model.objects.using(db).count()
+        for model in TABLES
+        for db in connections
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the database writes of a login and of each refresh token "
+        "rotation with simplejwt's blacklist tables and with token "
+        "families, against a fresh test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--refreshes",
+            type=int,
+            default=100,
+            help="Rotations in the chain of refreshes measured",
+        )
+
+    def handle(self, *args, **options):
+        refreshes = max(1, options["refreshes"])
+        with isolated_databases():
+            for name, (token_class, serializer_class) in STORES.items():
+                with rolled_back():
+                    self.measure(name, token_class, serializer_class, refreshes)
+
+    def measure(self, name, token_class, serializer_class, refreshes):
+        user = create_user("bench.writes", password=None)
+        rows = row_count()
+        with WriteCounter() as login:
+            refresh = str(token_class.for_user(user))
+        login_rows = row_count() - rows
+
+        with WriteCounter() as rotations:
+            for _ in range(refreshes):
+                serializer = serializer_class(data={"refresh": refresh})
+                serializer.is_valid(raise_exception=True)
+                refresh = serializer.validated_data["refresh"]
+        refresh_rows = row_count() - rows - login_rows
+
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(
+            "  login    " + self.format(login.counts(), login_rows, 1)
+        )
+        self.stdout.write(
+            "  refresh  "
+            + self.format(rotations.counts(), refresh_rows, refreshes)
+        )
+
+    def format(self, counts, rows, per):
+        writes = "  ".join(
+            f"{verb} {counts[verb] / per:5.2f}" for verb in WRITES
+        )
+        return f"{writes}  rows added {rows / per:+5.2f}"
@@ -0,0 +1,179 @@
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+from django.core.management.base import BaseCommand
+
+PROBE_PASSWORD = "calibration-probe-password"
+ARGON2_MEMORY_COSTS = (19456, 47104, 65536, 102400, 262144)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark password hasher parameters on this machine and recommend "
+        "the strongest ones that stay under a target login latency while "
+        "CONCURRENCY logins hash at the same time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--algorithm",
+            choices=("pbkdf2", "argon2"),
+            default="pbkdf2",
+        )
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250.0,
+            help="Highest acceptable median hashing latency",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of hashes running at the same time",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=3,
+            help="Hashes per concurrent worker for each candidate",
+        )
+        parser.add_argument(
+            "--start-iterations",
+            type=int,
+            default=100_000,
+            help="First PBKDF2 candidate",
+        )
+        parser.add_argument(
+            "--memory-costs",
+            type=int,
+            nargs="+",
+            default=ARGON2_MEMORY_COSTS,
+            help="Argon2 memory costs to try, in KiB",
+        )
+        parser.add_argument("--max-time-cost", type=int, default=6)
+        parser.add_argument(
+            "--parallelism",
+            type=int,
+            default=Argon2PasswordHasher.parallelism,
+        )
+
+    def handle(self, *args, **options):
+        self.concurrency = max(1, options["concurrency"])
+        self.samples = max(1, options["samples"])
+        self.target_ms = options["target_ms"]
+
+        self.stdout.write(
+            f"Target {self.target_ms:.0f} ms median at concurrency "
+            f"{self.concurrency}"
+        )
+        if options["algorithm"] == "pbkdf2":
+            recommended = self.calibrate_pbkdf2(options["start_iterations"])
+        else:
+            recommended = self.calibrate_argon2(
+                options["memory_costs"],
+                options["max_time_cost"],
+                options["parallelism"],
+            )
+
+        if recommended is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "No candidate met the target; lower the concurrency or "
+                    "raise --target-ms."
+                )
+            )
+            return
+
+        self.stdout.write(self.style.SUCCESS("Recommended settings:"))
+        for name, value in recommended.items():
+            self.stdout.write(f"{name}={value}")
+
+    def measure(self, hasher):
+        """Hash concurrently and return (median ms, p95 ms, hashes/s)"""
+
+        def work(_):
+            latencies = []
+            for _ in range(self.samples):
+                started = time.perf_counter()
+                hasher.encode(PROBE_PASSWORD, hasher.salt())
+                latencies.append((time.perf_counter() - started) * 1000)
+            return latencies
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            latencies = [
+                latency
+                for batch in pool.map(work, range(self.concurrency))
+                for latency in batch
+            ]
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return statistics.median(latencies), p95, len(latencies) / elapsed
+
+    def report(self, label, median, p95, throughput):
+        self.stdout.write(
+            f"  {label:<32} median {median:8.1f} ms  p95 {p95:8.1f} ms  "
+            f"{throughput:8.1f} hashes/s"
+        )
+
+    def calibrate_pbkdf2(self, iterations):
+        """Scale the iteration count towards the target latency"""
+        hasher = PBKDF2PasswordHasher()
+        best = None
+        for _ in range(5):
+            hasher.iterations = iterations
+            median, p95, throughput = self.measure(hasher)
+            self.report(f"iterations={iterations}", median, p95, throughput)
+
+            if median <= self.target_ms and (best is None or iterations > best):
+                best = iterations
+            if abs(median - self.target_ms) <= self.target_ms * 0.05:
+                break
+            scaled = int(iterations * self.target_ms / max(median, 0.001))
+            iterations = max(1_000, round(scaled, -3))
+            if iterations == hasher.iterations:
+                break
+
+        if best is None:
+            return None
+        return {"PASSWORD_PBKDF2_ITERATIONS": best}
+
+    def calibrate_argon2(self, memory_costs, max_time_cost, parallelism):
+        """Raise time cost for each memory cost until the target is missed"""
+        hasher = Argon2PasswordHasher()
+        hasher.parallelism = parallelism
+        best = None
+        for memory_cost in sorted(memory_costs):
+            hasher.memory_cost = memory_cost
+            for time_cost in range(1, max_time_cost + 1):
+                hasher.time_cost = time_cost
+                median, p95, throughput = self.measure(hasher)
+                self.report(
+                    f"m={memory_cost} t={time_cost} p={parallelism}",
+                    median,
+                    p95,
+                    throughput,
+                )
+                if median > self.target_ms:
+                    break
+                strength = memory_cost * time_cost
+                if best is None or strength > best[0]:
+                    best = (strength, memory_cost, time_cost)
+
+        if best is None:
+            return None
+        return {
+            "PASSWORD_HASHER_PROFILE": "argon2",
+            "PASSWORD_ARGON2_MEMORY_COST": best[1],
+            "PASSWORD_ARGON2_TIME_COST": best[2],
+            "PASSWORD_ARGON2_PARALLELISM": parallelism,
+        }
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.export import BATCH_SIZE, FORMATS, export_users
+from common.compression import StreamCompressor, supported_encodings
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every user, with the fields of UserSerializer, as CSV or "
+        "JSON Lines. Users are read and written in batches, so memory use "
+        "does not grow with the table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=list(FORMATS),
+            default="csv",
+            help="File format (default: csv)",
+        )
+        parser.add_argument(
+            "--output",
+            "-o",
+            help="File to write (default: standard output)",
+        )
+        parser.add_argument(
+            "--compress",
+            choices=("gzip", "br"),
+            help="Compress the file while writing it (needs --output)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help=f"Users read per query (default: {BATCH_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        compress = options["compress"]
+        if compress and not options["output"]:
+            raise CommandError("--compress needs --output.")
+        if compress and compress not in supported_encodings():
+            raise CommandError(
+                f"{compress} is not available; install the brotli package."
+            )
+        chunks = export_users(options["file_format"], options["batch_size"])
+
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        compressor = StreamCompressor(compress) if compress else None
+        with open(options["output"], "wb") as output:
+            for chunk in chunks:
+                data = chunk.encode()
+                output.write(compressor.compress(data) if compressor else data)
+            if compressor:
+                output.write(compressor.finish())
+        self.stderr.write(f"Exported users to {options['output']}")
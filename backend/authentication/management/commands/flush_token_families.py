@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authentication.models import TokenFamily
+from authentication.sharding import user_databases
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the token families of sessions whose last refresh token "
+        "has expired, on every user database."
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        for db in user_databases():
+            deleted, _ = (
+                TokenFamily.objects.using(db)
+                .filter(expires_at__lt=now)
+                .delete()
+            )
+            self.stdout.write(f"{db}: {deleted} expired token families")
@@ -0,0 +1,59 @@
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.signing import (
+    KEY_RING_ALGORITHMS,
+    generate_private_key,
+    new_kid,
+    private_key_pem,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Add a new private key to the JWT signing key ring. Unless "
+        "JWT_ACTIVE_KID pins another key, it signs new tokens after the "
+        "next restart while older keys keep verifying the tokens they "
+        "signed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--algorithm",
+            choices=KEY_RING_ALGORITHMS,
+            default=(
+                settings.JWT_ALGORITHM
+                if settings.JWT_ALGORITHM in KEY_RING_ALGORITHMS
+                else "EdDSA"
+            ),
+        )
+        parser.add_argument(
+            "--keys-dir",
+            default=settings.JWT_KEYS_DIR,
+            help="Directory holding <kid>.pem files (default: JWT_KEYS_DIR)",
+        )
+        parser.add_argument("--kid", help="Key id (default: timestamped)")
+
+    def handle(self, *args, **options):
+        if not options["keys_dir"]:
+            raise CommandError("Set JWT_KEYS_DIR or pass --keys-dir")
+        keys_dir = Path(options["keys_dir"])
+        keys_dir.mkdir(parents=True, exist_ok=True)
+
+        kid = options["kid"] or new_kid()
+        path = keys_dir / f"{kid}.pem"
+        if path.exists():
+            raise CommandError(f"{path} already exists")
+
+        pem = private_key_pem(generate_private_key(options["algorithm"]))
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as key_file:
+            key_file.write(pem)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {options['algorithm']} key {path}")
+        )
+        self.stdout.write(f"JWT_ACTIVE_KID={kid}")
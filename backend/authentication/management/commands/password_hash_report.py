@@ -0,0 +1,32 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from authentication.sharding import user_databases
+from common.hashers import current_password_prefix, password_scheme
+
+
+class Command(BaseCommand):
+    help = (
+        "Count accounts per password hashing scheme. Outdated hashes are "
+        "upgraded the next time their owner logs in."
+    )
+
+    def handle(self, *args, **options):
+        prefix = current_password_prefix()
+        schemes = Counter()
+        outdated = 0
+        for db in user_databases():
+            passwords = User.objects.using(db).values_list(
+                "password", flat=True
+            )
+            for encoded in passwords.iterator(chunk_size=2000):
+                schemes[password_scheme(encoded)] += 1
+                if not encoded.startswith(("!", prefix)):
+                    outdated += 1
+
+        for scheme, count in schemes.most_common():
+            self.stdout.write(f"{count:>10}  {scheme}")
+        self.stdout.write(f"Current parameters: {prefix.rstrip('$')}")
+        self.stdout.write(f"Accounts to rehash on next login: {outdated}")
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from common.profiling import make_trigger_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Print a signed token that makes ProfilingMiddleware profile any "
+        "request sending it in the X-Profile header or the _profile query "
+        "parameter, for PROFILING_TOKEN_MAX_AGE seconds."
+    )
+
+    def handle(self, *args, **options):
+        token = make_trigger_token()
+        minutes = settings.PROFILING_TOKEN_MAX_AGE // 60
+        self.stdout.write(f"X-Profile: {token}")
+        self.stdout.write(f"Valid for {minutes} minutes.")
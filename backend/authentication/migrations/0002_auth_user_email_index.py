@@ -0,0 +1,41 @@
+from django.db import migrations
+
+INDEX = "auth_user_email_prefix"
+
+
+def create_email_index(apps, schema_editor):
+    """Index auth_user.email for the admin's prefix search (auth_user
+    belongs to django.contrib.auth, so the index cannot live on the model).
+    On PostgreSQL the pattern operator class lets LIKE 'term%' use it, and
+    building it concurrently keeps the table writable meanwhile."""
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} "
+            "ON auth_user (email varchar_pattern_ops)"
+        )
+    elif schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(f"CREATE INDEX {INDEX} ON auth_user (email)")
+    else:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {INDEX} ON auth_user (email)"
+        )
+
+
+def drop_email_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(f"DROP INDEX {INDEX} ON auth_user")
+    else:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX}")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("authentication", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
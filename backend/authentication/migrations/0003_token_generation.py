@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0002_auth_user_email_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenGeneration',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='token_generation', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('generation', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'auth_token_generation',
+            },
+        ),
+    ]
@@ -1 +1,80 @@
-# Create your models here.
+import uuid
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models import Q
+
+
+class UserDirectoryEntry(models.Model):
+    """
+    Global index of sharded users, kept in the default database. It hands
+    out user ids and enforces username and email uniqueness across shards.
+    Its id is the user's id on their shard.
+    """
+
+    username = models.CharField(max_length=150, unique=True)
+    # Stored lowercased
+    email = models.CharField(max_length=254, blank=True)
+
+    class Meta:
+        db_table = "auth_user_directory"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["email"],
+                condition=~Q(email=""),
+                name="auth_user_directory_unique_email",
+            )
+        ]
+
+    def __str__(self):
+        return self.username
+
+
+class TokenGeneration(models.Model):
+    """
+    How many times all of a user's tokens were revoked. Tokens carry the
+    generation they were issued in and stop working once it is bumped.
+    Stored on the user's shard; users without a row are at generation 0.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="token_generation",
+    )
+    generation = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "auth_token_generation"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.generation}"
+
+
+class TokenFamily(models.Model):
+    """
+    One login session: the chain of refresh tokens rotated from one login.
+    Its refresh tokens carry the family id and their place in the chain;
+    only the token at the current generation can be refreshed (see
+    families.py). Stored on the user's shard and deleted when the session
+    is revoked.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="token_families"
+    )
+    generation = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    rotated_at = models.DateTimeField(null=True)
+    # Not indexed, so that rotations leave indexes alone; pruning expired
+    # families scans the table
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "auth_token_family"
+        verbose_name_plural = "token families"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.id} ({self.generation})"
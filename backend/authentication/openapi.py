@@ -0,0 +1,8 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class ShardedJWTScheme(SimpleJWTScheme):
+    """Document ShardedJWTAuthentication as the bearer ``jwtAuth`` scheme
+    of simplejwt's JWTAuthentication it extends"""
+
+    target_class = "authentication.backends.ShardedJWTAuthentication"
@@ -0,0 +1,69 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+from .grants import request_grants
+
+
+class HasServiceKey(BasePermission):
+    """Allow internal services presenting a key from SERVICE_API_KEYS in
+    the X-Service-Key header"""
+
+    message = "A valid service key is required."
+
+    def has_permission(self, request, view):
+        presented = request.META.get("HTTP_X_SERVICE_KEY", "")
+        return bool(presented) and any(
+            hmac.compare_digest(presented, key)
+            for key in settings.SERVICE_API_KEYS
+        )
+
+
+class GrantPermission(BasePermission):
+    """Base for permissions checked against the grants in the access token
+    (see grants.py) instead of the database"""
+
+    def has_permission(self, request, view):
+        return self.has_grants(request_grants(request))
+
+    def has_grants(self, grants):
+        raise NotImplementedError
+
+
+class IsStaff(GrantPermission):
+    def has_grants(self, grants):
+        return grants.is_staff
+
+
+class IsSuperuser(GrantPermission):
+    def has_grants(self, grants):
+        return grants.is_superuser
+
+
+class HasPermissions(GrantPermission):
+    """Require every permission in ``permissions``, e.g.
+    ``permission_classes = [HasPermissions.require("auth.view_user")]``"""
+
+    permissions = ()
+
+    @classmethod
+    def require(cls, *permissions):
+        return type(cls.__name__, (cls,), {"permissions": permissions})
+
+    def has_grants(self, grants):
+        return grants.has_perms(self.permissions)
+
+
+class InGroups(GrantPermission):
+    """Require membership of any of ``groups``, e.g.
+    ``permission_classes = [InGroups.require("support")]``"""
+
+    groups = ()
+
+    @classmethod
+    def require(cls, *groups):
+        return type(cls.__name__, (cls,), {"groups": groups})
+
+    def has_grants(self, grants):
+        return grants.in_any_group(self.groups)
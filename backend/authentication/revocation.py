@@ -0,0 +1,140 @@
+"""
+Revoking every token of a user at once.
+
+Tokens carry ``gen``, the user's token generation when they were issued
+(tokens without it count as generation 0). ``revoke_all_tokens`` bumps the
+generation with one UPDATE per shard (plus an INSERT the first time),
+which invalidates every access and refresh token issued before, wherever
+they are. Checking a token costs one cache lookup; the database is read
+on a cache miss.
+
+Deleted and deactivated users are at generation USER_INACTIVE, which
+revokes all their tokens: the database read on a miss is of the users,
+with their generation joined in.
+
+The cache entry is dropped when the generation changes or the user is
+saved or deleted. Without a shared cache (REDIS_URL) other workers, and
+users deactivated with QuerySet.update(), may keep accepting revoked
+tokens for up to TOKEN_GENERATION_CACHE_SECONDS.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .events import publish_user_event
+from .models import TokenGeneration
+from .sharding import shard_for_user_id
+
+GENERATION_CLAIM = "gen"
+# Generation of users that were deleted or deactivated
+USER_INACTIVE = -1
+
+
+def generation_key(user_id):
+    return f"auth:token-generation:{user_id}"
+
+
+def forget_generation(user_id):
+    cache.delete(generation_key(user_id))
+
+
+def token_generations(user_ids):
+    """Return {user id: current token generation, or USER_INACTIVE} for
+    these users"""
+    user_ids = set(user_ids)
+    keys = {generation_key(uid): uid for uid in user_ids}
+    cached = cache.get_many(keys)
+    generations = {keys[key]: value for key, value in cached.items()}
+
+    missing = defaultdict(list)
+    for uid in user_ids - generations.keys():
+        missing[shard_for_user_id(uid)].append(uid)
+    fetched = {}
+    for db, ids in missing.items():
+        found = {
+            pk: (generation or 0) if is_active else USER_INACTIVE
+            for pk, is_active, generation in User.objects.using(db)
+            .filter(pk__in=ids)
+            .values_list("pk", "is_active", "token_generation__generation")
+        }
+        fetched.update({uid: found.get(uid, USER_INACTIVE) for uid in ids})
+    if fetched:
+        cache.set_many(
+            {generation_key(uid): gen for uid, gen in fetched.items()},
+            settings.TOKEN_GENERATION_CACHE_SECONDS,
+        )
+    generations.update(fetched)
+    return generations
+
+
+def token_generation(user_id):
+    return token_generations([user_id])[user_id]
+
+
+def add_generation_claim(token, user):
+    token[GENERATION_CLAIM] = token_generation(user.pk)
+
+
+def is_revoked(payload, generations=None):
+    """Whether the token was issued before its user's tokens were revoked,
+    or its user is gone or deactivated. ``generations`` may hold
+    prefetched token_generations() results."""
+    user_id = payload.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return False
+    if generations is None:
+        current = token_generation(user_id)
+    else:
+        current = generations[user_id]
+    return (
+        current == USER_INACTIVE or payload.get(GENERATION_CLAIM, 0) < current
+    )
+
+
+def check_generation(token):
+    if is_revoked(token.payload):
+        raise TokenError(_("Token is revoked"))
+
+
+def revoke_all_tokens(user_ids):
+    """Invalidate every token issued so far to these users"""
+    by_db = defaultdict(list)
+    for uid in set(user_ids):
+        by_db[shard_for_user_id(uid)].append(uid)
+
+    for db, ids in by_db.items():
+        generations = TokenGeneration.objects.using(db)
+        with transaction.atomic(using=db):
+            updated = generations.filter(user_id__in=ids).update(
+                generation=F("generation") + 1
+            )
+            if updated < len(ids):
+                # First revocation of these users: start at generation 1
+                existing = set(
+                    generations.filter(user_id__in=ids).values_list(
+                        "user_id", flat=True
+                    )
+                )
+                generations.bulk_create(
+                    TokenGeneration(user_id=uid, generation=1)
+                    for uid in ids
+                    if uid not in existing
+                )
+            for uid in ids:
+                publish_user_event(
+                    uid, "session_revoked", {"scope": "all"}, using=db
+                )
+        keys = [generation_key(uid) for uid in ids]
+        cache.delete_many(keys)
+        # Again once committed, in case a reader cached the old value since
+        transaction.on_commit(
+            lambda keys=keys: cache.delete_many(keys), using=db
+        )
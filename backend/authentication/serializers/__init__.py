@@ -1,4 +1,27 @@
-from .auth_serializer import TokenSerializer, UserLoginSerializer
+from .auth_serializer import (
+    AuthResponseSerializer,
+    EventStreamTicketSerializer,
+    JWKSetSerializer,
+    LogoutSerializer,
+    MessageSerializer,
+    ProfileUpdateResponseSerializer,
+    TokenSerializer,
+    UserLoginSerializer,
+)
+from .availability_serializer import (
+    AvailabilityResponseSerializer,
+    AvailabilitySerializer,
+)
+from .introspection_serializer import (
+    TokenIntrospectionResponseSerializer,
+    TokenIntrospectionSerializer,
+    forget_introspection,
+)
+from .token_serializer import (
+    DeduplicatedTokenRefreshSerializer,
+    TokenObtainPairSerializer,
+    forget_refresh_result,
+)
 from .user_serializer import UserRegistrationSerializer, UserSerializer
 
 __all__ = [
@@ -6,4 +29,18 @@ __all__ = [
     "UserRegistrationSerializer",
     "UserLoginSerializer",
     "TokenSerializer",
+    "AuthResponseSerializer",
+    "LogoutSerializer",
+    "MessageSerializer",
+    "ProfileUpdateResponseSerializer",
+    "EventStreamTicketSerializer",
+    "JWKSetSerializer",
+    "DeduplicatedTokenRefreshSerializer",
+    "TokenObtainPairSerializer",
+    "forget_refresh_result",
+    "TokenIntrospectionSerializer",
+    "TokenIntrospectionResponseSerializer",
+    "forget_introspection",
+    "AvailabilitySerializer",
+    "AvailabilityResponseSerializer",
 ]
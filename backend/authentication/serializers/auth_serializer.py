@@ -1,6 +1,8 @@
 from django.contrib.auth import authenticate
 from rest_framework import serializers
 
+from .user_serializer import UserSerializer
+
 
 class UserLoginSerializer(serializers.Serializer):
     username = serializers.CharField()
@@ -11,6 +13,8 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get("password")
 
         if username and password:
+            # A successful check re-encodes hashes made with an older
+            # hasher or older cost parameters (see common/hashers.py)
             user = authenticate(username=username, password=password)
             if not user:
                 raise serializers.ValidationError("Invalid credentials")
@@ -28,3 +32,35 @@ class UserLoginSerializer(serializers.Serializer):
 class TokenSerializer(serializers.Serializer):
     access = serializers.CharField()
     refresh = serializers.CharField()
+
+
+class AuthResponseSerializer(serializers.Serializer):
+    """Body of a successful login or registration"""
+
+    message = serializers.CharField()
+    user = UserSerializer()
+    tokens = TokenSerializer()
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+
+class MessageSerializer(serializers.Serializer):
+    message = serializers.CharField()
+
+
+class ProfileUpdateResponseSerializer(serializers.Serializer):
+    message = serializers.CharField()
+    user = UserSerializer()
+
+
+class EventStreamTicketSerializer(serializers.Serializer):
+    ticket = serializers.CharField()
+    expires_in = serializers.IntegerField()
+
+
+class JWKSetSerializer(serializers.Serializer):
+    """Public signing keys as a JWK set (RFC 7517)"""
+
+    keys = serializers.ListField(child=serializers.DictField())
@@ -0,0 +1,41 @@
+from rest_framework import serializers
+
+from ..availability import user_index
+
+
+class AvailabilitySerializer(serializers.Serializer):
+    username = serializers.CharField(required=False, max_length=150)
+    email = serializers.EmailField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Provide a username or an email.")
+        return attrs
+
+    def check(self):
+        result = {}
+        if "username" in self.validated_data:
+            username = self.validated_data["username"]
+            result["username"] = {
+                "value": username,
+                "available": user_index.username_available(username),
+            }
+        if "email" in self.validated_data:
+            email = self.validated_data["email"]
+            result["email"] = {
+                "value": email,
+                "available": user_index.email_available(email),
+            }
+        return result
+
+
+class AvailabilityResultSerializer(serializers.Serializer):
+    value = serializers.CharField()
+    available = serializers.BooleanField()
+
+
+class AvailabilityResponseSerializer(serializers.Serializer):
+    """Availability of each value that was asked about"""
+
+    username = AvailabilityResultSerializer(required=False)
+    email = AvailabilityResultSerializer(required=False)
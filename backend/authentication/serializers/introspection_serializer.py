@@ -0,0 +1,156 @@
+import hashlib
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import serializers
+from rest_framework_simplejwt import state
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from ..families import (
+    FAMILY_CLAIM,
+    FAMILY_GENERATION_CLAIM,
+    family_generations,
+)
+from ..revocation import is_revoked, token_generations
+from ..sharding import shard_for_user_id
+
+INACTIVE = {"active": False}
+
+
+def introspection_key(token):
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    return f"auth:introspect:{digest}"
+
+
+def forget_introspection(token):
+    """Drop the cached result for a token that was just revoked"""
+    cache.delete(introspection_key(token))
+
+
+class TokenIntrospectionSerializer(serializers.Serializer):
+    """
+    Verify a batch of tokens at once. Signatures and expiry are checked
+    locally, the blacklist with one query per shard for the whole batch, and
+    every decided result is cached until the token expires. Token
+    generations (see revocation.py) and the token families of refresh
+    tokens (see families.py) are checked on every call, cached results
+    included, with one query per shard.
+    """
+
+    tokens = serializers.ListField(
+        child=serializers.CharField(trim_whitespace=True),
+        allow_empty=False,
+    )
+
+    def validate_tokens(self, tokens):
+        limit = settings.INTROSPECTION_MAX_BATCH
+        if len(tokens) > limit:
+            raise serializers.ValidationError(
+                f"At most {limit} tokens per request."
+            )
+        return tokens
+
+    def introspect(self):
+        tokens = self.validated_data["tokens"]
+        keys = [introspection_key(token) for token in tokens]
+        cached = cache.get_many(set(keys))
+
+        payloads = {}
+        for token, key in zip(tokens, keys, strict=True):
+            if key in cached or key in payloads:
+                continue
+            try:
+                payloads[key] = state.token_backend.decode(token)
+            except TokenBackendError:
+                payloads[key] = None
+
+        # One blacklist query per shard holding any of the tokens issued
+        # before token families
+        jtis_by_db = defaultdict(set)
+        for payload in payloads.values():
+            if (
+                payload
+                and api_settings.JTI_CLAIM in payload
+                and FAMILY_CLAIM not in payload
+            ):
+                db = shard_for_user_id(payload.get(api_settings.USER_ID_CLAIM))
+                jtis_by_db[db].add(payload[api_settings.JTI_CLAIM])
+        blacklisted = set()
+        for db, jtis in jtis_by_db.items():
+            blacklisted.update(
+                BlacklistedToken.objects.using(db)
+                .filter(token__jti__in=jtis)
+                .values_list("token__jti", flat=True)
+            )
+
+        now = time.time()
+        by_timeout = defaultdict(dict)
+        for key, payload in payloads.items():
+            if payload is None:
+                cached[key] = INACTIVE
+                continue
+            if payload.get(api_settings.JTI_CLAIM) in blacklisted:
+                result = INACTIVE
+            else:
+                result = {"active": True, "claims": payload}
+            cached[key] = result
+            timeout = int(payload.get("exp", now) - now)
+            if timeout > 0:
+                by_timeout[timeout][key] = result
+
+        for timeout, results in by_timeout.items():
+            cache.set_many(results, timeout)
+
+        return self.check_families(
+            self.check_generations([cached[key] for key in keys])
+        )
+
+    def check_generations(self, results):
+        """Report tokens revoked by a logout from all devices as inactive"""
+        active = [result for result in results if result["active"]]
+        generations = token_generations(
+            result["claims"][api_settings.USER_ID_CLAIM]
+            for result in active
+            if api_settings.USER_ID_CLAIM in result["claims"]
+        )
+        return [
+            INACTIVE
+            if result["active"] and is_revoked(result["claims"], generations)
+            else result
+            for result in results
+        ]
+
+    def check_families(self, results):
+        """Report refresh tokens that are not the latest of a live session
+        as inactive"""
+        ids_by_db = defaultdict(set)
+        for result in results:
+            claims = result.get("claims", {})
+            if result["active"] and FAMILY_CLAIM in claims:
+                db = shard_for_user_id(claims.get(api_settings.USER_ID_CLAIM))
+                ids_by_db[db].add(claims[FAMILY_CLAIM])
+        generations = family_generations(ids_by_db)
+        return [
+            INACTIVE
+            if result["active"]
+            and FAMILY_CLAIM in result["claims"]
+            and generations.get(result["claims"][FAMILY_CLAIM])
+            != result["claims"].get(FAMILY_GENERATION_CLAIM)
+            else result
+            for result in results
+        ]
+
+
+class TokenIntrospectionResultSerializer(serializers.Serializer):
+    active = serializers.BooleanField()
+    claims = serializers.DictField(required=False)
+
+
+class TokenIntrospectionResponseSerializer(serializers.Serializer):
+    """One result per token, in the order they were sent"""
+
+    results = TokenIntrospectionResultSerializer(many=True)
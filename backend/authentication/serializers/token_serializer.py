@@ -0,0 +1,74 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+)
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from common.singleflight import single_flight
+
+from ..tokens import RefreshToken
+from .introspection_serializer import forget_introspection
+
+
+def refresh_result_key(refresh_token):
+    digest = hashlib.sha256(refresh_token.encode()).hexdigest()
+    return f"auth:refresh:{digest}"
+
+
+def forget_refresh_result(refresh_token):
+    """Stop replaying pairs issued for or with refresh_token (on logout)"""
+    key = refresh_result_key(refresh_token)
+    parent_key = cache.get(f"{key}:parent")
+    cache.delete_many([key, f"{key}:parent", parent_key or key])
+
+
+class DeduplicatedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that signs and rotates at most once per refresh
+    token. Concurrent or repeated refreshes of the same token within
+    JWT_REFRESH_GRACE_SECONDS get the pair issued to the first request.
+    Rotation advances the token's family (see families.py).
+    """
+
+    token_class = RefreshToken
+
+    def issue(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.rotate()
+            data["refresh"] = str(refresh)
+        return data
+
+    def validate(self, attrs):
+        key = refresh_result_key(attrs["refresh"])
+        grace = settings.JWT_REFRESH_GRACE_SECONDS
+
+        def issue_once():
+            data = self.issue(attrs)
+            # Rotation invalidated the old token
+            forget_introspection(attrs["refresh"])
+            if "refresh" in data:
+                # Logging out with the new token must end the replay too
+                child_key = refresh_result_key(data["refresh"])
+                cache.set(f"{child_key}:parent", key, grace)
+            return data
+
+        return single_flight(key, issue_once, ttl=grace)
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        # simplejwt's own validate() would store last_login inside the
+        # request; the views leave that to authentication.tasks instead
+        data = super(BaseTokenObtainPairSerializer, self).validate(attrs)
+        refresh = self.get_token(self.user)
+        data["refresh"] = str(refresh)
+        data["access"] = str(refresh.access_token)
+        return data
@@ -1,8 +1,40 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
+from ..sharding import (
+    DirectoryConflictError,
+    create_user,
+    directory_conflict,
+    is_sharded,
+    update_user,
+)
 
-class UserSerializer(serializers.ModelSerializer):
+
+class DirectoryValidationMixin:
+    """Check username and email against the cross-shard directory, which
+    the model's own unique validators cannot see"""
+
+    def validate_directory(self, field, value):
+        if not is_sharded():
+            return value
+        exclude_id = self.instance.pk if self.instance is not None else None
+        conflict = directory_conflict(**{field: value}, exclude_id=exclude_id)
+        if conflict is not None:
+            raise serializers.ValidationError(conflict.message)
+        return value
+
+    def validate_username(self, value):
+        return self.validate_directory("username", value)
+
+    def validate_email(self, value):
+        return self.validate_directory("email", value)
+
+    @staticmethod
+    def directory_error(conflict):
+        return serializers.ValidationError({conflict.field: [conflict.message]})
+
+
+class UserSerializer(DirectoryValidationMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = (
@@ -15,8 +47,30 @@ class UserSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ("id", "date_joined")
 
+    def update(self, instance, validated_data):
+        """Write only the columns whose value changes, or nothing at all,
+        so concurrent writes to other columns (password, last_login) are
+        not overwritten. ``changed_fields`` lists what was written."""
+        self.changed_fields = [
+            field
+            for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        if not self.changed_fields:
+            return instance
+        changes = {
+            field: validated_data[field] for field in self.changed_fields
+        }
+        try:
+            update_user(instance, changes)
+        except DirectoryConflictError as conflict:
+            raise self.directory_error(conflict) from None
+        return instance
+
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(
+    DirectoryValidationMixin, serializers.ModelSerializer
+):
     password = serializers.CharField(write_only=True, min_length=8)
     password_confirm = serializers.CharField(write_only=True)
 
@@ -38,5 +92,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop("password_confirm")
-        user = User.objects.create_user(**validated_data)
-        return user
+        try:
+            return create_user(**validated_data)
+        except DirectoryConflictError as conflict:
+            raise self.directory_error(conflict) from None
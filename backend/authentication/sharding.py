@@ -0,0 +1,211 @@
+"""
+Hash-sharded user storage.
+
+With USER_SHARDS set, each user and their token blacklist rows live on
+the shard picked by a stable hash of the user id. Ids, usernames and emails
+are allocated in the global ``UserDirectoryEntry`` index on the default
+database, which also resolves usernames to users at login. Without shards
+every helper here falls back to the default database.
+
+Changing the number of shards remaps users, so existing rows must be moved
+before the new list is deployed.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from .models import TokenFamily, TokenGeneration, UserDirectoryEntry
+
+USERNAME_TAKEN = "A user with that username already exists."
+EMAIL_TAKEN = "A user with that email already exists."
+
+
+class DirectoryConflictError(Exception):
+    """A username or email is already taken on some shard"""
+
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+        self.message = message
+
+
+def is_sharded():
+    return bool(settings.USER_SHARDS)
+
+
+def user_databases():
+    """Every database alias that holds users"""
+    return list(settings.USER_SHARDS) or [DEFAULT_DB_ALIAS]
+
+
+def shard_for_user_id(user_id):
+    """Return the database alias holding a user's rows"""
+    shards = settings.USER_SHARDS
+    if not shards:
+        return DEFAULT_DB_ALIAS
+    digest = hashlib.blake2b(str(user_id).encode(), digest_size=8).digest()
+    return shards[int.from_bytes(digest, "big") % len(shards)]
+
+
+def normalize_directory_email(email):
+    return User.objects.normalize_email(email).lower() if email else ""
+
+
+def get_user_by_id(user_id):
+    return User.objects.using(shard_for_user_id(user_id)).get(pk=user_id)
+
+
+def get_user_by_username(username):
+    """Return the user with username; raise User.DoesNotExist otherwise"""
+    if not is_sharded():
+        return User.objects.get(username=username)
+    try:
+        entry = UserDirectoryEntry.objects.get(username=username)
+    except UserDirectoryEntry.DoesNotExist:
+        raise User.DoesNotExist from None
+    return get_user_by_id(entry.pk)
+
+
+def directory_conflict(username=None, email=None, exclude_id=None):
+    """Return the DirectoryConflictError a new username or email would cause"""
+    entries = UserDirectoryEntry.objects.all()
+    if exclude_id is not None:
+        entries = entries.exclude(pk=exclude_id)
+    if username is not None and entries.filter(username=username).exists():
+        return DirectoryConflictError("username", USERNAME_TAKEN)
+    email = normalize_directory_email(email)
+    if email and entries.filter(email=email).exists():
+        return DirectoryConflictError("email", EMAIL_TAKEN)
+    return None
+
+
+def _raise_conflict(username, email, exclude_id=None):
+    raise directory_conflict(
+        username, email, exclude_id
+    ) or DirectoryConflictError("username", USERNAME_TAKEN)
+
+
+def create_user(username, email="", password=None, **extra):
+    """Create a user on their shard, registering them in the directory"""
+    if not is_sharded():
+        return User.objects.create_user(username, email, password, **extra)
+
+    username = User.normalize_username(username)
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            entry = UserDirectoryEntry.objects.create(
+                username=username, email=normalize_directory_email(email)
+            )
+    except IntegrityError:
+        _raise_conflict(username, email)
+
+    user = User(
+        pk=entry.pk,
+        username=username,
+        email=User.objects.normalize_email(email),
+        **extra,
+    )
+    user.set_password(password)
+    try:
+        user.save(using=shard_for_user_id(entry.pk), force_insert=True)
+    except Exception:
+        entry.delete()
+        raise
+    return user
+
+
+def update_directory(user, username=None, email=None):
+    """Move a user's directory entry to a new username and/or email before
+    the user row changes; raise DirectoryConflictError if either is taken.
+    Return the previous values of what was moved."""
+    if not is_sharded():
+        return {}
+    changes = {}
+    previous = {}
+    if username is not None and username != user.username:
+        changes["username"] = username
+        previous["username"] = user.username
+    if email is not None and email != user.email:
+        changes["email"] = normalize_directory_email(email)
+        previous["email"] = normalize_directory_email(user.email)
+    if not changes:
+        return {}
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            UserDirectoryEntry.objects.filter(pk=user.pk).update(**changes)
+    except IntegrityError:
+        _raise_conflict(username, email, exclude_id=user.pk)
+    return previous
+
+
+def update_user(user, changes):
+    """Set ``changes`` on a user and save only those columns, moving the
+    directory entry first; raise DirectoryConflictError if the new
+    username or email is taken. The entry is moved back if the user row
+    cannot be saved."""
+    previous = update_directory(
+        user, username=changes.get("username"), email=changes.get("email")
+    )
+    for field, value in changes.items():
+        setattr(user, field, value)
+    try:
+        user.save(update_fields=list(changes))
+    except Exception:
+        if previous:
+            UserDirectoryEntry.objects.filter(pk=user.pk).update(**previous)
+        raise
+
+
+class UserShardRouter:
+    """
+    Send users, their outstanding/blacklisted tokens, token generation and
+    token families to the shard of the user they belong to, and the
+    directory to the default database.
+
+    Routers only see model instances, so queries by username, id or jti
+    must pick their database with the helpers above (``.using(...)``).
+    """
+
+    def _user_id(self, instance):
+        if isinstance(instance, User):
+            return instance.pk
+        if isinstance(
+            instance, (OutstandingToken, TokenFamily, TokenGeneration)
+        ):
+            return instance.user_id
+        if isinstance(instance, BlacklistedToken):
+            return instance.token.user_id
+        return None
+
+    def db_for_write(self, model, **hints):
+        if not is_sharded():
+            return None
+        if model is UserDirectoryEntry:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is None or instance._state.db is not None:
+            return None
+        user_id = self._user_id(instance)
+        return shard_for_user_id(user_id) if user_id is not None else None
+
+    db_for_read = db_for_write
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not is_sharded():
+            return None
+        return obj1._state.db == obj2._state.db
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if (
+            app_label == UserDirectoryEntry._meta.app_label
+            and model_name == UserDirectoryEntry._meta.model_name
+        ):
+            return db == DEFAULT_DB_ALIAS
+        return None
@@ -0,0 +1,82 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from .availability import user_index
+from .grants import bump_grants_version
+from .revocation import forget_generation
+
+# User fields that grants are derived from
+GRANT_FIELDS = {"is_active", "is_staff", "is_superuser"}
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, **kwargs):
+    user_index.add(instance)
+
+
+@receiver(post_save, sender=User)
+def outdate_user_grants(sender, instance, created, update_fields, **kwargs):
+    if created:
+        return
+    if update_fields is None or GRANT_FIELDS.intersection(update_fields):
+        bump_grants_version([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def outdate_user_generation(sender, instance, created, update_fields, **kwargs):
+    """Revoke or restore a user's tokens when it is (de)activated"""
+    if created:
+        return
+    if update_fields is None or "is_active" in update_fields:
+        forget_generation(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    forget_generation(instance.pk)
+
+
+def group_member_ids(group_ids):
+    return User.objects.filter(groups__in=group_ids).values_list(
+        "pk", flat=True
+    )
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def outdate_member_grants(sender, instance, action, reverse, pk_set, **kwargs):
+    """A user's groups or permissions changed"""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        bump_grants_version([instance.pk])
+    elif action == "pre_clear":
+        bump_grants_version(instance.user_set.values_list("pk", flat=True))
+    else:
+        bump_grants_version(pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def outdate_group_grants(sender, instance, action, reverse, pk_set, **kwargs):
+    """A group's permissions changed: outdate the grants of its members"""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        bump_grants_version(group_member_ids([instance.pk]))
+    elif action == "pre_clear":
+        bump_grants_version(
+            group_member_ids(instance.group_set.values_list("pk", flat=True))
+        )
+    else:
+        bump_grants_version(group_member_ids(pk_set))
+
+
+@receiver(pre_delete, sender=Group)
+def outdate_deleted_group_grants(sender, instance, **kwargs):
+    bump_grants_version(group_member_ids([instance.pk]))
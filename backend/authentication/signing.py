@@ -0,0 +1,224 @@
+"""
+Asymmetric token signing with a rotating, kid-indexed key ring.
+
+Private keys live in JWT_KEYS_DIR as ``<kid>.pem``. The key named by
+JWT_ACTIVE_KID (by default the newest kid) signs new tokens; every key in
+the directory verifies tokens whose header carries its kid and is published
+at ``/.well-known/jwks.json``. To rotate, add a new key, deploy, and delete
+the old file once the tokens it signed have expired.
+"""
+
+import json
+import secrets
+from datetime import UTC, datetime
+from functools import cached_property
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+from rest_framework_simplejwt import state
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+KEY_RING_ALGORITHMS = ("RS256", "EdDSA")
+
+
+def key_algorithm(private_key):
+    """Return the JWT algorithm a private key signs with"""
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        return "RS256"
+    if isinstance(private_key, ed25519.Ed25519PrivateKey):
+        return "EdDSA"
+    raise ImproperlyConfigured(
+        f"Unsupported signing key type {type(private_key).__name__}"
+    )
+
+
+def generate_private_key(algorithm):
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=3072)
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"Unsupported algorithm {algorithm}")
+
+
+def new_kid():
+    """Return a kid that sorts after every kid generated before it"""
+    now = datetime.now(UTC).strftime("%Y%m%d%H%M%S")
+    return f"{now}-{secrets.token_hex(4)}"
+
+
+def private_key_pem(private_key):
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def public_jwk(kid, private_key):
+    """Describe the public half of a signing key as a JWK"""
+    algorithm = key_algorithm(private_key)
+    exporter = RSAAlgorithm if algorithm == "RS256" else OKPAlgorithm
+    jwk = exporter.to_jwk(private_key.public_key(), as_dict=True)
+    return {**jwk, "kid": kid, "alg": algorithm, "use": "sig"}
+
+
+class SigningKeyRing:
+    """Private keys by kid, one of which signs new tokens"""
+
+    def __init__(self, private_keys, active_kid=None):
+        if not private_keys:
+            raise ImproperlyConfigured("The signing key ring is empty")
+        if active_kid is None:
+            active_kid = max(private_keys)
+        if active_kid not in private_keys:
+            raise ImproperlyConfigured(f"No signing key with kid {active_kid}")
+
+        self.private_keys = dict(private_keys)
+        self.algorithms = {
+            kid: key_algorithm(key) for kid, key in private_keys.items()
+        }
+        self.public_keys = {
+            kid: key.public_key() for kid, key in private_keys.items()
+        }
+        self.active_kid = active_kid
+
+    @classmethod
+    def from_directory(cls, path, active_kid=None):
+        private_keys = {}
+        for pem in sorted(Path(path).glob("*.pem")):
+            private_keys[pem.stem] = serialization.load_pem_private_key(
+                pem.read_bytes(), password=None
+            )
+        return cls(private_keys, active_kid or None)
+
+    @property
+    def active_algorithm(self):
+        return self.algorithms[self.active_kid]
+
+    @property
+    def signing_key(self):
+        return self.private_keys[self.active_kid]
+
+    @cached_property
+    def jwks(self):
+        return {
+            "keys": [
+                public_jwk(kid, key)
+                for kid, key in sorted(self.private_keys.items())
+            ]
+        }
+
+    @cached_property
+    def jwks_json(self):
+        return json.dumps(self.jwks, separators=(",", ":")).encode()
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    simplejwt token backend that signs with the key ring's active key,
+    stamps its kid into the header and verifies with the key the header
+    names, using only that key's algorithm.
+    """
+
+    def __init__(self, key_ring, **kwargs):
+        self.key_ring = key_ring
+        super().__init__(
+            key_ring.active_algorithm,
+            signing_key=key_ring.signing_key,
+            **kwargs,
+        )
+
+    def _validate_algorithm(self, algorithm):
+        # simplejwt 5.3 does not list EdDSA, which PyJWT supports
+        if algorithm not in KEY_RING_ALGORITHMS:
+            raise TokenBackendError(
+                _("Unrecognized algorithm type '{}'").format(algorithm)
+            )
+
+    def encode(self, payload):
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+
+        return jwt.encode(
+            jwt_payload,
+            self.signing_key,
+            algorithm=self.algorithm,
+            headers={"kid": self.key_ring.active_kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def decode(self, token, verify=True):
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.InvalidTokenError as ex:
+            raise TokenBackendError(_("Token is invalid or expired")) from ex
+        if kid not in self.key_ring.public_keys:
+            raise TokenBackendError(_("Token is invalid or expired"))
+
+        try:
+            return jwt.decode(
+                token,
+                self.key_ring.public_keys[kid],
+                algorithms=[self.key_ring.algorithms[kid]],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    "verify_aud": self.audience is not None,
+                    "verify_signature": verify,
+                },
+            )
+        except jwt.InvalidTokenError as ex:
+            raise TokenBackendError(_("Token is invalid or expired")) from ex
+
+
+def build_token_backend():
+    """Return a key ring backend for JWT_ALGORITHM, or None when tokens
+    are signed with the shared secret"""
+    if settings.JWT_ALGORITHM not in KEY_RING_ALGORITHMS:
+        return None
+    if not settings.JWT_KEYS_DIR:
+        raise ImproperlyConfigured(
+            f"JWT_KEYS_DIR is required for {settings.JWT_ALGORITHM}"
+        )
+
+    key_ring = SigningKeyRing.from_directory(
+        settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID
+    )
+    if key_ring.active_algorithm != settings.JWT_ALGORITHM:
+        raise ImproperlyConfigured(
+            f"Signing key {key_ring.active_kid} is not a "
+            f"{settings.JWT_ALGORITHM} key"
+        )
+    return KeyRingTokenBackend(
+        key_ring,
+        audience=api_settings.AUDIENCE,
+        issuer=api_settings.ISSUER,
+        leeway=api_settings.LEEWAY,
+        json_encoder=api_settings.JSON_ENCODER,
+    )
+
+
+def install_token_backend():
+    """Replace simplejwt's single-key backend with the key ring's"""
+    if settings.JWT_ALGORITHM in KEY_RING_ALGORITHMS:
+        # Loaded on first use, so generate_signing_key can create the first
+        # key; a broken key ring fails the signing key check in /readyz
+        state.token_backend = SimpleLazyObject(build_token_backend)
+
+
+def current_key_ring():
+    """Return the key ring tokens are signed with, if any"""
+    return getattr(state.token_backend, "key_ring", None)
@@ -0,0 +1,247 @@
+"""
+Server-sent event stream of a user's session, served by backend.asgi
+ahead of Django so that an idle connection holds no thread or database
+connection.
+
+``GET /api/auth/events/`` authenticates with the access token, sent as
+``Authorization: Bearer``. EventSource cannot send headers, so it passes a
+ticket instead (``?ticket=``), obtained with the access token from
+``POST /api/auth/events/ticket/``: the ticket is good for one connection
+within EVENT_STREAM_TICKET_SECONDS, so the URLs that end up in access logs
+hold nothing that can be replayed. Besides the events of events.py the
+stream sends:
+
+- ``ready`` on connect; clients should refetch anything they may have
+  missed while disconnected
+- ``token_expiring`` EVENT_STREAM_EXPIRY_WARNING_SECONDS before the access
+  token expires, then ``token_expired`` when it does, closing the stream
+  (reconnect with a fresh token)
+- ``resync`` when the client fell too far behind; the stream closes
+- a comment every EVENT_STREAM_HEARTBEAT_SECONDS, so proxies keep idle
+  connections open
+"""
+
+import asyncio
+import json
+import secrets
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+
+from common.events import broker
+
+from .backends import ShardedJWTAuthentication
+from .events import user_channel
+
+EVENTS_PATH = "/api/auth/events/"
+RETRY_MS = 3000
+
+
+def ticket_key(ticket):
+    return f"auth:stream-ticket:{ticket}"
+
+
+def issue_ticket(raw_token):
+    """A new ticket standing in for an access token on one connection"""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(
+        ticket_key(ticket), raw_token, settings.EVENT_STREAM_TICKET_SECONDS
+    )
+    return ticket
+
+
+def redeem_ticket(ticket):
+    """The access token of a ticket, which cannot be redeemed again"""
+    key = ticket_key(ticket)
+    raw_token = cache.get(key)
+    # Only the request that deletes the ticket may use it
+    if raw_token is None or not cache.delete(key):
+        raise AuthenticationFailed("Invalid or expired stream ticket.")
+    return raw_token.encode()
+
+
+def authenticate(scope):
+    """Return (user, validated token) for the request's access token"""
+    close_old_connections()
+    authentication = ShardedJWTAuthentication()
+    headers = dict(scope["headers"])
+    raw_token = None
+    if b"authorization" in headers:
+        raw_token = authentication.get_raw_token(headers[b"authorization"])
+    else:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        if query.get("ticket"):
+            raw_token = redeem_ticket(query["ticket"][0])
+    if raw_token is None:
+        raise AuthenticationFailed(
+            "Authentication credentials were not provided."
+        )
+    token = authentication.get_validated_token(raw_token)
+    return authentication.get_user(token), token
+
+
+def cors_headers(scope):
+    origin = dict(scope["headers"]).get(b"origin", b"").decode("latin-1")
+    if not origin or not (
+        settings.CORS_ALLOW_ALL_ORIGINS
+        or origin in settings.CORS_ALLOWED_ORIGINS
+    ):
+        return []
+    headers = [
+        (b"access-control-allow-origin", origin.encode("latin-1")),
+        (b"vary", b"Origin"),
+    ]
+    if settings.CORS_ALLOW_CREDENTIALS:
+        headers.append((b"access-control-allow-credentials", b"true"))
+    return headers
+
+
+async def respond(send, scope, status, body=None, headers=()):
+    headers = [*cors_headers(scope), *headers]
+    content = b""
+    if body is not None:
+        content = json.dumps(body).encode()
+        headers.append((b"content-type", b"application/json"))
+    await send(
+        {"type": "http.response.start", "status": status, "headers": headers}
+    )
+    await send({"type": "http.response.body", "body": content})
+
+
+def format_event(event, data, event_id=None):
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines += [f"event: {event}", f"data: {data}"]
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+async def watch_disconnect(receive, subscription):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+    subscription.close()
+
+
+async def event_stream(scope, receive, send):
+    """ASGI application for EVENTS_PATH"""
+    if scope["method"] == "OPTIONS":
+        return await respond(
+            send,
+            scope,
+            204,
+            headers=[
+                (b"access-control-allow-methods", b"GET, OPTIONS"),
+                (
+                    b"access-control-allow-headers",
+                    b"authorization, cache-control, last-event-id",
+                ),
+                (b"access-control-max-age", b"86400"),
+            ],
+        )
+    if scope["method"] != "GET":
+        return await respond(
+            send,
+            scope,
+            405,
+            {"detail": f'Method "{scope["method"]}" not allowed.'},
+            [(b"allow", b"GET, OPTIONS")],
+        )
+
+    try:
+        user, token = await sync_to_async(authenticate)(scope)
+    except (AuthenticationFailed, InvalidToken) as error:
+        detail = error.detail
+        if isinstance(detail, dict):
+            detail = detail.get("detail", "")
+        return await respond(
+            send,
+            scope,
+            401,
+            {"detail": str(detail)},
+            [(b"www-authenticate", b'Bearer realm="api"')],
+        )
+    if broker.subscriber_count() >= settings.EVENT_STREAM_MAX_CONNECTIONS:
+        return await respond(
+            send,
+            scope,
+            503,
+            {"detail": "Too many open event streams, try again later."},
+            [(b"retry-after", b"5")],
+        )
+
+    subscription = broker.subscribe(
+        user_channel(user.pk), settings.EVENT_STREAM_QUEUE_SIZE
+    )
+    watcher = asyncio.ensure_future(watch_disconnect(receive, subscription))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    *cors_headers(scope),
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-store"),
+                    # Stop nginx from buffering the stream
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        await stream(send, subscription, token["exp"])
+        await send({"type": "http.response.body", "body": b""})
+    except OSError:
+        pass  # the client went away mid-send
+    finally:
+        watcher.cancel()
+        subscription.close()
+
+
+async def stream(send, subscription, expires_at):
+    async def write(chunk):
+        await send(
+            {"type": "http.response.body", "body": chunk, "more_body": True}
+        )
+
+    await write(f"retry: {RETRY_MS}\n\n".encode())
+    await write(format_event("ready", json.dumps({"expires_at": expires_at})))
+    heartbeat = settings.EVENT_STREAM_HEARTBEAT_SECONDS
+    warn_at = expires_at - settings.EVENT_STREAM_EXPIRY_WARNING_SECONDS
+    warned = False
+
+    while True:
+        now = time.time()
+        if now >= expires_at:
+            await write(format_event("token_expired", "{}"))
+            return
+        if not warned and now >= warn_at:
+            warned = True
+            await write(
+                format_event(
+                    "token_expiring", json.dumps({"expires_at": expires_at})
+                )
+            )
+            continue
+        deadline = expires_at if warned else warn_at
+
+        message = await subscription.get(min(heartbeat, deadline - now))
+        if subscription.overflowed:
+            await write(format_event("resync", "{}"))
+            return
+        if message is not None:
+            event_id, event, data = message
+            await write(format_event(event, data, event_id))
+            if (
+                event == "session_revoked"
+                and json.loads(data)["scope"] == "all"
+            ):
+                return  # this stream's token is revoked too
+        elif subscription.closed.is_set():
+            return  # disconnected
+        elif time.time() < deadline:
+            await write(b": heartbeat\n\n")
@@ -0,0 +1,24 @@
+import time
+from datetime import UTC, datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from common.tasks import task
+
+from .sharding import shard_for_user_id
+
+
+@task
+def record_login(user_id, timestamp):
+    """Store the time of a login as the user's last_login"""
+    User.objects.using(shard_for_user_id(user_id)).filter(pk=user_id).update(
+        last_login=datetime.fromtimestamp(timestamp, UTC)
+    )
+
+
+def login_succeeded(user):
+    """Record a login in the background when SIMPLE_JWT's UPDATE_LAST_LOGIN
+    is on (off by default, as every login would then write to the user)"""
+    if settings.SIMPLE_JWT.get("UPDATE_LAST_LOGIN"):
+        record_login.enqueue(user.pk, time.time())
@@ -0,0 +1,128 @@
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from common.admission import GradientLimit
+from common.base_test_case import BaseTestCase
+from common.middleware.admission import AdmissionControlMiddleware
+
+
+@override_settings(
+    ADMISSION_MAX_CONCURRENCY=4,
+    ADMISSION_INITIAL_LIMIT=2,
+    ADMISSION_MAX_QUEUE_MS=500,
+)
+class AdmissionControlE2ETestCase(BaseTestCase):
+    def setup_test_data(self):
+        self.factory = RequestFactory()
+        self.middleware = AdmissionControlMiddleware(
+            lambda request: HttpResponse("ok")
+        )
+        self.controller = self.middleware.controller
+
+    def hold(self, name, count=1):
+        """Occupy slots as if requests to the view were still running"""
+        endpoint, priority = self.middleware.classify(reverse(name))
+        tickets = [
+            self.controller.acquire(endpoint, priority) for _ in range(count)
+        ]
+        self.assertNotIn(None, tickets)
+        for ticket in tickets:
+            self.addCleanup(self.controller.release, ticket)
+
+    def call(self, name, **headers):
+        return self.middleware(self.factory.get(reverse(name), **headers))
+
+    def test_requests_admitted_when_idle(self):
+        """Test that requests pass through while there is capacity"""
+        response = self.client.get(reverse("authentication:availability"))
+
+        self.assertNotEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(self.call("authentication:login").status_code, 200)
+
+    def test_endpoint_limit_sheds_with_retry_after(self):
+        """Test that an endpoint at its limit is refused with 503 while
+        other endpoints keep being served"""
+        self.hold("authentication:availability", 2)
+
+        response = self.call("authentication:availability")
+        self.assertEqual(response.status_code, 503)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        self.assertEqual(response["Cache-Control"], "no-store")
+        self.assertEqual(self.call("authentication:profile").status_code, 200)
+        self.assertEqual(self.controller.stats()["shed"], 1)
+
+    def test_logins_shed_before_refreshes(self):
+        """Test that logins may only fill part of the worker so refreshes
+        and profile reads still get through"""
+        self.hold("authentication:profile", 2)
+
+        self.assertEqual(self.call("authentication:login").status_code, 503)
+        self.assertEqual(self.call("authentication:register").status_code, 503)
+        self.assertEqual(
+            self.call("authentication:token_refresh").status_code, 200
+        )
+
+    def test_stale_backlog_requests_refused(self):
+        """Test that requests which waited too long for a worker are refused
+        sooner for lower priorities"""
+        waited = f"t={time.time() - 1.0:.3f}"
+
+        login = self.call("authentication:login", HTTP_X_REQUEST_START=waited)
+        refresh = self.call(
+            "authentication:token_refresh", HTTP_X_REQUEST_START=waited
+        )
+
+        self.assertEqual(login.status_code, 503)
+        self.assertEqual(refresh.status_code, 200)
+        self.assertEqual(self.controller.stats()["expired"], 1)
+
+    def test_shed_response_carries_cors_headers(self):
+        """Test that browsers can read a shed response and its Retry-After"""
+        response = self.client.post(
+            reverse("authentication:login"),
+            HTTP_ORIGIN="http://localhost:3000",
+            HTTP_X_REQUEST_START=f"t={time.time() - 1.0:.3f}",
+        )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            response["Access-Control-Allow-Origin"], "http://localhost:3000"
+        )
+        self.assertIn(
+            "retry-after",
+            response["Access-Control-Expose-Headers"].lower(),
+        )
+        self.assertIn("Retry-After", response)
+
+    def test_limit_follows_latency(self):
+        """Test that a busy endpoint's limit grows while it stays fast and
+        shrinks when it slows down"""
+        limit = GradientLimit(initial=4, maximum=50)
+        for _ in range(50):
+            limit.record(100, in_flight=limit.current)
+        grown = limit.current
+        self.assertGreater(grown, 4)
+
+        for _ in range(20):
+            limit.record(1000, in_flight=limit.current)
+        self.assertLess(limit.current, grown / 2)
+
+    def test_idle_endpoint_keeps_limit(self):
+        """Test that lightly used endpoints do not grow their limit"""
+        limit = GradientLimit(initial=4, maximum=50)
+        for _ in range(50):
+            limit.record(100, in_flight=1)
+        self.assertEqual(limit.current, 4)
+
+    @override_settings(ADMISSION_CONTROL_ENABLED=False)
+    def test_disabled(self):
+        """Test that the middleware can be switched off"""
+        with self.assertRaises(MiddlewareNotUsed):
+            AdmissionControlMiddleware(lambda request: HttpResponse())
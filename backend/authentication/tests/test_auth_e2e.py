@@ -6,6 +6,14 @@ from common.base_test_case import BaseTestCase
 
 
 class AuthenticationE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.existing_user = cls.create_test_user(
+            username="existinguser",
+            email="existing@example.com",
+            password="existingpass123",
+        )
+
     def setup_test_data(self):
         self.register_url = reverse("authentication:register")
         self.login_url = reverse("authentication:login")
@@ -20,12 +28,6 @@ class AuthenticationE2ETestCase(BaseTestCase):
             "password_confirm": "newpass123",
         }
 
-        self.existing_user = self.create_test_user(
-            username="existinguser",
-            email="existing@example.com",
-            password="existingpass123",
-        )
-
     def test_user_registration_success(self):
         """Test successful user registration with complete flow"""
         response = self.client.post(
@@ -0,0 +1,180 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from authentication.availability import prebuild_user_index, user_index
+from common.base_test_case import BaseTestCase
+from common.bloom import BloomFilter
+from common.fixtures import UserFactory
+from common.openapi import SchemaGenerator
+from common.throttling import ScopedRateThrottle
+
+
+class AvailabilityE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="takenuser", email="Taken@Example.com"
+        )
+
+    def setup_test_data(self):
+        self.availability_url = reverse("authentication:availability")
+        user_index.reset()
+        self.addCleanup(user_index.reset)
+
+    def check(self, **params):
+        return self.client.get(self.availability_url, params)
+
+    def test_free_values_need_no_queries(self):
+        """Test that values the filter has not seen are answered from
+        memory once it is built"""
+        self.check(username="warmup")
+
+        with self.assertNumQueries(0):
+            response = self.check(
+                username="freshname", email="fresh@example.com"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["username"]["available"])
+        self.assertTrue(response.data["email"]["available"])
+
+    def test_taken_values_confirmed_with_query(self):
+        """Test that possible hits are confirmed in the database, with
+        emails compared case-insensitively"""
+        self.check(username="warmup")
+
+        with self.assertNumQueries(2):
+            response = self.check(
+                username="takenuser", email="taken@EXAMPLE.com"
+            )
+
+        self.assertFalse(response.data["username"]["available"])
+        self.assertFalse(response.data["email"]["available"])
+
+    def test_registration_updates_filter(self):
+        """Test that a user registered by this process is taken at once"""
+        self.check(username="warmup")
+
+        self.client.post(
+            reverse("authentication:register"),
+            {
+                "username": "newcomer",
+                "email": "newcomer@example.com",
+                "password": "complexpass123",
+                "password_confirm": "complexpass123",
+            },
+            format="json",
+        )
+
+        response = self.check(username="newcomer")
+        self.assertFalse(response.data["username"]["available"])
+
+    def test_users_created_elsewhere_picked_up(self):
+        """Test that users inserted without signals appear after a sync"""
+        self.check(username="warmup")
+        (other,) = UserFactory.create_batch(1)
+
+        response = self.check(username=other.username)
+        self.assertTrue(response.data["username"]["available"])
+
+        with override_settings(AVAILABILITY_SYNC_SECONDS=0):
+            response = self.check(username=other.username)
+        self.assertFalse(response.data["username"]["available"])
+
+    def test_filters_built_at_startup(self):
+        """Test that a worker's first check is answered from filters built
+        when it loaded the application"""
+        prebuild_user_index()
+
+        with self.assertNumQueries(0):
+            response = self.check(username="freshname")
+        self.assertTrue(response.data["username"]["available"])
+        self.assertFalse(
+            self.check(username="takenuser").data["username"]["available"]
+        )
+
+    def test_startup_survives_missing_database(self):
+        """Test that workers still start when the filters cannot be built"""
+        with (
+            mock.patch.object(user_index, "build", side_effect=DatabaseError),
+            self.assertLogs("authentication.availability", "WARNING"),
+        ):
+            prebuild_user_index()
+
+        self.assertTrue(
+            self.check(username="freshname").data["username"]["available"]
+        )
+
+    @mock.patch.object(
+        ScopedRateThrottle, "THROTTLE_RATES", {"availability": "2/min"}
+    )
+    def test_checks_throttled_per_client(self):
+        """Test that each client may only make so many checks, however it
+        sets X-Forwarded-For"""
+        for _ in range(2):
+            self.assertEqual(
+                self.check(username="freshname").status_code,
+                status.HTTP_200_OK,
+            )
+
+        response = self.client.get(
+            self.availability_url,
+            {"username": "freshname"},
+            HTTP_X_FORWARDED_FOR="203.0.113.9",
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+        response = self.client.get(
+            self.availability_url,
+            {"username": "freshname"},
+            HTTP_X_REAL_IP="203.0.113.9",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_documented(self):
+        """Test that the query parameters and response are in the schema"""
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        operation = schema["paths"]["/api/auth/availability/"]["get"]
+        self.assertLessEqual(
+            {"username", "email"},
+            {parameter["name"] for parameter in operation["parameters"]},
+        )
+        content = operation["responses"]["200"]["content"]
+        self.assertEqual(
+            content["application/json"]["schema"]["$ref"],
+            "#/components/schemas/AvailabilityResponse",
+        )
+
+    def test_requires_a_value(self):
+        """Test that a request without username or email is rejected"""
+        self.assertEqual(self.check().status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.check(email="not-an-email")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BloomFilterTestCase(SimpleTestCase):
+    def test_no_false_negatives(self):
+        """Test that every added value is reported present"""
+        bloom = BloomFilter(1000, 0.01)
+        values = [f"user{i}" for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+
+        self.assertTrue(all(value in bloom for value in values))
+        self.assertFalse(bloom.saturated)
+
+    def test_false_positive_rate(self):
+        """Test that the error rate stays near the configured one"""
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"user{i}")
+
+        hits = sum(f"other{i}" in bloom for i in range(10000))
+        self.assertLess(hits, 300)
@@ -0,0 +1,102 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from common.base_test_case import BaseTestCase
+from common.benchmarks import compare, measure
+
+
+def result(median, spread=0.05):
+    return {"median": median, "q1": median - spread, "q3": median + spread}
+
+
+def run(calibration=1.0, **results):
+    return {
+        "calibration": {"median": calibration},
+        "results": {name: result(value) for name, value in results.items()},
+    }
+
+
+class BenchmarkE2ETestCase(BaseTestCase):
+    databases = "__all__"
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        """Test that only slowdowns beyond the threshold and the noise are
+        regressions, and that new or dropped benchmarks are listed"""
+        baseline = run(steady=1.0, slower=1.0, faster=1.0, dropped=1.0)
+        current = run(steady=1.1, slower=1.5, faster=0.5, added=1.0)
+
+        self.assertEqual(
+            compare(baseline, current, threshold=0.2),
+            [
+                ("added", "new", None),
+                ("dropped", "missing", None),
+                ("faster", "improved", 0.5),
+                ("slower", "regressed", 1.5),
+                ("steady", "unchanged", 1.1),
+            ],
+        )
+
+    def test_compare_ignores_noise(self):
+        """Test that a slower median is not a regression while the spread
+        of the rounds overlaps the baseline's"""
+        baseline = {"calibration": {}, "results": {"op": result(1.0, 0.3)}}
+        current = {"calibration": {}, "results": {"op": result(1.4, 0.3)}}
+
+        ((_, status, _),) = compare(baseline, current, threshold=0.2)
+        self.assertEqual(status, "unchanged")
+
+    def test_compare_relative_to_machine_speed(self):
+        """Test that a machine twice as slow overall shows no regression"""
+        baseline = run(calibration=1.0, op=1.0)
+        current = run(calibration=2.0, op=2.0)
+
+        self.assertEqual(
+            compare(baseline, current, threshold=0.2),
+            [("op", "unchanged", 1.0)],
+        )
+
+    def test_measure_reports_quartiles(self):
+        """Test that measure() times several rounds of enough calls"""
+        measured = measure(lambda: sum(range(100)), rounds=5)
+
+        self.assertEqual(measured["rounds"], 5)
+        self.assertGreater(measured["number"], 1)
+        self.assertLessEqual(measured["q1"], measured["median"])
+        self.assertLessEqual(measured["median"], measured["q3"])
+
+    def test_command_saves_and_compares_baseline(self):
+        """Test that manage.py benchmark stores a baseline and fails when a
+        later run regressed against it"""
+        options = ["urls", "tokens", "--rounds=3", "--min-time=0.001"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "baseline.json"
+            out = io.StringIO()
+            call_command(
+                "benchmark",
+                *options,
+                "--save",
+                f"--baseline={path}",
+                stdout=out,
+            )
+            baseline = json.loads(path.read_text())
+            self.assertEqual(
+                sorted(baseline["results"]),
+                [
+                    "tokens.access_verification",
+                    "tokens.refresh_for_user",
+                    "urls.resolve",
+                ],
+            )
+
+            for measured in baseline["results"].values():
+                measured.update(median=1e-9, q1=1e-9, q3=1e-9)
+            path.write_text(json.dumps(baseline))
+            with self.assertRaisesMessage(CommandError, "urls.resolve"):
+                call_command(
+                    "benchmark", *options, f"--baseline={path}", stdout=out
+                )
@@ -0,0 +1,147 @@
+import io
+
+import cbor2
+import msgpack
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from common.base_test_case import BaseTestCase
+from common.schema_views import PrecompressedSpectacularAPIView
+
+
+class BinaryFormatsE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="mobile", email="mobile@example.com"
+        )
+
+    def setup_test_data(self):
+        self.login_url = reverse("authentication:login")
+        self.profile_url = reverse("authentication:profile")
+
+    def post(self, url, body, content_type, accept=None):
+        return self.client.generic(
+            "POST",
+            url,
+            body,
+            content_type=content_type,
+            HTTP_ACCEPT=accept or content_type,
+        )
+
+    def test_login_with_msgpack(self):
+        """Test that a MessagePack login gets a MessagePack response with
+        the same data as JSON"""
+        response = self.post(
+            self.login_url,
+            msgpack.packb({"username": "mobile", "password": "testpass123"}),
+            "application/msgpack",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        body = msgpack.unpackb(response.content)
+        self.assertEqual(body["user"]["username"], "mobile")
+        self.assertEqual(
+            body["user"]["date_joined"], response.data["user"]["date_joined"]
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {body['tokens']['access']}"
+        )
+        self.assertEqual(self.client.get(self.profile_url).status_code, 200)
+
+    def test_profile_update_with_cbor(self):
+        """Test that profile updates accept and return CBOR"""
+        self.authenticate_user(self.test_user)
+        response = self.client.generic(
+            "PUT",
+            self.profile_url,
+            cbor2.dumps({"first_name": "Cee"}),
+            content_type="application/cbor",
+            HTTP_ACCEPT="application/cbor",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/cbor")
+        self.assertEqual(
+            cbor2.loads(response.content)["user"]["first_name"], "Cee"
+        )
+
+    def test_json_stays_the_default(self):
+        """Test that clients sending no Accept header still get JSON, and
+        that formats can be mixed"""
+        self.authenticate_user(self.test_user)
+        self.assertEqual(
+            self.client.get(self.profile_url)["Content-Type"],
+            "application/json",
+        )
+
+        response = self.post(
+            self.login_url,
+            msgpack.packb({"username": "mobile", "password": "wrong"}),
+            "application/msgpack",
+            accept="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.json())
+
+    def test_errors_rendered_in_requested_format(self):
+        """Test that validation errors, lazy strings included, render as
+        MessagePack"""
+        response = self.post(
+            self.login_url, msgpack.packb({}), "application/msgpack"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("username", msgpack.unpackb(response.content))
+
+    def test_malformed_body_rejected(self):
+        """Test that undecodable bodies are a 400, not a server error"""
+        for body, content_type in (
+            (b"\xc1", "application/msgpack"),
+            (b"\x81\x01\x02", "application/msgpack"),
+            (b"\xff\xff", "application/cbor"),
+        ):
+            with self.subTest(content_type=content_type, body=body):
+                response = self.post(
+                    self.login_url,
+                    body,
+                    content_type,
+                    accept="application/json",
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn("parse error", response.json()["detail"])
+
+    def test_schema_documents_media_types(self):
+        """Test that the OpenAPI schema lists the binary media types for
+        requests and responses"""
+        PrecompressedSpectacularAPIView.clear_cache()
+        self.addCleanup(PrecompressedSpectacularAPIView.clear_cache)
+        response = self.client.get(
+            reverse("schema"), HTTP_ACCEPT="application/json"
+        )
+        login = response.json()["paths"]["/api/auth/login/"]["post"]
+
+        for media_type in ("application/msgpack", "application/cbor"):
+            self.assertIn(media_type, login["requestBody"]["content"])
+            self.assertIn(media_type, login["responses"]["200"]["content"])
+
+    def test_benchmark_command(self):
+        """Test that the benchmark reports every format for each body"""
+        out = io.StringIO()
+        call_command(
+            "benchmark_formats",
+            "--number=10",
+            "--repeat=1",
+            stdout=out,
+            stderr=out,
+        )
+
+        report = out.getvalue()
+        self.assertIn("login response", report)
+        self.assertEqual(report.count("msgpack"), 5)
+        self.assertEqual(report.count("cbor"), 5)
+        self.assertNotIn("round-trip", report)
@@ -0,0 +1,281 @@
+import asyncio
+import gzip
+import json
+import os
+from unittest.mock import patch
+
+import brotli
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from common.base_test_case import BaseTestCase
+from common.compression import (
+    compress,
+    compression_exempt,
+    negotiate_encoding,
+)
+from common.middleware.compression import CompressionMiddleware
+from common.schema_views import PrecompressedSpectacularAPIView
+
+LARGE_BODY = json.dumps([{"id": i, "name": f"user{i}"} for i in range(200)])
+
+
+class NegotiateEncodingTestCase(BaseTestCase):
+    def test_negotiate_encoding(self):
+        """Test Accept-Encoding negotiation with q-values"""
+        cases = [
+            ("gzip, deflate, br", "br"),
+            ("gzip", "gzip"),
+            ("br;q=0.5, gzip;q=0.8", "gzip"),
+            ("br;q=0, gzip;q=0", None),
+            ("*", "br"),
+            ("gzip;q=0, *;q=0.1", "br"),
+            ("identity", None),
+            ("", None),
+            ("br;q=bogus, gzip", "gzip"),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(negotiate_encoding(header), expected)
+
+
+class CompressionMiddlewareTestCase(BaseTestCase):
+    def setup_test_data(self):
+        self.factory = RequestFactory()
+
+    def run_middleware(self, response, path="/api/items/", encoding="br"):
+        request = self.factory.get(path, HTTP_ACCEPT_ENCODING=encoding)
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request)
+
+    def test_large_response_compressed_with_brotli(self):
+        """Test that large API responses are compressed with brotli"""
+        response = self.run_middleware(HttpResponse(LARGE_BODY))
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(
+            brotli.decompress(response.content).decode(), LARGE_BODY
+        )
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+
+    def test_large_response_compressed_with_gzip(self):
+        """Test the gzip fallback for clients without brotli"""
+        response = self.run_middleware(
+            HttpResponse(LARGE_BODY), encoding="gzip, deflate"
+        )
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content).decode(), LARGE_BODY)
+
+    def test_small_response_not_compressed(self):
+        """Test that responses below the threshold are sent as is"""
+        response = self.run_middleware(HttpResponse('{"ok": true}'))
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, b'{"ok": true}')
+
+    @override_settings(COMPRESSION_MIN_SIZE=10)
+    def test_threshold_is_configurable(self):
+        """Test that COMPRESSION_MIN_SIZE controls the threshold"""
+        response = self.run_middleware(HttpResponse("x" * 100))
+
+        self.assertEqual(response["Content-Encoding"], "br")
+
+    def test_non_api_paths_not_compressed(self):
+        """Test that only /api/ responses are compressed"""
+        response = self.run_middleware(HttpResponse(LARGE_BODY), path="/admin/")
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_identity_only_client(self):
+        """Test clients that do not accept any supported encoding"""
+        response = self.run_middleware(
+            HttpResponse(LARGE_BODY), encoding="identity"
+        )
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_already_encoded_and_no_transform_skipped(self):
+        """Test that encoded and no-transform responses pass through"""
+        encoded = HttpResponse(LARGE_BODY)
+        encoded["Content-Encoding"] = "gzip"
+        no_transform = HttpResponse(LARGE_BODY)
+        no_transform["Cache-Control"] = "no-transform"
+
+        for response in (encoded, no_transform):
+            with self.subTest(response=response):
+                result = self.run_middleware(response)
+                self.assertEqual(result.content, LARGE_BODY.encode())
+
+    def test_incompressible_response_kept(self):
+        """Test that compression is skipped when it does not help"""
+        body = os.urandom(2048)
+        response = self.run_middleware(HttpResponse(body))
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_strong_etag_weakened(self):
+        """Test that a strong ETag becomes weak after compression"""
+        response = HttpResponse(LARGE_BODY)
+        response["ETag"] = '"abc"'
+
+        response = self.run_middleware(response)
+
+        self.assertEqual(response["ETag"], 'W/"abc"')
+
+    def test_streaming_response_compressed_per_chunk(self):
+        """Test that streaming responses are compressed while streaming"""
+        chunks = [f"{i},row\n".encode() * 50 for i in range(20)]
+        response = self.run_middleware(
+            StreamingHttpResponse(iter(chunks)), encoding="gzip"
+        )
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), 2)
+        self.assertEqual(gzip.decompress(b"".join(parts)), b"".join(chunks))
+
+    def test_async_streaming_response_compressed(self):
+        """Test that async streaming responses are compressed"""
+        chunks = [b"event-data " * 100 for _ in range(5)]
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        response = self.run_middleware(StreamingHttpResponse(stream()))
+
+        async def collect():
+            return [part async for part in response.streaming_content]
+
+        parts = asyncio.run(collect())
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(b"".join(parts)), b"".join(chunks))
+
+    def test_event_stream_not_compressed(self):
+        """Test that server-sent events are never buffered by compression"""
+        response = StreamingHttpResponse(
+            iter([b"data: x\n\n"]), content_type="text/event-stream"
+        )
+
+        response = self.run_middleware(response)
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=0)
+class TokenResponseCompressionTestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="breach", email="breach@example.com"
+        )
+
+    def test_token_responses_not_compressed(self):
+        """Test that responses carrying tokens are never compressed, so
+        their size cannot reveal the tokens (BREACH)"""
+        with patch(
+            "common.middleware.compression.compress", wraps=compress
+        ) as compressor:
+            login = self.client.post(
+                reverse("authentication:login"),
+                {"username": "breach", "password": "testpass123"},
+                format="json",
+                HTTP_ACCEPT_ENCODING="gzip",
+            )
+            register = self.client.post(
+                reverse("authentication:register"),
+                {
+                    "username": "breach2",
+                    "email": "breach2@example.com",
+                    "password": "complexpass123",
+                    "password_confirm": "complexpass123",
+                },
+                format="json",
+                HTTP_ACCEPT_ENCODING="gzip",
+            )
+            self.assertIn("tokens", login.json())
+            self.assertIn("tokens", register.json())
+            compressor.assert_not_called()
+
+            self.authenticate_user(self.test_user)
+            profile = self.client.get(
+                reverse("authentication:profile"), HTTP_ACCEPT_ENCODING="gzip"
+            )
+        self.assertEqual(profile["Content-Encoding"], "gzip")
+        compressor.assert_called_once()
+
+    def test_exempt_response_passes_through(self):
+        """Test that the middleware leaves marked responses alone"""
+        view = compression_exempt(lambda request: HttpResponse(LARGE_BODY))
+        request = RequestFactory().get("/api/items/", HTTP_ACCEPT_ENCODING="br")
+
+        response = CompressionMiddleware(view)(request)
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content.decode(), LARGE_BODY)
+
+
+class PrecompressedSchemaTestCase(BaseTestCase):
+    def setup_test_data(self):
+        self.schema_url = reverse("schema")
+        PrecompressedSpectacularAPIView.clear_cache()
+
+    def tearDown(self):
+        PrecompressedSpectacularAPIView.clear_cache()
+
+    def test_schema_compressed_once_and_cached(self):
+        """Test that the schema is generated and compressed only once"""
+        with patch(
+            "drf_spectacular.generators.SchemaGenerator.get_schema",
+            autospec=True,
+            return_value={"openapi": "3.0.3", "paths": {"/x": "y" * 2000}},
+        ) as get_schema:
+            first = self.client.get(
+                self.schema_url, HTTP_ACCEPT_ENCODING="br, gzip"
+            )
+            second = self.client.get(
+                self.schema_url, HTTP_ACCEPT_ENCODING="br, gzip"
+            )
+
+        self.assertEqual(get_schema.call_count, 1)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Content-Encoding"], "br")
+        self.assertEqual(first.content, second.content)
+        self.assertIn(b"openapi", brotli.decompress(first.content))
+
+    @patch(
+        "drf_spectacular.generators.SchemaGenerator.get_schema",
+        return_value={"openapi": "3.0.3"},
+    )
+    def test_schema_variants(self, get_schema):
+        """Test identity, gzip and conditional schema responses"""
+        plain = self.client.get(self.schema_url, HTTP_ACCEPT_ENCODING="")
+        gzipped = self.client.get(self.schema_url, HTTP_ACCEPT_ENCODING="gzip")
+        not_modified = self.client.get(
+            self.schema_url, HTTP_IF_NONE_MATCH=plain["ETag"]
+        )
+
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn(b"openapi", plain.content)
+        self.assertIn("filename=", plain["Content-Disposition"])
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(gzipped.content), plain.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_schema_json_format(self):
+        """Test that each negotiated format is cached separately"""
+        yaml_response = self.client.get(self.schema_url)
+        json_response = self.client.get(
+            self.schema_url, HTTP_ACCEPT="application/vnd.oai.openapi+json"
+        )
+
+        self.assertEqual(
+            yaml_response["Content-Type"],
+            "application/vnd.oai.openapi; charset=utf-8",
+        )
+        self.assertEqual(json.loads(json_response.content)["openapi"], "3.0.3")
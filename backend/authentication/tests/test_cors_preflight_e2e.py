@@ -0,0 +1,84 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from common.base_test_case import BaseTestCase
+
+ORIGIN = "http://localhost:3000"
+
+
+@override_settings(
+    CORS_ALLOW_ALL_ORIGINS=False,
+    CORS_ALLOWED_ORIGINS=[ORIGIN],
+    CORS_PREFLIGHT_MAX_AGE=600,
+)
+class CorsPreflightE2ETestCase(BaseTestCase):
+    def setup_test_data(self):
+        self.profile_url = reverse("authentication:profile")
+
+    def preflight(self, origin=ORIGIN, **headers):
+        return self.client.options(
+            self.profile_url,
+            HTTP_ORIGIN=origin,
+            HTTP_ACCESS_CONTROL_REQUEST_METHOD="PUT",
+            HTTP_ACCESS_CONTROL_REQUEST_HEADERS="authorization, content-type",
+            **headers,
+        )
+
+    def test_preflight_short_circuited(self):
+        """Test that a preflight from an allowed origin is answered with
+        the CORS headers and a max-age before the rest of the stack"""
+        with self.assertNumQueries(0):
+            response = self.preflight()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Access-Control-Allow-Origin"], ORIGIN)
+        self.assertEqual(response["Access-Control-Allow-Credentials"], "true")
+        self.assertEqual(response["Access-Control-Max-Age"], "600")
+        self.assertIn("PUT", response["Access-Control-Allow-Methods"])
+        self.assertIn("authorization", response["Access-Control-Allow-Headers"])
+        self.assertEqual(response["Vary"], "origin")
+        # SecurityMiddleware never saw it
+        self.assertNotIn("X-Content-Type-Options", response)
+
+    def test_other_origins_passed_on(self):
+        """Test that preflights from unknown origins get no CORS headers"""
+        response = self.preflight(origin="https://evil.example.com")
+
+        self.assertNotIn("Access-Control-Allow-Origin", response)
+        self.assertIn("X-Content-Type-Options", response)
+
+    @override_settings(
+        CORS_ALLOWED_ORIGIN_REGEXES=[r"^https://\w+\.example\.com$"]
+    )
+    def test_regex_origins_left_to_corsheaders(self):
+        """Test that origins matched by regexes are still allowed"""
+        response = self.preflight(origin="https://app.example.com")
+
+        self.assertEqual(
+            response["Access-Control-Allow-Origin"], "https://app.example.com"
+        )
+        self.assertIn("X-Content-Type-Options", response)
+
+    def test_plain_options_and_requests_passed_on(self):
+        """Test that non-preflight requests reach the views and still get
+        CORS headers"""
+        options = self.client.options(self.profile_url, HTTP_ORIGIN=ORIGIN)
+        self.assertIn("X-Content-Type-Options", options)
+
+        self.authenticate_user(self.create_test_user())
+        response = self.client.get(self.profile_url, HTTP_ORIGIN=ORIGIN)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Access-Control-Allow-Origin"], ORIGIN)
+
+    @override_settings(
+        CORS_ALLOW_ALL_ORIGINS=True, CORS_ALLOW_CREDENTIALS=False
+    )
+    def test_wildcard_without_credentials(self):
+        """Test that any origin gets "*" when all are allowed without
+        credentials"""
+        response = self.preflight(origin="https://anywhere.example.com")
+
+        self.assertEqual(response["Access-Control-Allow-Origin"], "*")
+        self.assertNotIn("Access-Control-Allow-Credentials", response)
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import queue
+import time
+
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.asgi import application
+from common.base_test_case import BaseTestCase
+from common.events import EventBroker, RedisEventBroker, broker
+
+
+def parse_events(body):
+    """[(event, data)] of a chunk of the stream, heartbeats as (None, None)"""
+    events = []
+    for block in body.decode().split("\n\n"):
+        if block.startswith(":"):
+            events.append((None, None))
+            continue
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class FakeRedis:
+    """The publish/subscribe part of a Redis client, for one channel"""
+
+    def __init__(self):
+        self.messages = queue.Queue()
+
+    def publish(self, channel, message):
+        self.messages.put({"type": "message", "data": message.encode()})
+        return 1
+
+    def pubsub(self, ignore_subscribe_messages):
+        return self
+
+    def subscribe(self, channel):
+        pass
+
+    def listen(self):
+        while True:
+            yield self.messages.get()
+
+
+class EventStreamE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="streamer", email="streamer@example.com"
+        )
+
+    def setup_test_data(self):
+        self.tokens = self.get_jwt_tokens(self.test_user)
+
+    async def connect(self, access=None, query=None, headers=(), method="GET"):
+        headers = list(headers)
+        if access is not None:
+            headers.append((b"authorization", f"Bearer {access}".encode()))
+        communicator = ApplicationCommunicator(
+            application,
+            {
+                "type": "http",
+                "method": method,
+                "path": "/api/auth/events/",
+                "query_string": (query or "").encode(),
+                "headers": headers,
+            },
+        )
+        await communicator.send_input({"type": "http.request", "body": b""})
+        start = await communicator.receive_output(2)
+        return communicator, start
+
+    async def next_events(self, communicator, timeout=2):
+        message = await communicator.receive_output(timeout)
+        return parse_events(message["body"])
+
+    async def open_stream(self, access=None):
+        communicator, start = await self.connect(
+            access or self.tokens["access"]
+        )
+        self.assertEqual(start["status"], 200)
+        await communicator.receive_output(2)  # retry
+        (ready,) = await self.next_events(communicator)
+        self.assertEqual(ready[0], "ready")
+        return communicator
+
+    async def close(self, communicator):
+        await communicator.send_input({"type": "http.disconnect"})
+        await communicator.wait(2)
+
+    async def test_requires_valid_token(self):
+        """Test that the stream needs an access token"""
+        for access in (None, "not-a-token"):
+            with self.subTest(access=access):
+                communicator, start = await self.connect(access)
+                self.assertEqual(start["status"], 401)
+                body = await communicator.receive_output(2)
+                self.assertIn("detail", json.loads(body["body"]))
+
+    def get_ticket(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}"
+        )
+        response = self.client.post(
+            reverse("authentication:event_stream_ticket")
+        )
+        self.assertEqual(response.data["expires_in"], 30)
+        return response.data["ticket"]
+
+    async def test_stream_headers_and_ticket(self):
+        """Test that EventSource clients can pass a ticket in the query
+        string and get an unbuffered event stream"""
+        ticket = await sync_to_async(self.get_ticket)()
+        communicator, start = await self.connect(
+            query=f"ticket={ticket}",
+            headers=[(b"origin", b"http://localhost:3000")],
+        )
+        headers = dict(start["headers"])
+
+        self.assertEqual(start["status"], 200)
+        self.assertEqual(headers[b"content-type"], b"text/event-stream")
+        self.assertEqual(headers[b"x-accel-buffering"], b"no")
+        self.assertEqual(
+            headers[b"access-control-allow-origin"], b"http://localhost:3000"
+        )
+        self.assertEqual(broker.subscriber_count(), 1)
+        await self.close(communicator)
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_ticket_used_once(self):
+        """Test that a ticket opens one stream only, and that access
+        tokens are not accepted in the query string"""
+        ticket = await sync_to_async(self.get_ticket)()
+        communicator, start = await self.connect(query=f"ticket={ticket}")
+        self.assertEqual(start["status"], 200)
+
+        for query in (f"ticket={ticket}", f"token={self.tokens['access']}"):
+            with self.subTest(query=query[:6]):
+                refused, start = await self.connect(query=query)
+                self.assertEqual(start["status"], 401)
+        await self.close(communicator)
+
+    async def test_profile_update_pushed(self):
+        """Test that ProfileView.put pushes the new profile once committed"""
+        communicator = await self.open_stream()
+
+        def update():
+            self.authenticate_user(self.test_user)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.put(
+                    reverse("authentication:profile"),
+                    {"first_name": "Pushed"},
+                    format="json",
+                )
+
+        await sync_to_async(update)()
+        ((event, data),) = await self.next_events(communicator)
+
+        self.assertEqual(event, "profile_updated")
+        self.assertEqual(data["first_name"], "Pushed")
+        await self.close(communicator)
+
+    async def test_logout_pushed_to_other_devices(self):
+        """Test that logging out one session tells the user's other
+        streams, and logging out everywhere also ends them"""
+        communicator = await self.open_stream()
+        other = await sync_to_async(self.get_jwt_tokens)(self.test_user)
+
+        def logout(url, data=None):
+            self.client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {other['access']}"
+            )
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse(url), data, format="json")
+
+        await sync_to_async(logout)(
+            "authentication:logout", {"refresh": other["refresh"]}
+        )
+        self.assertEqual(
+            await self.next_events(communicator),
+            [("session_revoked", {"scope": "session"})],
+        )
+
+        await sync_to_async(logout)("authentication:logout_all")
+        self.assertEqual(
+            await self.next_events(communicator),
+            [("session_revoked", {"scope": "all"})],
+        )
+        end = await communicator.receive_output(2)
+        self.assertFalse(end.get("more_body", False))
+
+    @override_settings(
+        EVENT_STREAM_HEARTBEAT_SECONDS=0.05,
+        EVENT_STREAM_EXPIRY_WARNING_SECONDS=1,
+    )
+    async def test_heartbeats_and_token_expiry(self):
+        """Test that idle streams get heartbeats, a warning before the
+        access token expires, and are closed when it does"""
+        token = AccessToken(self.tokens["access"])
+        token["exp"] = int(time.time()) + 2
+        communicator = await self.open_stream(str(token))
+
+        seen = []
+        while "token_expired" not in seen:
+            seen += [e for e, _ in await self.next_events(communicator)]
+
+        self.assertIn(None, seen)
+        self.assertLess(
+            seen.index("token_expiring"), seen.index("token_expired")
+        )
+        end = await communicator.receive_output(2)
+        self.assertFalse(end.get("more_body", False))
+
+    async def test_slow_subscriber_dropped(self):
+        """Test that a subscriber falling behind is dropped instead of
+        buffering events without bound"""
+        local = EventBroker()
+        subscription = local.subscribe("user:1", max_queue=2)
+        for i in range(3):
+            local.publish("user:1", "profile_updated", {"n": i})
+        await asyncio.sleep(0)
+
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(local.subscriber_count(), 0)
+        self.assertEqual(local.publish("user:1", "profile_updated", {}), 0)
+
+    async def test_redis_broker_fans_out(self):
+        """Test that with Redis an event published by another process
+        reaches the subscribers of this one"""
+        client = FakeRedis()
+        here = RedisEventBroker(client)
+        subscription = here.subscribe("user:1", max_queue=2)
+
+        elsewhere = RedisEventBroker(client)
+        await sync_to_async(elsewhere.publish)(
+            "user:1", "profile_updated", {"n": 1}
+        )
+        message = await subscription.get(2)
+
+        self.assertEqual(message[1:], ("profile_updated", '{"n": 1}'))
+        subscription.close()
+
+    @override_settings(EVENT_STREAM_QUEUE_SIZE=1)
+    async def test_slow_stream_told_to_resync(self):
+        """Test that a stream that fell behind asks the client to resync
+        and ends"""
+        communicator = await self.open_stream()
+        for i in range(3):
+            broker.publish(
+                f"user:{self.test_user.pk}", "profile_updated", {"n": i}
+            )
+
+        self.assertEqual(await self.next_events(communicator), [("resync", {})])
+        end = await communicator.receive_output(2)
+        self.assertFalse(end.get("more_body", False))
+
+    @override_settings(EVENT_STREAM_MAX_CONNECTIONS=1)
+    async def test_connection_limit(self):
+        """Test that a process refuses streams beyond its limit"""
+        communicator = await self.open_stream()
+
+        refused, start = await self.connect(self.tokens["access"])
+        self.assertEqual(start["status"], 503)
+        await self.close(communicator)
+
+    async def test_other_requests_reach_django(self):
+        """Test that the ASGI app passes everything else to Django"""
+        communicator = ApplicationCommunicator(
+            application,
+            {
+                "type": "http",
+                "method": "GET",
+                "path": "/healthz",
+                "query_string": b"",
+                "headers": [],
+            },
+        )
+        await communicator.send_input({"type": "http.request", "body": b""})
+        start = await communicator.receive_output(2)
+        self.assertEqual(start["status"], 200)
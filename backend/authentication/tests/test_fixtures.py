@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from common.base_test_case import BaseTestCase
+from common.fixtures import (
+    UserFactory,
+    cached_password_hash,
+    clear_password_hash_cache,
+)
+
+
+class FixturesTestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.class_user = cls.create_test_user(
+            username="classuser",
+            email="class@example.com",
+            password="classpass123",
+        )
+
+    def test_class_data_created_once(self):
+        """Test that class-level users exist without a per-test insert"""
+        self.assertEqual(User.objects.filter(username="classuser").count(), 1)
+        self.assertTrue(self.class_user.check_password("classpass123"))
+
+    def test_class_data_isolated_between_tests(self):
+        """Test that in-memory changes to class data do not leak"""
+        self.class_user.first_name = "Changed"
+        self.class_user.save()
+        self.assertEqual(
+            User.objects.get(username="classuser").first_name, "Changed"
+        )
+
+    def test_class_data_not_changed_by_other_tests(self):
+        """Test that the class user is pristine in every test"""
+        self.assertEqual(self.class_user.first_name, "")
+        self.assertEqual(User.objects.get(username="classuser").first_name, "")
+
+    def test_fast_hasher_profile_used_in_tests(self):
+        """Test that the suite runs with the fast hasher profile"""
+        self.assertEqual(settings.PASSWORD_HASHER_PROFILE, "fast")
+        self.assertEqual(get_hasher().algorithm, "md5")
+
+    def test_cached_password_hash_reused(self):
+        """Test that known passwords are hashed only once"""
+        first = UserFactory.create(password="samepass123")
+        second = UserFactory.create(password="samepass123")
+
+        self.assertEqual(first.password, second.password)
+        self.assertTrue(second.check_password("samepass123"))
+
+    @override_settings(
+        PASSWORD_HASHERS=["django.contrib.auth.hashers.ScryptPasswordHasher"]
+    )
+    def test_cached_password_hash_follows_hasher(self):
+        """Test that swapping the hasher does not reuse stale hashes"""
+        encoded = cached_password_hash("hasherpass123")
+        self.assertTrue(encoded.startswith("scrypt$"))
+        clear_password_hash_cache()
+
+    def test_create_batch(self):
+        """Test creating many users with a single insert"""
+        users = UserFactory.create_batch(5, password="batchpass123")
+
+        self.assertEqual(len(users), 5)
+        self.assertEqual(
+            User.objects.filter(pk__in=[u.pk for u in users]).count(), 5
+        )
+        self.assertTrue(
+            User.objects.get(pk=users[0].pk).check_password("batchpass123")
+        )
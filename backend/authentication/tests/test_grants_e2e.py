@@ -0,0 +1,184 @@
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.grants import clear_local_caches
+from authentication.permissions import (
+    HasPermissions,
+    InGroups,
+    IsStaff,
+    IsSuperuser,
+)
+from common.base_test_case import BaseTestCase
+
+
+def grant_view(*permission_classes):
+    class GrantView(APIView):
+        def get(self, request):
+            return Response({"ok": True})
+
+    return GrantView.as_view(permission_classes=list(permission_classes))
+
+
+class GrantClaimsE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.support = Group.objects.create(name="support")
+        cls.view_user = Permission.objects.get(codename="view_user")
+        cls.support.permissions.add(cls.view_user)
+        cls.staff_user = cls.create_test_user(
+            username="granted", email="granted@example.com", is_staff=True
+        )
+        cls.staff_user.groups.add(cls.support)
+        cls.plain_user = cls.create_test_user(
+            username="plain", email="plain@example.com"
+        )
+
+    def setup_test_data(self):
+        cache.clear()
+        clear_local_caches()
+        self.addCleanup(clear_local_caches)
+        self.factory = APIRequestFactory()
+
+    def access_for(self, user):
+        return self.get_jwt_tokens(user)["access"]
+
+    def call(self, view, access):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        return view(request)
+
+    def test_login_tokens_carry_grants(self):
+        """Test that issued tokens list roles, groups, permissions and the
+        grants version"""
+        response = self.client.post(
+            reverse("authentication:login"),
+            {"username": "granted", "password": "testpass123"},
+            format="json",
+        )
+        claims = AccessToken(response.data["tokens"]["access"]).payload
+
+        self.assertEqual(claims["roles"], ["staff"])
+        self.assertEqual(claims["groups"], ["support"])
+        self.assertEqual(claims["perms"], ["auth.view_user"])
+        self.assertIsInstance(claims["pv"], int)
+
+    def test_checks_use_claims_without_queries(self):
+        """Test that grant permissions only cost the user lookup"""
+        access = self.access_for(self.staff_user)
+        view = grant_view(
+            IsStaff,
+            HasPermissions.require("auth.view_user"),
+            InGroups.require("support", "billing"),
+        )
+
+        with self.assertNumQueries(1):
+            response = self.call(view, access)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_missing_grants_denied(self):
+        """Test that users without the grants are refused"""
+        access = self.access_for(self.plain_user)
+        for permission in (
+            IsStaff,
+            IsSuperuser,
+            HasPermissions.require("auth.view_user"),
+            InGroups.require("support"),
+        ):
+            response = self.call(grant_view(permission), access)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_superuser_has_every_permission(self):
+        """Test that superusers pass permission checks without listing
+        permissions in the token"""
+        superuser = self.create_test_user(
+            username="root", email="root@example.com", is_superuser=True
+        )
+        access = self.access_for(superuser)
+
+        self.assertEqual(AccessToken(access)["perms"], [])
+        response = self.call(
+            grant_view(IsSuperuser, HasPermissions.require("auth.add_user")),
+            access,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_revoked_group_outdates_token(self):
+        """Test that leaving a group makes old tokens resolve grants from
+        the database, once per process"""
+        access = self.access_for(self.staff_user)
+        view = grant_view(InGroups.require("support"))
+        self.staff_user.groups.remove(self.support)
+
+        with self.assertNumQueries(4):
+            response = self.call(view, access)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        with self.assertNumQueries(1):
+            response = self.call(view, access)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_revoked_staff_flag_outdates_token(self):
+        """Test that removing is_staff takes effect on existing tokens"""
+        access = self.access_for(self.staff_user)
+        self.staff_user.is_staff = False
+        self.staff_user.save(update_fields=["is_staff"])
+
+        response = self.call(grant_view(IsStaff), access)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_group_permission_change_outdates_members(self):
+        """Test that changing a group's permissions reaches its members"""
+        access = self.access_for(self.staff_user)
+        self.support.permissions.remove(self.view_user)
+        self.addCleanup(self.support.permissions.add, self.view_user)
+
+        response = self.call(
+            grant_view(HasPermissions.require("auth.view_user")), access
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_refresh_issues_current_grants(self):
+        """Test that refreshing a token with outdated grants updates them"""
+        refresh = self.get_jwt_tokens(self.plain_user)["refresh"]
+        self.plain_user.is_staff = True
+        self.plain_user.save()
+
+        response = self.client.post(
+            reverse("authentication:token_refresh"),
+            {"refresh": refresh},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        claims = AccessToken(response.data["access"]).payload
+        self.assertEqual(claims["roles"], ["staff"])
+
+        with self.assertNumQueries(1):
+            response = self.call(grant_view(IsStaff), response.data["access"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unchanged_profile_fields_keep_grants(self):
+        """Test that saves of unrelated fields leave tokens current"""
+        access = self.access_for(self.staff_user)
+        self.staff_user.first_name = "Renamed"
+        self.staff_user.save(update_fields=["first_name"])
+
+        with self.assertNumQueries(1):
+            self.call(grant_view(IsStaff), access)
+
+    def test_lost_versions_fall_back_to_database(self):
+        """Test that a flushed cache makes tokens resolve from the database
+        rather than trusting them"""
+        access = self.access_for(self.staff_user)
+        cache.clear()
+        clear_local_caches()
+
+        # The token generation is read again too
+        with self.assertNumQueries(5):
+            response = self.call(grant_view(IsStaff), access)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,120 @@
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from common.base_test_case import BaseTestCase
+from common.health import ReadinessChecker
+
+
+class HealthCheckE2ETestCase(BaseTestCase):
+    def test_liveness(self):
+        """Test that /healthz answers without touching the database"""
+        with self.assertNumQueries(0):
+            response = self.client.get("/healthz")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok"})
+
+    def test_readiness_reports_each_check(self):
+        """Test that /readyz reports every dependency with its latency"""
+        response = self.client.get("/readyz")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["status"], "ok")
+        self.assertEqual(
+            set(data["checks"]), {"database", "migrations", "signing_key"}
+        )
+        for name, check in data["checks"].items():
+            with self.subTest(check=name):
+                self.assertTrue(check["ok"])
+                self.assertFalse(check["cached"])
+                self.assertGreaterEqual(check["latency_ms"], 0)
+
+    def test_readiness_results_cached(self):
+        """Test that repeated probes reuse cached results"""
+        self.client.get("/readyz/")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/readyz/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            all(check["cached"] for check in response.json()["checks"].values())
+        )
+
+    def test_probes_skip_authentication_and_host_validation(self):
+        """Test that probes bypass auth and ALLOWED_HOSTS"""
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+
+        for path in ("/healthz", "/readyz"):
+            with self.subTest(path=path):
+                response = self.client.get(path, HTTP_HOST="10.0.0.7:8000")
+                self.assertEqual(response.status_code, 200)
+
+    @patch(
+        "django.db.migrations.executor.MigrationExecutor.migration_plan",
+        return_value=[(type("M", (), {"app_label": "app", "name": "0002"}), 0)],
+    )
+    def test_readiness_fails_with_pending_migrations(self, migration_plan):
+        """Test that unapplied migrations make the replica unready"""
+        response = self.client.get("/readyz")
+
+        self.assertEqual(response.status_code, 503)
+        migrations = response.json()["checks"]["migrations"]
+        self.assertFalse(migrations["ok"])
+        self.assertIn("app.0002", migrations["error"])
+
+    @override_settings(SIMPLE_JWT={"SIGNING_KEY": ""})
+    def test_readiness_fails_without_signing_key(self):
+        """Test that a missing signing key makes the replica unready"""
+        response = self.client.get("/readyz")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "unavailable")
+        self.assertFalse(response.json()["checks"]["signing_key"]["ok"])
+
+    def test_readiness_fails_when_database_unreachable(self):
+        """Test that a database error makes the replica unready"""
+        with patch(
+            "common.middleware.health.check_database",
+            side_effect=RuntimeError("connection refused"),
+        ):
+            response = self.client.get("/readyz")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            response.json()["checks"]["database"]["error"],
+            "connection refused",
+        )
+
+
+class ReadinessCheckerTestCase(BaseTestCase):
+    def test_failed_checks_retried_after_ttl(self):
+        """Test that results expire and sticky checks stay passed"""
+        calls = {"flaky": 0, "sticky": 0}
+
+        def flaky():
+            calls["flaky"] += 1
+            if calls["flaky"] == 1:
+                raise RuntimeError("down")
+
+        def sticky():
+            calls["sticky"] += 1
+
+        checker = ReadinessChecker(
+            {"flaky": flaky, "sticky": sticky}, ttl=0, sticky=("sticky",)
+        )
+
+        ready, results = checker.run()
+        self.assertFalse(ready)
+        self.assertEqual(results["flaky"]["error"], "down")
+
+        ready, results = checker.run()
+        self.assertTrue(ready)
+        self.assertEqual(calls, {"flaky": 2, "sticky": 1})
+        self.assertTrue(results["sticky"]["cached"])
+
+        checker.reset()
+        checker.run()
+        self.assertEqual(calls["sticky"], 2)
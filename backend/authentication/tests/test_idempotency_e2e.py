@@ -0,0 +1,206 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from common.base_test_case import BaseTestCase
+from common.idempotency import get_store
+from common.models import IdempotencyRecord
+
+
+class IdempotencyE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="retrier", email="retrier@example.com"
+        )
+
+    def setup_test_data(self):
+        cache.clear()
+        self.register_url = reverse("authentication:register")
+        self.profile_url = reverse("authentication:profile")
+        self.registration = {
+            "username": "flaky",
+            "email": "flaky@example.com",
+            "password": "flakypass123",
+            "password_confirm": "flakypass123",
+        }
+
+    def register(self, key="signup-1", data=None, **extra):
+        return self.client.post(
+            self.register_url,
+            data or self.registration,
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+            **extra,
+        )
+
+    def test_registration_retry_replayed(self):
+        """Test that retrying a registration returns the first response
+        with fresh tokens, without validating, hashing or creating the user
+        again"""
+        first = self.register()
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with mock.patch(
+            "authentication.views.auth_views.UserRegistrationSerializer"
+        ) as serializer:
+            retry = self.register()
+
+        serializer.assert_not_called()
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.data["user"], first.data["user"])
+        self.assertNotEqual(
+            retry.data["tokens"]["refresh"], first.data["tokens"]["refresh"]
+        )
+        self.assertEqual(User.objects.filter(username="flaky").count(), 1)
+
+        # Both sessions work: replaying issued no copy of the first one
+        for response in (first, retry):
+            refreshed = self.client.post(
+                reverse("authentication:token_refresh"),
+                {"refresh": response.data["tokens"]["refresh"]},
+                format="json",
+            )
+            self.assertEqual(refreshed.status_code, status.HTTP_200_OK)
+
+    @override_settings(IDEMPOTENCY_STORE="database")
+    def test_tokens_not_stored(self):
+        """Test that the stored registration holds no credentials"""
+        self.register()
+
+        data = IdempotencyRecord.objects.get().data
+        self.assertNotIn("tokens", data)
+        self.assertEqual(data["user"]["username"], "flaky")
+
+    def test_replay_for_deactivated_user(self):
+        """Test that a replayed registration issues no tokens once the
+        user was deactivated"""
+        self.register()
+        User.objects.filter(username="flaky").update(is_active=False)
+
+        retry = self.register()
+
+        self.assertEqual(retry.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("tokens", retry.data)
+
+    def test_keys_scoped_to_client(self):
+        """Test that the same key from another IP is a new request"""
+        self.register()
+        other = self.register(HTTP_X_REAL_IP="10.0.0.2")
+
+        self.assertEqual(other.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("Idempotent-Replayed", other)
+
+    def test_client_scope_ignores_forwarded_for(self):
+        """Test that a client cannot pick another scope by sending
+        X-Forwarded-For"""
+        self.register()
+        retry = self.register(HTTP_X_FORWARDED_FOR="10.0.0.2")
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+    def test_key_reused_for_other_request(self):
+        """Test that a key cannot be reused with a different body"""
+        self.register()
+        response = self.register(
+            data={**self.registration, "username": "someone_else"}
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    def test_profile_update_replayed(self):
+        """Test that profile updates are replayed per user"""
+        self.authenticate_user(self.test_user)
+        put = lambda: self.client.put(  # noqa: E731
+            self.profile_url,
+            {"first_name": "Once"},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="profile-1",
+        )
+        first = put()
+        User.objects.filter(pk=self.test_user.pk).update(first_name="Changed")
+
+        retry = put()
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(
+            User.objects.get(pk=self.test_user.pk).first_name, "Changed"
+        )
+
+    def test_server_errors_not_stored(self):
+        """Test that a request that failed can be retried with its key"""
+        with mock.patch(
+            "authentication.views.auth_views.UserRegistrationSerializer.save",
+            side_effect=RuntimeError,
+        ):
+            with self.assertRaises(RuntimeError):
+                self.register()
+
+        self.assertEqual(self.register().status_code, status.HTTP_201_CREATED)
+
+    def hold_key(self):
+        """Claim the key of the next registration as if an identical
+        request were running"""
+        for target, value in (
+            ("scoped_key", "key"),
+            ("request_fingerprint", "fp"),
+        ):
+            patcher = mock.patch(
+                f"common.idempotency.{target}", return_value=value
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.assertIsNone(get_store().claim("key", "fp"))
+
+    def test_duplicate_in_progress_conflicts(self):
+        """Test that a duplicate of a request still running gets a 409 at
+        once, and the first response once that has finished"""
+        self.hold_key()
+        response = self.register()
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertFalse(User.objects.filter(username="flaky").exists())
+
+        get_store().complete(
+            "key",
+            "fp",
+            201,
+            {
+                "message": "Registration successful",
+                "user": {"id": self.test_user.pk},
+            },
+        )
+        retry = self.register()
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse(User.objects.filter(username="flaky").exists())
+
+    @override_settings(IDEMPOTENCY_STORE="database")
+    def test_database_store(self):
+        """Test that keys can be kept in the database, and that expired
+        keys are taken over"""
+        self.register()
+        record = IdempotencyRecord.objects.get()
+        self.assertEqual(record.status_code, 201)
+        replayed = self.register().json()
+        self.assertIn("access", replayed.pop("tokens"))
+        self.assertEqual(replayed, record.data)
+
+        IdempotencyRecord.objects.update(expires_at="2000-01-01T00:00Z")
+        self.assertEqual(
+            self.register().status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_invalid_key_rejected(self):
+        """Test that an overlong key is a 400"""
+        response = self.register(key="x" * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(User.objects.filter(username="flaky").exists())
@@ -0,0 +1,157 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from common.base_test_case import BaseTestCase
+from common.openapi import SchemaGenerator
+
+SERVICE_KEY = "internal-service-key"
+
+
+@override_settings(SERVICE_API_KEYS=[SERVICE_KEY], INTROSPECTION_MAX_BATCH=5)
+class TokenIntrospectionE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="introspectuser", email="introspect@example.com"
+        )
+
+    def setup_test_data(self):
+        self.introspect_url = reverse("authentication:introspect")
+
+    def introspect(self, tokens, key=SERVICE_KEY):
+        return self.client.post(
+            self.introspect_url,
+            {"tokens": tokens},
+            format="json",
+            HTTP_X_SERVICE_KEY=key,
+        )
+
+    def test_batch_results_in_request_order(self):
+        """Test that each token gets its own result with one blacklist
+        query for the whole batch"""
+        tokens = self.get_jwt_tokens(self.test_user)
+        revoked = RefreshToken.for_user(self.test_user)
+        revoked.blacklist()
+        expired = AccessToken.for_user(self.test_user)
+        expired.set_exp(lifetime=-timedelta(minutes=1))
+
+        with self.assertNumQueries(1):
+            response = self.introspect(
+                [
+                    tokens["access"],
+                    tokens["refresh"],
+                    str(revoked),
+                    str(expired),
+                    "not-a-token",
+                ]
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(
+            [result["active"] for result in results],
+            [True, True, False, False, False],
+        )
+        self.assertEqual(results[0]["claims"]["token_type"], "access")
+        self.assertEqual(results[0]["claims"]["user_id"], self.test_user.id)
+        self.assertEqual(results[1]["claims"]["token_type"], "refresh")
+        self.assertNotIn("claims", results[2])
+
+    def test_results_cached_until_revoked(self):
+        """Test that repeated introspection is served from the cache and
+        that logout drops the cached result"""
+        tokens = self.get_jwt_tokens(self.test_user)
+        self.introspect([tokens["refresh"]])
+
+        with self.assertNumQueries(0):
+            response = self.introspect([tokens["refresh"], tokens["refresh"]])
+        self.assertTrue(response.data["results"][1]["active"])
+
+        self.authenticate_user(self.test_user)
+        self.client.post(
+            reverse("authentication:logout"),
+            {"refresh": tokens["refresh"]},
+            format="json",
+        )
+        response = self.introspect([tokens["refresh"]])
+        self.assertFalse(response.data["results"][0]["active"])
+
+    def test_rotated_refresh_token_inactive(self):
+        """Test that refreshing drops the cached result of the old token"""
+        tokens = self.get_jwt_tokens(self.test_user)
+        self.introspect([tokens["refresh"]])
+
+        self.client.post(
+            reverse("authentication:token_refresh"),
+            {"refresh": tokens["refresh"]},
+            format="json",
+        )
+
+        response = self.introspect([tokens["refresh"]])
+        self.assertFalse(response.data["results"][0]["active"])
+
+    def test_deactivated_and_deleted_users_inactive(self):
+        """Test that tokens of users deactivated or deleted since they
+        were issued, cached results included, are reported inactive"""
+        other = self.create_test_user(username="leaver", email="l@example.com")
+        tokens = self.get_jwt_tokens(self.test_user)
+        other_tokens = self.get_jwt_tokens(other)
+        batch = [tokens["access"], other_tokens["access"]]
+        self.introspect(batch)
+
+        self.test_user.is_active = False
+        self.test_user.save()
+        other.delete()
+        response = self.introspect(batch)
+
+        self.assertEqual(
+            [result["active"] for result in response.data["results"]],
+            [False, False],
+        )
+
+    def test_service_key_required(self):
+        """Test that callers without a valid service key are rejected"""
+        tokens = self.get_jwt_tokens(self.test_user)
+
+        for key in ("", "wrong-key"):
+            response = self.introspect([tokens["access"]], key=key)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_user_token_not_accepted_as_service_key(self):
+        """Test that a user's bearer token does not grant access"""
+        self.authenticate_user(self.test_user)
+
+        response = self.client.post(
+            self.introspect_url, {"tokens": ["x"]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_batches_rejected(self):
+        """Test that empty and oversized batches are rejected"""
+        self.assertEqual(
+            self.introspect([]).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        response = self.introspect(["token"] * 6)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tokens", response.data)
+
+    def test_documented(self):
+        """Test that the request and response bodies are in the schema"""
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        operation = schema["paths"]["/api/auth/introspect/"]["post"]
+        body = operation["requestBody"]["content"]["application/json"]
+        self.assertEqual(
+            body["schema"]["$ref"],
+            "#/components/schemas/TokenIntrospectionRequest",
+        )
+        content = operation["responses"]["200"]["content"]
+        self.assertEqual(
+            content["application/json"]["schema"]["$ref"],
+            "#/components/schemas/TokenIntrospectionResponse",
+        )
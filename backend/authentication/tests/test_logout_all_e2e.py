@@ -0,0 +1,175 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import TokenGeneration
+from authentication.revocation import revoke_all_tokens
+from common.base_test_case import BaseTestCase
+
+SERVICE_KEY = "internal-service-key"
+
+
+class LogoutAllE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="sessions", email="sessions@example.com"
+        )
+        cls.other_user = cls.create_test_user(
+            username="bystander", email="bystander@example.com"
+        )
+
+    def setup_test_data(self):
+        self.profile_url = reverse("authentication:profile")
+        self.refresh_url = reverse("authentication:token_refresh")
+
+    def profile(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return self.client.get(self.profile_url)
+
+    def refresh(self, refresh):
+        self.logout_user()
+        return self.client.post(
+            self.refresh_url, {"refresh": refresh}, format="json"
+        )
+
+    def test_logout_all_revokes_every_session(self):
+        """Test that logging out everywhere invalidates the access and
+        refresh tokens of every session but not other users' tokens"""
+        phone = self.get_jwt_tokens(self.test_user)
+        laptop = self.get_jwt_tokens(self.test_user)
+        other = self.get_jwt_tokens(self.other_user)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {phone['access']}")
+        response = self.client.post(reverse("authentication:logout_all"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for session in (phone, laptop):
+            self.assertEqual(
+                self.profile(session["access"]).status_code,
+                status.HTTP_401_UNAUTHORIZED,
+            )
+            self.assertEqual(
+                self.refresh(session["refresh"]).status_code,
+                status.HTTP_401_UNAUTHORIZED,
+            )
+        self.assertEqual(
+            self.profile(other["access"]).status_code, status.HTTP_200_OK
+        )
+
+    def test_new_login_after_logout_all(self):
+        """Test that tokens issued afterwards carry the new generation"""
+        self.assertEqual(
+            AccessToken(self.get_jwt_tokens(self.test_user)["access"])["gen"],
+            0,
+        )
+        revoke_all_tokens([self.test_user.pk])
+        revoke_all_tokens([self.test_user.pk])
+
+        response = self.client.post(
+            reverse("authentication:login"),
+            {"username": "sessions", "password": "testpass123"},
+            format="json",
+        )
+        tokens = response.data["tokens"]
+        self.assertEqual(AccessToken(tokens["access"])["gen"], 2)
+        self.assertEqual(
+            self.profile(tokens["access"]).status_code, status.HTTP_200_OK
+        )
+        self.assertEqual(
+            self.refresh(tokens["refresh"]).status_code, status.HTTP_200_OK
+        )
+
+    def test_revocation_is_one_write(self):
+        """Test that revoking a user's tokens is a single UPDATE however
+        many tokens they hold"""
+        for _ in range(3):
+            self.get_jwt_tokens(self.test_user)
+        revoke_all_tokens([self.test_user.pk])
+
+        with CaptureQueriesContext(connection) as queries:
+            revoke_all_tokens([self.test_user.pk])
+        writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("UPDATE", "INSERT", "DELETE"))
+        ]
+
+        self.assertEqual(len(writes), 1)
+        self.assertIn("auth_token_generation", writes[0])
+        self.assertEqual(
+            TokenGeneration.objects.get(user=self.test_user).generation, 2
+        )
+
+    def test_generation_checked_from_cache(self):
+        """Test that authenticating reads the generation from the cache"""
+        access = self.get_jwt_tokens(self.test_user)["access"]
+
+        with self.assertNumQueries(1):  # the user
+            self.assertEqual(self.profile(access).status_code, 200)
+
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.assertEqual(self.profile(access).status_code, 200)
+
+    def test_tokens_without_generation_accepted_until_revoked(self):
+        """Test that tokens issued before generations existed keep working
+        until the first logout from all devices"""
+        refresh = self.get_jwt_tokens(self.test_user)["refresh"]
+        token = AccessToken(self.get_jwt_tokens(self.test_user)["access"])
+        del token["gen"]
+        access = str(token)
+
+        self.assertEqual(self.profile(access).status_code, 200)
+        revoke_all_tokens([self.test_user.pk])
+        self.assertEqual(self.profile(access).status_code, 401)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    @override_settings(SERVICE_API_KEYS=[SERVICE_KEY])
+    def test_introspection_reports_revoked_tokens(self):
+        """Test that cached introspection results do not outlive a logout
+        from all devices"""
+        tokens = self.get_jwt_tokens(self.test_user)
+        url = reverse("authentication:introspect")
+
+        def introspect():
+            response = self.client.post(
+                url,
+                {"tokens": [tokens["access"], tokens["refresh"]]},
+                format="json",
+                HTTP_X_SERVICE_KEY=SERVICE_KEY,
+            )
+            return [result["active"] for result in response.data["results"]]
+
+        self.assertEqual(introspect(), [True, True])
+        revoke_all_tokens([self.test_user.pk])
+        self.assertEqual(introspect(), [False, False])
+
+    def test_admin_action_logs_users_out(self):
+        """Test that staff can log selected users out of all devices"""
+        admin_user = self.create_test_user(
+            username="boss",
+            email="boss@example.com",
+            is_staff=True,
+            is_superuser=True,
+        )
+        access = self.get_jwt_tokens(self.test_user)["access"]
+        other = self.get_jwt_tokens(self.other_user)["access"]
+
+        self.client.force_login(admin_user)
+        response = self.client.post(
+            reverse("admin:auth_user_changelist"),
+            {
+                "action": "log_out_everywhere",
+                "_selected_action": [self.test_user.pk],
+            },
+        )
+        self.client.logout()
+
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(self.profile(access).status_code, 401)
+        self.assertEqual(self.profile(other).status_code, 200)
@@ -0,0 +1,197 @@
+from io import StringIO
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from authentication.serializers import UserLoginSerializer
+from common.base_test_case import BaseTestCase
+from common.hashers import current_password_prefix, password_scheme
+
+PBKDF2_STACK = [
+    "common.hashers.TunedPBKDF2PasswordHasher",
+    "common.hashers.TunedArgon2PasswordHasher",
+]
+ARGON2_STACK = [
+    "common.hashers.TunedArgon2PasswordHasher",
+    "common.hashers.TunedPBKDF2PasswordHasher",
+]
+CHEAP_ARGON2 = {
+    "PASSWORD_ARGON2_TIME_COST": 1,
+    "PASSWORD_ARGON2_MEMORY_COST": 1024,
+    "PASSWORD_ARGON2_PARALLELISM": 1,
+}
+
+
+def legacy_pbkdf2_hash(password, iterations=1000):
+    hasher = PBKDF2PasswordHasher()
+    return hasher.encode(password, hasher.salt(), iterations=iterations)
+
+
+class PasswordHashingTestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.legacy_user = cls.create_test_user(
+            username="legacyuser", email="legacy@example.com"
+        )
+        User.objects.filter(pk=cls.legacy_user.pk).update(
+            password=legacy_pbkdf2_hash("legacypass123")
+        )
+
+    def login(self, password="legacypass123"):
+        serializer = UserLoginSerializer(
+            data={"username": "legacyuser", "password": password}
+        )
+        return serializer.is_valid()
+
+    @override_settings(
+        PASSWORD_HASHERS=PBKDF2_STACK, PASSWORD_PBKDF2_ITERATIONS=2000
+    )
+    def test_login_rehashes_outdated_iterations(self):
+        """Test that login upgrades a hash with old PBKDF2 parameters"""
+        self.assertTrue(self.login())
+
+        self.legacy_user.refresh_from_db()
+        self.assertTrue(
+            self.legacy_user.password.startswith("pbkdf2_sha256$2000$")
+        )
+        self.assertTrue(self.login())
+
+    @override_settings(PASSWORD_HASHERS=ARGON2_STACK, **CHEAP_ARGON2)
+    def test_login_rehashes_to_argon2(self):
+        """Test that login moves a legacy PBKDF2 hash to Argon2"""
+        self.assertTrue(self.login())
+
+        self.legacy_user.refresh_from_db()
+        self.assertEqual(
+            password_scheme(self.legacy_user.password),
+            "argon2 time_cost=1 memory_cost=1024 parallelism=1",
+        )
+        self.assertTrue(self.login())
+
+    @override_settings(
+        PASSWORD_HASHERS=PBKDF2_STACK, PASSWORD_PBKDF2_ITERATIONS=2000
+    )
+    def test_failed_login_keeps_legacy_hash(self):
+        """Test that a wrong password does not rewrite the stored hash"""
+        original = User.objects.get(pk=self.legacy_user.pk).password
+
+        self.assertFalse(self.login(password="wrongpass123"))
+
+        self.legacy_user.refresh_from_db()
+        self.assertEqual(self.legacy_user.password, original)
+
+    @override_settings(
+        PASSWORD_HASHERS=PBKDF2_STACK, PASSWORD_PBKDF2_ITERATIONS=2000
+    )
+    def test_current_password_prefix(self):
+        """Test the prefix shared by hashes with current parameters"""
+        self.assertEqual(current_password_prefix(), "pbkdf2_sha256$2000$")
+
+    @override_settings(PASSWORD_HASHERS=PBKDF2_STACK)
+    def test_password_scheme_edge_cases(self):
+        """Test describing unusable and unknown hashes"""
+        self.assertEqual(password_scheme("!unusable"), "unusable")
+        self.assertEqual(password_scheme(""), "unusable")
+        self.assertEqual(password_scheme("nope$abc"), "unknown")
+        self.assertEqual(
+            password_scheme(legacy_pbkdf2_hash("x")),
+            "pbkdf2_sha256 iterations=1000",
+        )
+
+    @override_settings(
+        PASSWORD_HASHERS=PBKDF2_STACK, PASSWORD_PBKDF2_ITERATIONS=2000
+    )
+    def test_password_hash_report(self):
+        """Test the per-scheme account report"""
+        self.create_test_user(username="unusable", password=None)
+        User.objects.filter(username="unusable").update(password="!x")
+
+        out = StringIO()
+        call_command("password_hash_report", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("pbkdf2_sha256 iterations=1000", output)
+        self.assertIn("unusable", output)
+        self.assertIn("Accounts to rehash on next login: 1", output)
+
+    @override_settings(
+        PASSWORD_HASHERS=PBKDF2_STACK, PASSWORD_PBKDF2_ITERATIONS=2000
+    )
+    def test_admin_password_hash_filter(self):
+        """Test that admins can list accounts with outdated hashes"""
+        admin_user = self.create_test_user(
+            username="admin",
+            email="admin@example.com",
+            is_staff=True,
+            is_superuser=True,
+        )
+        admin_user.password = legacy_pbkdf2_hash("adminpass", iterations=2000)
+        admin_user.save()
+        self.client.force_login(admin_user)
+        url = reverse("admin:auth_user_changelist")
+
+        response = self.client.get(url, {"hash_scheme": "outdated"})
+        self.assertContains(response, "legacyuser")
+        self.assertNotContains(response, "for an action - admin")
+
+        response = self.client.get(url, {"hash_scheme": "current"})
+        self.assertNotContains(response, "legacyuser")
+
+        response = self.client.get(url, {"_facets": "True"})
+        self.assertContains(response, "Outdated parameters (1)")
+
+
+class CalibrateHashersCommandTestCase(BaseTestCase):
+    def test_calibrate_pbkdf2(self):
+        """Test that PBKDF2 calibration recommends an iteration count"""
+        out = StringIO()
+        call_command(
+            "calibrate_hashers",
+            algorithm="pbkdf2",
+            target_ms=5,
+            concurrency=2,
+            samples=1,
+            start_iterations=1000,
+            stdout=out,
+        )
+
+        self.assertIn("PASSWORD_PBKDF2_ITERATIONS=", out.getvalue())
+
+    def test_calibrate_argon2(self):
+        """Test that Argon2 calibration recommends memory and time costs"""
+        out = StringIO()
+        call_command(
+            "calibrate_hashers",
+            algorithm="argon2",
+            target_ms=1000,
+            concurrency=1,
+            samples=1,
+            memory_costs=[1024],
+            max_time_cost=2,
+            parallelism=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("PASSWORD_HASHER_PROFILE=argon2", output)
+        self.assertIn("PASSWORD_ARGON2_MEMORY_COST=1024", output)
+
+    def test_calibrate_unreachable_target(self):
+        """Test the warning when no candidate is fast enough"""
+        out = StringIO()
+        call_command(
+            "calibrate_hashers",
+            algorithm="argon2",
+            target_ms=0,
+            concurrency=1,
+            samples=1,
+            memory_costs=[1024],
+            max_time_cost=1,
+            parallelism=1,
+            stdout=out,
+        )
+
+        self.assertIn("No candidate met the target", out.getvalue())
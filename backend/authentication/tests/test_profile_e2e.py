@@ -1,22 +1,26 @@
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
+from authentication.serializers import UserSerializer
 from common.base_test_case import BaseTestCase
 
 
 class ProfileE2ETestCase(BaseTestCase):
-    def setup_test_data(self):
-        self.profile_url = reverse("authentication:profile")
-
-        self.test_user = self.create_test_user(
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
             username="profileuser",
             email="profile@example.com",
             password="profilepass123",
+            first_name="Profile",
+            last_name="User",
         )
-        self.test_user.first_name = "Profile"
-        self.test_user.last_name = "User"
-        self.test_user.save()
+
+    def setup_test_data(self):
+        self.profile_url = reverse("authentication:profile")
 
     def test_get_profile_authenticated_user(self):
         """Test getting profile for authenticated user"""
@@ -181,3 +185,52 @@ class ProfileE2ETestCase(BaseTestCase):
         self.assertEqual(final_data["id"], initial_data["id"])
         self.assertEqual(final_data["username"], initial_data["username"])
         self.assertEqual(final_data["date_joined"], initial_data["date_joined"])
+
+    def profile_writes(self, data):
+        """Send a profile update and return the UPDATE statements it ran"""
+        self.authenticate_user(self.test_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(self.profile_url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("UPDATE")
+        ]
+
+    def test_update_writes_only_changed_columns(self):
+        """Test that an update writes the changed columns alone, leaving
+        the password and other columns to concurrent writers"""
+        (update,) = self.profile_writes(
+            {"first_name": "Renamed", "last_name": "User"}
+        )
+
+        self.assertIn('"first_name"', update)
+        for column in ('"last_name"', '"password"', '"last_login"'):
+            self.assertNotIn(column, update)
+        self.assertEqual(
+            User.objects.get(pk=self.test_user.pk).first_name, "Renamed"
+        )
+
+    def test_update_without_changes_skips_write(self):
+        """Test that resubmitting the current profile writes nothing"""
+        writes = self.profile_writes(
+            {"first_name": "Profile", "email": "profile@example.com"}
+        )
+        self.assertEqual(writes, [])
+
+    def test_update_keeps_concurrent_password_change(self):
+        """Test that a profile update does not restore a password hash
+        changed since the user was loaded"""
+        stale = User.objects.get(pk=self.test_user.pk)
+        User.objects.filter(pk=stale.pk).update(password="changed-elsewhere")
+
+        serializer = UserSerializer(
+            stale, data={"last_name": "Concurrent"}, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        user = User.objects.get(pk=stale.pk)
+        self.assertEqual(user.password, "changed-elsewhere")
+        self.assertEqual(user.last_name, "Concurrent")
@@ -0,0 +1,126 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core import signing
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from common.base_test_case import BaseTestCase
+from common.profiling import make_trigger_token
+
+
+class ProfilingE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="profileduser", email="profiled@example.com"
+        )
+        cls.staff_user = cls.create_test_user(
+            username="staffuser", email="staff@example.com", is_staff=True
+        )
+
+    def setup_test_data(self):
+        reports_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(reports_dir.cleanup)
+        self.reports_dir = Path(reports_dir.name)
+        settings_override = override_settings(
+            PROFILING_DIR=self.reports_dir, PROFILING_MAX_REPORTS=2
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.login_url = reverse("authentication:login")
+
+    def login(self, **extra):
+        return self.client.post(
+            self.login_url,
+            {"username": "profileduser", "password": "testpass123"},
+            format="json",
+            **extra,
+        )
+
+    def test_untriggered_requests_not_profiled(self):
+        """Test that requests without a valid token leave no report"""
+        for extra in ({}, {"HTTP_X_PROFILE": "forged"}):
+            response = self.login(**extra)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(list(self.reports_dir.iterdir()), [])
+
+    def test_signed_header_profiles_request(self):
+        """Test that the report covers queries, hashing, signing and the
+        call tree"""
+        response = self.login(HTTP_X_PROFILE=make_trigger_token())
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report_id = response["X-Profile-Id"]
+        report = json.loads(
+            (self.reports_dir / f"{report_id}.json").read_text()
+        )
+        self.assertTrue((self.reports_dir / f"{report_id}.prof").exists())
+        self.assertEqual(report["view"], "authentication:login")
+        self.assertEqual(report["trigger"], "token")
+        self.assertEqual(report["status"], 200)
+        self.assertGreater(report["query_count"], 0)
+        self.assertIn("auth_user", report["queries"][0]["sql"])
+        self.assertGreater(report["password_hashing_ms"], 0)
+        self.assertGreater(report["token_signing_ms"], 0)
+        self.assertTrue(report["call_tree"])
+
+    def test_query_flag_and_expired_token(self):
+        """Test the query parameter trigger and token expiry"""
+        token = make_trigger_token()
+        response = self.client.get(
+            reverse("authentication:availability"),
+            {"username": "someone", "_profile": token},
+        )
+        self.assertIn("X-Profile-Id", response)
+
+        with override_settings(PROFILING_TOKEN_MAX_AGE=-1):
+            response = self.login(HTTP_X_PROFILE=token)
+        self.assertNotIn("X-Profile-Id", response)
+
+    def test_sampling(self):
+        """Test that a sample rate of 1 profiles every request and only
+        the newest reports are kept"""
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            ids = [self.login()["X-Profile-Id"] for _ in range(3)]
+
+        self.assertEqual(
+            sorted(path.stem for path in self.reports_dir.glob("*.json")),
+            ids[1:],
+        )
+
+    def test_reports_endpoint_staff_only(self):
+        """Test that reports are listed and served to staff only"""
+        report_id = self.login(HTTP_X_PROFILE=make_trigger_token())[
+            "X-Profile-Id"
+        ]
+        list_url = reverse("profiling-reports")
+        detail_url = reverse("profiling-report", args=[report_id])
+
+        self.authenticate_user(self.test_user)
+        self.assertEqual(
+            self.client.get(list_url).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+        self.authenticate_user(self.staff_user)
+        summaries = self.client.get(list_url).data
+        self.assertEqual(summaries[0]["id"], report_id)
+        self.assertNotIn("call_tree", summaries[0])
+        detail = self.client.get(detail_url)
+        self.assertEqual(detail.data["id"], report_id)
+        self.assertIn("call_tree", detail.data)
+        missing = self.client.get(reverse("profiling-report", args=["missing"]))
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_profiling_token_command(self):
+        """Test that the command prints a usable trigger token"""
+        out = StringIO()
+        call_command("profiling_token", stdout=out)
+
+        token = out.getvalue().splitlines()[0].removeprefix("X-Profile: ")
+        signing.TimestampSigner(salt="common.profiling").unsign(token)
@@ -0,0 +1,135 @@
+import json
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from common.base_test_case import BaseTestCase
+from common.querylog import fingerprint, normalize, query_stats
+
+
+def logged_events(logs):
+    return [json.loads(record.getMessage()) for record in logs.records]
+
+
+@override_settings(QUERY_LOG_ENABLED=True)
+class QueryLogE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="queryloguser", email="querylog@example.com"
+        )
+
+    def setup_test_data(self):
+        query_stats.reset()
+        self.addCleanup(query_stats.reset)
+        self.credentials = {
+            "username": "queryloguser",
+            "password": "testpass123",
+        }
+
+    def test_repeated_query_attributed_to_view(self):
+        """Test that the second user lookup in the token view is flagged
+        with the view name and the line that ran it"""
+        with self.assertLogs("querylog", "WARNING") as logs:
+            self.client.post(
+                reverse("authentication:token_obtain_pair"),
+                self.credentials,
+                format="json",
+            )
+
+        (event,) = [
+            event
+            for event in logged_events(logs)
+            if event["event"] == "repeated_query"
+        ]
+        self.assertEqual(event["view"], "authentication:token_obtain_pair")
+        self.assertEqual(event["count"], 2)
+        self.assertIn('"auth_user"."username" = %s', event["sql"])
+        self.assertTrue(
+            any("auth_views.py" in frame for frame in event["stack"])
+        )
+
+    def test_slow_queries_logged(self):
+        """Test that queries over the threshold are logged with duration"""
+        self.authenticate_user(self.test_user)
+
+        with override_settings(QUERY_LOG_SLOW_MS=0):
+            with self.assertLogs("querylog", "WARNING") as logs:
+                self.client.get(reverse("authentication:profile"))
+
+        events = logged_events(logs)
+        self.assertTrue(events)
+        for event in events:
+            self.assertEqual(event["event"], "slow_query")
+            self.assertEqual(event["view"], "authentication:profile")
+            self.assertIn("duration_ms", event)
+            self.assertEqual(event["fingerprint"], fingerprint(event["sql"]))
+
+    def test_fast_unique_queries_not_logged(self):
+        """Test that a clean request logs nothing"""
+        with self.assertNoLogs("querylog", "WARNING"):
+            self.client.post(
+                reverse("authentication:login"),
+                self.credentials,
+                format="json",
+            )
+
+    def test_summary_per_fingerprint(self):
+        """Test that totals are aggregated per fingerprint across requests
+        and logged when the period ends"""
+        for _ in range(2):
+            self.client.post(
+                reverse("authentication:login"),
+                self.credentials,
+                format="json",
+            )
+
+        with override_settings(QUERY_LOG_SUMMARY_SECONDS=0):
+            with self.assertLogs("querylog", "INFO") as logs:
+                self.client.post(
+                    reverse("authentication:login"),
+                    self.credentials,
+                    format="json",
+                )
+
+        summaries = [
+            event
+            for event in logged_events(logs)
+            if event["event"] == "query_summary"
+        ]
+        lookup = next(s for s in summaries if "auth_user" in s["sql"])
+        self.assertEqual(lookup["count"], 3)
+        self.assertEqual(lookup["views"], {"authentication:login": 3})
+        self.assertEqual(query_stats.snapshot(), [])
+
+    def test_assert_no_repeated_queries(self):
+        """Test the test helper that catches redundant lookups"""
+        with self.assert_no_repeated_queries():
+            self.client.post(
+                reverse("authentication:login"),
+                self.credentials,
+                format="json",
+            )
+
+        with self.assertRaises(AssertionError), self.assertLogs("querylog"):
+            with self.assert_no_repeated_queries():
+                self.client.post(
+                    reverse("authentication:token_obtain_pair"),
+                    self.credentials,
+                    format="json",
+                )
+
+
+class FingerprintTestCase(SimpleTestCase):
+    def test_literals_and_in_lists_collapsed(self):
+        """Test that queries differing only in values share a fingerprint"""
+        first = "SELECT * FROM t WHERE id IN (%s, %s) AND name = 'a'"
+        second = "SELECT  *  FROM t WHERE id IN (%s, %s, %s) AND name = 'b'"
+
+        self.assertEqual(fingerprint(first), fingerprint(second))
+        self.assertEqual(
+            normalize(first), "SELECT * FROM t WHERE id IN (...) AND name = ?"
+        )
+        self.assertNotEqual(
+            fingerprint(first), fingerprint("SELECT * FROM u WHERE id = 1")
+        )
@@ -8,20 +8,20 @@ from common.base_test_case import BaseTestCase
 
 
 class SerializersE2ETestCase(BaseTestCase):
-    def setup_test_data(self):
-        self.active_user = self.create_test_user(
+    @classmethod
+    def setup_class_data(cls):
+        cls.active_user = cls.create_test_user(
             username="activeuser",
             email="active@example.com",
             password="activepass123",
         )
 
-        self.inactive_user = self.create_test_user(
+        cls.inactive_user = cls.create_test_user(
             username="inactiveuser",
             email="inactive@example.com",
             password="inactivepass123",
+            is_active=False,
         )
-        self.inactive_user.is_active = False
-        self.inactive_user.save()
 
     def test_login_serializer_with_inactive_user(self):
         """Test login serializer with inactive user that validates but
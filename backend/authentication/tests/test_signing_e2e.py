@@ -0,0 +1,235 @@
+import os
+import stat
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import jwt
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt import state
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.signing import (
+    KeyRingTokenBackend,
+    SigningKeyRing,
+    build_token_backend,
+    generate_private_key,
+    private_key_pem,
+)
+from common.base_test_case import BaseTestCase
+from common.jwt_verifier import JWKSVerifier
+from common.openapi import SchemaGenerator
+
+OLD_KID = "20250101000000-old"
+ACTIVE_KID = "20260101000000-new"
+
+
+class KeyRingTestCase(BaseTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.keys_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls.keys_dir.cleanup)
+        cls.write_key(OLD_KID, "RS256")
+        cls.write_key(ACTIVE_KID, "EdDSA")
+
+    @classmethod
+    def write_key(cls, kid, algorithm):
+        path = Path(cls.keys_dir.name) / f"{kid}.pem"
+        path.write_bytes(private_key_pem(generate_private_key(algorithm)))
+
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="signinguser", email="signing@example.com"
+        )
+
+    def setUp(self):
+        settings_override = override_settings(
+            JWT_ALGORITHM="EdDSA", JWT_KEYS_DIR=self.keys_dir.name
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.backend = build_token_backend()
+        backend_patch = mock.patch.object(state, "token_backend", self.backend)
+        backend_patch.start()
+        self.addCleanup(backend_patch.stop)
+        super().setUp()
+
+
+class SigningKeyRingE2ETestCase(KeyRingTestCase):
+    def test_tokens_signed_with_active_key(self):
+        """Test that new tokens carry the active kid and authenticate"""
+        tokens = self.get_jwt_tokens(self.test_user)
+
+        header = jwt.get_unverified_header(tokens["access"])
+        self.assertEqual(header["kid"], ACTIVE_KID)
+        self.assertEqual(header["alg"], "EdDSA")
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        response = self.client.get(reverse("authentication:profile"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_retired_key_still_verifies(self):
+        """Test that tokens signed before a rotation remain valid"""
+        old_ring = SigningKeyRing(self.backend.key_ring.private_keys, OLD_KID)
+        token = AccessToken.for_user(self.test_user)
+        encoded = KeyRingTokenBackend(old_ring).encode(token.payload)
+
+        self.assertEqual(jwt.get_unverified_header(encoded)["alg"], "RS256")
+        self.assertEqual(AccessToken(encoded)["user_id"], self.test_user.id)
+
+    def test_unknown_kid_rejected(self):
+        """Test that tokens from a key outside the ring are rejected"""
+        foreign = SigningKeyRing(
+            {ACTIVE_KID: generate_private_key("EdDSA")}, ACTIVE_KID
+        )
+        token = KeyRingTokenBackend(foreign).encode({"token_type": "access"})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get(reverse("authentication:profile"))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_jwks_publishes_public_keys(self):
+        """Test that every key is published without private material and
+        can be cached by clients"""
+        response = self.client.get(reverse("jwks"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        keys = {key["kid"]: key for key in response.json()["keys"]}
+        self.assertEqual(keys[OLD_KID]["alg"], "RS256")
+        self.assertEqual(keys[ACTIVE_KID]["alg"], "EdDSA")
+        for key in keys.values():
+            self.assertNotIn("d", key)
+        self.assertIn("max-age=300", response["Cache-Control"])
+
+        cached = self.client.get(
+            reverse("jwks"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_jwks_documented(self):
+        """Test that the JWKS endpoint is in the API schema"""
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        operation = schema["paths"]["/.well-known/jwks.json"]["get"]
+        content = operation["responses"]["200"]["content"]
+        self.assertEqual(
+            content["application/json"]["schema"]["$ref"],
+            "#/components/schemas/JWKSet",
+        )
+
+    def test_shared_secret_publishes_no_keys(self):
+        """Test that HS256 deployments publish an empty key set"""
+        with mock.patch.object(state, "token_backend", object()):
+            response = self.client.get(reverse("jwks"))
+
+        self.assertEqual(response.json(), {"keys": []})
+
+    def test_misconfiguration_rejected(self):
+        """Test that a missing key directory or a key of the wrong type
+        fails at startup"""
+        with override_settings(JWT_KEYS_DIR=""):
+            with self.assertRaises(ImproperlyConfigured):
+                build_token_backend()
+        with override_settings(JWT_ALGORITHM="RS256"):
+            with self.assertRaises(ImproperlyConfigured):
+                build_token_backend()
+        with override_settings(JWT_ACTIVE_KID="missing"):
+            with self.assertRaises(ImproperlyConfigured):
+                build_token_backend()
+
+    def test_generate_signing_key(self):
+        """Test that the command adds a private key only its owner reads"""
+        with tempfile.TemporaryDirectory() as keys_dir:
+            call_command(
+                "generate_signing_key",
+                "--keys-dir",
+                keys_dir,
+                "--kid",
+                "next",
+                stdout=StringIO(),
+            )
+
+            path = Path(keys_dir) / "next.pem"
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+            key_ring = SigningKeyRing.from_directory(keys_dir)
+            self.assertEqual(key_ring.active_kid, "next")
+            self.assertEqual(key_ring.active_algorithm, "EdDSA")
+
+
+class JWKSVerifierE2ETestCase(KeyRingTestCase):
+    def setup_test_data(self):
+        self.fetches = 0
+
+    def fetch(self, url, timeout):
+        self.fetches += 1
+        return self.client.get(url).json()
+
+    def make_verifier(self, **kwargs):
+        return JWKSVerifier(reverse("jwks"), fetch=self.fetch, **kwargs)
+
+    def test_verifies_without_fetching_per_token(self):
+        """Test that the key set is fetched once for many verifications"""
+        verifier = self.make_verifier()
+
+        for _ in range(3):
+            tokens = self.get_jwt_tokens(self.test_user)
+            claims = verifier.verify(tokens["access"])
+            self.assertEqual(claims["user_id"], self.test_user.id)
+
+        self.assertEqual(self.fetches, 1)
+
+    def test_rejects_refresh_and_tampered_tokens(self):
+        """Test that only intact access tokens pass"""
+        verifier = self.make_verifier()
+        tokens = self.get_jwt_tokens(self.test_user)
+
+        with self.assertRaises(jwt.InvalidTokenError):
+            verifier.verify(tokens["refresh"])
+        with self.assertRaises(jwt.InvalidTokenError):
+            verifier.verify(tokens["access"][:-4] + "AAAA")
+
+    def test_refetches_on_rotated_key(self):
+        """Test that an unknown kid triggers one refetch, throttled for
+        kids that are still unknown afterwards"""
+        verifier = self.make_verifier(min_refresh_interval=0)
+        verifier.verify(self.get_jwt_tokens(self.test_user)["access"])
+
+        rotated = SigningKeyRing(
+            {
+                **self.backend.key_ring.private_keys,
+                "20270101000000-next": generate_private_key("EdDSA"),
+            }
+        )
+        with mock.patch.object(
+            state, "token_backend", KeyRingTokenBackend(rotated)
+        ):
+            token = self.get_jwt_tokens(self.test_user)["access"]
+            self.assertEqual(verifier.verify(token)["token_type"], "access")
+        self.assertEqual(self.fetches, 2)
+
+        verifier.min_refresh_interval = 30
+        foreign = KeyRingTokenBackend(
+            SigningKeyRing({"unknown": generate_private_key("EdDSA")})
+        ).encode({"token_type": "access"})
+        for _ in range(3):
+            with self.assertRaises(jwt.InvalidTokenError):
+                verifier.verify(foreign)
+        self.assertEqual(self.fetches, 2)
+
+    def test_keeps_keys_when_refetch_fails(self):
+        """Test that an unreachable JWKS endpoint does not break
+        verification with already known keys"""
+        verifier = self.make_verifier(max_age=0)
+        token = self.get_jwt_tokens(self.test_user)["access"]
+        verifier.verify(token)
+
+        verifier.fetch = mock.Mock(side_effect=OSError("unreachable"))
+        self.assertEqual(verifier.verify(token)["token_type"], "access")
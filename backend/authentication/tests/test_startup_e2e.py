@@ -0,0 +1,127 @@
+import json
+import sys
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+
+from common.base_test_case import BaseTestCase
+from common.lazy import (
+    ADMINDOCS_VIEWS,
+    DeferredAdmindocsViews,
+    LazyView,
+    defer_admindocs,
+)
+from common.startup import package_totals, parse_importtime
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   jwt.exceptions
+import time:       300 |        420 | jwt
+import time:        50 |         50 | jwt.help
+import time:      1000 |       1000 | yaml
+"""
+
+
+class StartupReportTestCase(SimpleTestCase):
+    def test_parse_importtime(self):
+        """Test that -X importtime lines are parsed with their nesting"""
+        modules = parse_importtime(IMPORTTIME_OUTPUT)
+
+        self.assertEqual(
+            [(m["module"], m["depth"]) for m in modules],
+            [("jwt.exceptions", 1), ("jwt", 0), ("jwt.help", 0), ("yaml", 0)],
+        )
+        self.assertEqual(modules[1]["cumulative_us"], 420)
+        self.assertEqual(
+            package_totals(modules), [("yaml", 1000), ("jwt", 470)]
+        )
+
+    def test_report_measures_every_app(self):
+        """Test that a fresh api worker is measured app by app"""
+        out = StringIO()
+        call_command("startup_report", "--profile", "api", "--json", stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(report["worker_profile"], "api")
+        apps = [app["app"] for app in report["apps"]]
+        self.assertEqual(
+            apps,
+            [app for app in settings.INSTALLED_APPS if ".admin" not in app],
+        )
+        for app in report["apps"]:
+            self.assertIn("import_ms", app)
+            self.assertIn("rss_kib", app)
+        self.assertGreater(report["rss_kib"], report["python_rss_kib"])
+        modules = {module["module"] for module in report["imports"]}
+        self.assertIn("rest_framework.views", modules)
+        # Only the app config and its checks, never the schema machinery
+        spectacular = {
+            module
+            for module in modules
+            if module.startswith("drf_spectacular.")
+        }
+        self.assertLessEqual(
+            spectacular, {"drf_spectacular.apps", "drf_spectacular.checks"}
+        )
+        admin = [
+            module
+            for module in modules
+            if module.startswith(
+                ("django.contrib.admin", "django.contrib.admindocs")
+            )
+        ]
+        self.assertEqual(admin, [])
+
+    def test_text_report(self):
+        """Test the human readable report"""
+        out = StringIO()
+        call_command("startup_report", "--top", "3", stdout=out)
+
+        self.assertIn("Startup:", out.getvalue())
+        self.assertIn("rest_framework_simplejwt", out.getvalue())
+        self.assertIn("Slowest top-level imports", out.getvalue())
+
+
+class LazyURLsTestCase(BaseTestCase):
+    def test_admin_loaded_on_first_use(self):
+        """Test that the lazily included admin resolves and reverses"""
+        response = self.client.get(reverse("admin:login"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(reverse("admin:index"), "/admin/")
+
+    def test_docs_loaded_on_first_use(self):
+        """Test that the documentation views are built on request"""
+        for name in ("swagger-ui", "redoc"):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_lazy_view_defers_import(self):
+        """Test that a LazyView imports nothing until it is used"""
+        view = LazyView("no.such.module.View")
+        self.assertIsNone(view._view)
+        with self.assertRaises(ImportError):
+            view.csrf_exempt  # noqa: B018
+
+    def test_admindocs_deferred(self):
+        """Test that the stand-in for admindocs, which DRF imports at
+        startup, loads the real module when it is used"""
+        with mock.patch.dict(sys.modules):
+            del sys.modules[ADMINDOCS_VIEWS]
+            defer_admindocs()
+            from django.contrib.admindocs.views import simplify_regex
+
+            self.assertIsInstance(
+                sys.modules[ADMINDOCS_VIEWS], DeferredAdmindocsViews
+            )
+            self.assertEqual(
+                simplify_regex(r"^users/(?P<pk>\d+)/$"), "/users/<pk>/"
+            )
+            self.assertNotIsInstance(
+                sys.modules[ADMINDOCS_VIEWS], DeferredAdmindocsViews
+            )
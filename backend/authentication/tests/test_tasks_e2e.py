@@ -0,0 +1,278 @@
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from common.base_test_case import BaseTestCase
+from common.models import BackgroundTask
+from common.tasks import (
+    Job,
+    TaskQueue,
+    hold_tasks_for_request,
+    release_request_tasks,
+    task,
+    task_queue,
+)
+
+calls = []
+failures = {"remaining": 0}
+
+
+@task(name="tests.remember", retry_delay=0)
+def remember(value):
+    if failures["remaining"]:
+        failures["remaining"] -= 1
+        raise RuntimeError("flaky")
+    calls.append(value)
+
+
+class BackgroundTaskE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="taskuser", email="task@example.com"
+        )
+        cls.admin_user = cls.create_test_user(
+            username="taskadmin", email="taskadmin@example.com", is_staff=True
+        )
+        cls.admin_user.user_permissions.add(
+            Permission.objects.get(codename="view_backgroundtask")
+        )
+
+    def setup_test_data(self):
+        calls.clear()
+        failures["remaining"] = 0
+        task_queue.metrics.reset()
+
+    def start_queue(self, **overrides):
+        queue = TaskQueue()
+        settings_override = override_settings(
+            TASK_QUEUE_EAGER=False, TASK_QUEUE_WORKERS=2, **overrides
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(queue.stop, 5)
+        return queue
+
+    def wait_for(self, queue, count):
+        deadline = time.monotonic() + 5
+        while queue.metrics.counts["completed"] < count:
+            self.assertLess(time.monotonic(), deadline, "tasks did not finish")
+            time.sleep(0.01)
+
+    def login(self, name="authentication:login"):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse(name),
+                {"username": "taskuser", "password": "testpass123"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_login_records_last_login_after_commit(self):
+        """Test that with UPDATE_LAST_LOGIN both login endpoints store
+        last_login from a background task"""
+        with override_settings(
+            SIMPLE_JWT={**settings.SIMPLE_JWT, "UPDATE_LAST_LOGIN": True}
+        ):
+            self.login()
+            self.test_user.refresh_from_db()
+            self.assertIsNotNone(self.test_user.last_login)
+
+            User.objects.filter(pk=self.test_user.pk).update(last_login=None)
+            self.login("authentication:token_obtain_pair")
+
+        self.test_user.refresh_from_db()
+        self.assertIsNotNone(self.test_user.last_login)
+        self.assertEqual(task_queue.metrics.counts["completed"], 2)
+
+    def test_login_leaves_last_login_by_default(self):
+        """Test that logins enqueue no task unless UPDATE_LAST_LOGIN is on"""
+        self.login()
+        self.login("authentication:token_obtain_pair")
+
+        self.assertIsNone(User.objects.get(pk=self.test_user.pk).last_login)
+        self.assertEqual(task_queue.metrics.counts["enqueued"], 0)
+
+    def test_rolled_back_task_never_runs(self):
+        """Test that a task enqueued in a rolled back transaction is
+        dropped"""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    remember.enqueue("rolled back")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            remember.enqueue("committed")
+
+        self.assertEqual(calls, ["committed"])
+
+    def test_request_tasks_wait_for_response(self):
+        """Test that tasks enqueued during a request run once it finished"""
+        hold_tasks_for_request(sender=None)
+        with self.captureOnCommitCallbacks(execute=True):
+            remember.enqueue("after response")
+        self.assertEqual(calls, [])
+
+        release_request_tasks(sender=None)
+        self.assertEqual(calls, ["after response"])
+
+    def test_worker_pool_runs_and_retries(self):
+        """Test that workers run queued jobs and retry failures"""
+        queue = self.start_queue()
+        failures["remaining"] = 2
+        with self.assertLogs("common.tasks", "WARNING"):
+            for value in range(3):
+                queue.submit(Job("tests.remember", [value], {}))
+            self.wait_for(queue, 3)
+        stats = queue.stats()
+        self.assertEqual(sorted(calls), [0, 1, 2])
+        self.assertEqual(stats["retried"], 2)
+        self.assertEqual(stats["failed"], 0)
+        self.assertEqual(stats["depth"], 0)
+        self.assertIsNotNone(stats["wait_ms"]["p95"])
+
+    def test_full_queue_runs_in_caller(self):
+        """Test that a full in-memory queue makes the caller run the task"""
+        queue = self.start_queue(TASK_QUEUE_MAX_SIZE=0)
+        queue.submit(Job("tests.remember", ["inline"], {}))
+
+        self.assertEqual(calls, ["inline"])
+        self.assertEqual(queue.metrics.counts["overflowed"], 1)
+
+    @override_settings(TASK_QUEUE_DURABLE=True)
+    def test_durable_task_stored_until_done(self):
+        """Test that durable tasks are stored with the transaction and
+        deleted once they ran"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            remember.enqueue("durable")
+        row = BackgroundTask.objects.get()
+        self.assertEqual(row.args, ["durable"])
+        self.assertEqual(row.status, BackgroundTask.PENDING)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(calls, ["durable"])
+        self.assertFalse(BackgroundTask.objects.exists())
+
+    @override_settings(TASK_QUEUE_DURABLE=True, TASK_QUEUE_MAX_RETRIES=1)
+    def test_durable_task_failed_after_retries(self):
+        """Test that a task failing every attempt is kept as failed"""
+        failures["remaining"] = 5
+        with self.assertLogs("common.tasks", "WARNING") as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                remember.enqueue("doomed")
+
+        row = BackgroundTask.objects.get()
+        self.assertEqual(row.status, BackgroundTask.FAILED)
+        self.assertEqual(row.attempts, 2)
+        self.assertIn("flaky", row.last_error)
+        self.assertEqual(task_queue.metrics.counts["failed"], 1)
+        self.assertIn("failed after 2 attempts", logs.output[-1])
+
+    @override_settings(TASK_QUEUE_DURABLE=True)
+    def test_run_tasks_recovers_abandoned_tasks(self):
+        """Test that stored tasks, including those whose worker died, are
+        run by manage.py run_tasks"""
+        now = timezone.now()
+        BackgroundTask.objects.create(
+            name="tests.remember",
+            args=["pending"],
+            enqueued_at=now,
+            run_at=now,
+        )
+        BackgroundTask.objects.create(
+            name="tests.remember",
+            args=["abandoned"],
+            status=BackgroundTask.RUNNING,
+            enqueued_at=now,
+            run_at=now,
+            locked_until=now - timedelta(seconds=1),
+        )
+        BackgroundTask.objects.create(
+            name="tests.remember",
+            args=["still running"],
+            status=BackgroundTask.RUNNING,
+            enqueued_at=now,
+            run_at=now,
+            locked_until=now + timedelta(minutes=5),
+        )
+
+        out = StringIO()
+        call_command("run_tasks", "--once", stdout=out)
+
+        self.assertEqual(sorted(calls), ["abandoned", "pending"])
+        self.assertIn("Ran 2 tasks", out.getvalue())
+        self.assertEqual(BackgroundTask.objects.count(), 1)
+
+    def test_stats_endpoint_admin_only(self):
+        """Test that queue metrics are only served to staff allowed to view
+        background tasks"""
+        url = reverse("task-queue")
+        self.authenticate_user(self.test_user)
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_403_FORBIDDEN
+        )
+        self.authenticate_user(
+            self.create_test_user(
+                username="otherstaff", email="other@example.com", is_staff=True
+            )
+        )
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+        self.authenticate_user(self.admin_user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for key in ("depth", "running", "enqueued", "wait_ms", "run_ms"):
+            self.assertIn(key, response.data)
+
+    @override_settings(
+        SIMPLE_JWT={**settings.SIMPLE_JWT, "UPDATE_LAST_LOGIN": True}
+    )
+    def test_last_login_untouched_without_login(self):
+        """Test that no task runs for failed logins"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("authentication:login"),
+                {"username": "taskuser", "password": "wrong"},
+                format="json",
+            )
+
+        self.assertIsNone(User.objects.get(pk=self.test_user.pk).last_login)
+
+
+class ShardTransactionTaskE2ETestCase(BaseTestCase):
+    databases = {"default", "shard_0"}
+
+    def setup_test_data(self):
+        calls.clear()
+
+    def test_tasks_wait_for_every_database(self):
+        """Test that a task enqueued in a shard transaction runs once it
+        committed, and never if it rolled back"""
+        with (
+            self.captureOnCommitCallbacks(execute=True),
+            self.captureOnCommitCallbacks(using="shard_0", execute=True),
+        ):
+            try:
+                with transaction.atomic(using="shard_0"):
+                    remember.enqueue("rolled back")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            with transaction.atomic(using="shard_0"):
+                remember.enqueue("committed")
+            self.assertEqual(calls, [])
+
+        self.assertEqual(calls, ["committed"])
@@ -1,22 +1,28 @@
+from unittest import mock
+
 from django.urls import reverse
+from drf_spectacular.drainage import GENERATOR_STATS
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from common.base_test_case import BaseTestCase
+from common.openapi import SchemaGenerator
 
 
 class TokenManagementE2ETestCase(BaseTestCase):
-    def setup_test_data(self):
-        self.token_obtain_url = reverse("authentication:token_obtain_pair")
-        self.token_refresh_url = reverse("authentication:token_refresh")
-        self.profile_url = reverse("authentication:profile")
-
-        self.test_user = self.create_test_user(
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
             username="tokenuser",
             email="token@example.com",
             password="tokenpass123",
         )
 
+    def setup_test_data(self):
+        self.token_obtain_url = reverse("authentication:token_obtain_pair")
+        self.token_refresh_url = reverse("authentication:token_refresh")
+        self.profile_url = reverse("authentication:profile")
+
     def test_token_obtain_pair_success(self):
         """Test successful token pair generation"""
         credentials = {"username": "tokenuser", "password": "tokenpass123"}
@@ -260,3 +266,58 @@ class TokenManagementE2ETestCase(BaseTestCase):
             blacklisted_refresh_response.status_code,
             status.HTTP_401_UNAUTHORIZED,
         )
+
+    def test_schema_documents_bearer_auth(self):
+        """Test that the schema documents the sharded JWT authentication as
+        the bearer scheme of the endpoints that need it"""
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        scheme = schema["components"]["securitySchemes"]["jwtAuth"]
+        self.assertEqual(scheme["scheme"], "bearer")
+        profile = schema["paths"]["/api/auth/profile/"]["get"]
+        self.assertIn({"jwtAuth": []}, profile["security"])
+
+    def test_schema_applies_deferred_annotations(self):
+        """Test that common.schema annotations, including those built when
+        the schema is generated, end up in the schema"""
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        register = schema["paths"]["/api/auth/register/"]["post"]
+        self.assertIn(
+            "Idempotency-Key",
+            [parameter["name"] for parameter in register["parameters"]],
+        )
+        export = schema["paths"]["/api/auth/users/export/"]["get"]
+        self.assertEqual(export["operationId"], "users_export")
+        self.assertIn("text/csv", export["responses"]["200"]["content"])
+
+    def test_schema_lists_lazily_routed_views(self):
+        """Test that staff views routed through common.lazy are in the
+        schema, while the schema and documentation views are not"""
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        operation = schema["paths"]["/api/tasks/"]["get"]
+        self.assertEqual(operation["operationId"], "tasks_stats")
+        self.assertIn("/api/profiles/{report_id}/", schema["paths"])
+        self.assertNotIn("/api/schema/", schema["paths"])
+
+    def test_schema_generated_without_errors(self):
+        """Test that drf-spectacular can describe every view, including
+        the logout endpoints"""
+        with mock.patch.object(GENERATOR_STATS, "emit") as emit:
+            schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        errors = [
+            call.args[0]
+            for call in emit.call_args_list
+            if call.args[1] == "error"
+        ]
+        self.assertEqual(errors, [])
+        logout_all = schema["paths"]["/api/auth/logout/all/"]["post"]
+        self.assertNotIn("requestBody", logout_all)
+        self.assertEqual(
+            logout_all["responses"]["200"]["content"]["application/json"][
+                "schema"
+            ]["$ref"],
+            "#/components/schemas/Message",
+        )
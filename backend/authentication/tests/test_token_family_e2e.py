@@ -0,0 +1,193 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.tokens import (
+    RefreshToken as BlacklistRefreshToken,
+)
+
+from authentication.families import FAMILY_CLAIM, FAMILY_GENERATION_CLAIM
+from authentication.models import TokenFamily
+from authentication.tokens import RefreshToken
+from common.base_test_case import BaseTestCase
+
+
+class TokenFamilyE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="familyuser", email="family@example.com"
+        )
+
+    def setup_test_data(self):
+        self.token_refresh_url = reverse("authentication:token_refresh")
+
+    def refresh(self, refresh_token):
+        # Skip the replay of recent refreshes
+        cache.clear()
+        return self.client.post(
+            self.token_refresh_url, {"refresh": refresh_token}, format="json"
+        )
+
+    def test_login_starts_family(self):
+        """Test that a login writes one family row and no outstanding
+        token, and that access tokens carry no family claims"""
+        tokens = self.get_jwt_tokens(self.test_user)
+
+        family = TokenFamily.objects.get()
+        refresh = RefreshToken(tokens["refresh"])
+        self.assertEqual(refresh[FAMILY_CLAIM], str(family.pk))
+        self.assertEqual(refresh[FAMILY_GENERATION_CLAIM], 0)
+        self.assertFalse(OutstandingToken.objects.exists())
+        access = AccessToken(tokens["access"])
+        self.assertNotIn(FAMILY_CLAIM, access.payload)
+        self.assertNotIn(FAMILY_GENERATION_CLAIM, access.payload)
+
+    def test_rotation_is_one_update(self):
+        """Test that rotating writes a single UPDATE of the family"""
+        tokens = self.get_jwt_tokens(self.test_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.refresh(tokens["refresh"])
+        writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("UPDATE", "INSERT", "DELETE"))
+        ]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('UPDATE "auth_token_family"'))
+        self.assertEqual(TokenFamily.objects.get().generation, 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+        refreshed = RefreshToken(response.data["refresh"])
+        self.assertEqual(refreshed[FAMILY_GENERATION_CLAIM], 1)
+        self.assertEqual(
+            self.refresh(str(refreshed)).status_code, status.HTTP_200_OK
+        )
+
+    @override_settings(JWT_REFRESH_GRACE_SECONDS=0)
+    def test_reuse_revokes_family(self):
+        """Test that presenting a rotated token ends the whole session"""
+        tokens = self.get_jwt_tokens(self.test_user)
+        other_session = self.get_jwt_tokens(self.test_user)
+        rotated = self.refresh(tokens["refresh"]).data["refresh"]
+
+        with self.assertLogs("authentication.families", "WARNING"):
+            reuse = self.refresh(tokens["refresh"])
+
+        self.assertEqual(reuse.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(TokenFamily.objects.count(), 1)
+        self.assertEqual(
+            self.refresh(rotated).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertEqual(
+            self.refresh(other_session["refresh"]).status_code,
+            status.HTTP_200_OK,
+        )
+
+    def test_recent_rotation_not_theft(self):
+        """Test that retrying with the token rotated away from within the
+        grace window is rejected without ending the session"""
+        tokens = self.get_jwt_tokens(self.test_user)
+        rotated = self.refresh(tokens["refresh"]).data["refresh"]
+
+        retry = self.refresh(tokens["refresh"])
+
+        self.assertEqual(retry.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh(rotated).status_code, status.HTTP_200_OK)
+
+    def test_concurrent_rotation_loses_swap(self):
+        """Test that of two rotations of the same checked token only the
+        first one succeeds"""
+        raw = self.get_jwt_tokens(self.test_user)["refresh"]
+        first, second = RefreshToken(raw), RefreshToken(raw)
+
+        first.rotate()
+        with self.assertRaisesMessage(TokenError, "already rotated"):
+            second.rotate()
+        self.assertEqual(TokenFamily.objects.get().generation, 1)
+
+    def test_logout_revokes_family(self):
+        """Test that logging out deletes the family"""
+        tokens = self.authenticate_user(self.test_user)
+
+        response = self.client.post(
+            reverse("authentication:logout"),
+            {"refresh": tokens["refresh"]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(TokenFamily.objects.exists())
+        self.assertFalse(BlacklistedToken.objects.exists())
+        self.assertEqual(
+            self.refresh(tokens["refresh"]).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_legacy_token_moves_to_family(self):
+        """Test that a token issued before families is blacklisted on its
+        first rotation and continues as a family"""
+        legacy = BlacklistRefreshToken.for_user(self.test_user)
+
+        response = self.refresh(str(legacy))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            BlacklistedToken.objects.get().token.jti, legacy["jti"]
+        )
+        refreshed = RefreshToken(response.data["refresh"])
+        self.assertEqual(
+            refreshed[FAMILY_CLAIM], str(TokenFamily.objects.get().pk)
+        )
+        self.assertEqual(
+            self.refresh(str(legacy)).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_flush_expired_families(self):
+        """Test that only families past their expiry are flushed"""
+        self.get_jwt_tokens(self.test_user)
+        expired = RefreshToken.for_user(self.test_user)
+        TokenFamily.objects.filter(pk=expired[FAMILY_CLAIM]).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        call_command("flush_token_families", stdout=StringIO())
+
+        self.assertEqual(TokenFamily.objects.count(), 1)
+        self.assertNotEqual(
+            str(TokenFamily.objects.get().pk), expired[FAMILY_CLAIM]
+        )
+
+
+class TokenWritesBenchmarkE2ETestCase(BaseTestCase):
+    databases = "__all__"
+
+    def test_reports_writes_per_refresh(self):
+        """Test that the write benchmark compares both stores"""
+        out = StringIO()
+        call_command("benchmark_token_writes", refreshes=3, stdout=out)
+        lines = out.getvalue().splitlines()
+
+        families = lines.index("token families")
+        self.assertIn("blacklist tables", lines)
+        self.assertIn(
+            "INSERT  0.00  UPDATE  1.00  DELETE  0.00  rows added +0.00",
+            lines[families + 2],
+        )
@@ -0,0 +1,150 @@
+import threading
+import time
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from authentication.models import TokenFamily
+from common.base_test_case import BaseTestCase
+from common.singleflight import single_flight
+
+
+class TokenRefreshDedupE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
+            username="dedupuser",
+            email="dedup@example.com",
+            password="deduppass123",
+        )
+
+    def setup_test_data(self):
+        self.token_refresh_url = reverse("authentication:token_refresh")
+
+    def refresh(self, refresh_token):
+        return self.client.post(
+            self.token_refresh_url, {"refresh": refresh_token}, format="json"
+        )
+
+    def test_duplicate_refreshes_share_one_pair(self):
+        """Test that repeated refreshes within the grace window get the
+        same pair without signing or writing again"""
+        tokens = self.get_jwt_tokens(self.test_user)
+
+        first = self.refresh(tokens["refresh"])
+        with self.assertNumQueries(0):
+            responses = [self.refresh(tokens["refresh"]) for _ in range(3)]
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data, first.data)
+        self.assertEqual(TokenFamily.objects.get().generation, 1)
+
+        # The replayed pair is a normal, usable pair
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {first.data['access']}"
+        )
+        profile = self.client.get(reverse("authentication:profile"))
+        self.assertEqual(profile.status_code, status.HTTP_200_OK)
+
+    def test_different_tokens_not_shared(self):
+        """Test that each refresh token gets its own new pair"""
+        first = self.refresh(self.get_jwt_tokens(self.test_user)["refresh"])
+        second = self.refresh(self.get_jwt_tokens(self.test_user)["refresh"])
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(first.data["refresh"], second.data["refresh"])
+
+    @override_settings(JWT_REFRESH_GRACE_SECONDS=0)
+    def test_reuse_after_grace_window_rejected(self):
+        """Test that a rotated token is rejected once the window passed"""
+        tokens = self.get_jwt_tokens(self.test_user)
+
+        self.assertEqual(
+            self.refresh(tokens["refresh"]).status_code, status.HTTP_200_OK
+        )
+        with self.assertLogs("authentication.families", "WARNING"):
+            reuse = self.refresh(tokens["refresh"])
+        self.assertEqual(reuse.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_stops_replay(self):
+        """Test that logging out with the new token ends the replay of the
+        pair issued for the old one"""
+        tokens = self.authenticate_user(self.test_user)
+        refreshed = self.refresh(tokens["refresh"])
+        self.assertEqual(refreshed.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(
+            reverse("authentication:logout"),
+            {"refresh": refreshed.data["refresh"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            self.refresh(tokens["refresh"]).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_failed_refresh_not_cached(self):
+        """Test that errors are not replayed as results"""
+        for _ in range(2):
+            response = self.refresh("not-a-token")
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SingleFlightTestCase(BaseTestCase):
+    def test_concurrent_callers_compute_once(self):
+        """Test that concurrent callers share a single computation"""
+        calls = []
+        barrier = threading.Barrier(8)
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"value": 42}
+
+        def caller():
+            barrier.wait()
+            results.append(single_flight("sf:test", compute, ttl=10))
+
+        threads = [threading.Thread(target=caller) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"value": 42}] * 8)
+
+    def test_waits_for_result_from_other_worker(self):
+        """Test waiting on a computation held by another process"""
+        from django.core.cache import cache
+
+        cache.add("sf:remote:lock", 1, timeout=5)
+
+        def publish():
+            time.sleep(0.05)
+            cache.set("sf:remote", "remote-result", 10)
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+        result = single_flight("sf:remote", lambda: "local-result", ttl=10)
+        thread.join()
+
+        self.assertEqual(result, "remote-result")
+
+    def test_computes_when_other_worker_gives_up(self):
+        """Test falling back to a local computation if the lock vanishes"""
+        from django.core.cache import cache
+
+        cache.add("sf:gone:lock", 1, timeout=5)
+        threading.Timer(0.05, cache.delete, args=["sf:gone:lock"]).start()
+
+        result = single_flight("sf:gone", lambda: "local-result", ttl=10)
+
+        self.assertEqual(result, "local-result")
@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from authentication.admin import UserAdmin
+from common.base_test_case import BaseTestCase
+
+
+@mock.patch.object(UserAdmin, "list_per_page", 2)
+class UserAdminE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.admin_user = cls.create_test_user(
+            username="admin",
+            email="admin@example.com",
+            is_staff=True,
+            is_superuser=True,
+        )
+        for name in ("alice", "bob", "carol", "dave"):
+            cls.create_test_user(username=name, email=f"{name}@example.com")
+
+    def setup_test_data(self):
+        self.client.force_login(self.admin_user)
+        self.url = reverse("admin:auth_user_changelist")
+
+    def changelist(self, url=None, **params):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.context["cl"]
+
+    def usernames(self, cl):
+        return [user.username for user in cl.result_list]
+
+    def test_cursor_navigation(self):
+        """Test that next and previous links walk the list by username"""
+        first = self.changelist()
+        self.assertEqual(self.usernames(first), ["admin", "alice"])
+        self.assertIsNone(first.previous_url)
+
+        second = self.changelist(self.url + first.next_url)
+        self.assertEqual(self.usernames(second), ["bob", "carol"])
+        self.assertIn("after=alice", first.next_url)
+
+        last = self.changelist(self.url + second.next_url)
+        self.assertEqual(self.usernames(last), ["dave"])
+        self.assertIsNone(last.next_url)
+
+        back = self.changelist(self.url + last.previous_url)
+        self.assertEqual(self.usernames(back), ["bob", "carol"])
+        self.assertIsNotNone(back.previous_url)
+
+    def test_descending_order_pages_backwards(self):
+        """Test that cursors follow a descending sort"""
+        first = self.changelist(o="-1")
+        self.assertEqual(self.usernames(first), ["dave", "carol"])
+
+        second = self.changelist(self.url + first.next_url)
+        self.assertEqual(self.usernames(second), ["bob", "alice"])
+
+    def test_pages_avoid_offset_and_unused_columns(self):
+        """Test that pages are range scans that load the listed columns"""
+        with CaptureQueriesContext(connection) as queries:
+            self.changelist(after="bob")
+        user_queries = [
+            query["sql"]
+            for query in queries
+            if 'FROM "auth_user"' in query["sql"]
+            and '"auth_user"."username" >' in query["sql"]
+        ]
+
+        self.assertEqual(len(user_queries), 1)
+        self.assertNotIn("OFFSET", user_queries[0])
+        self.assertNotIn('"auth_user"."password"', user_queries[0])
+        self.assertNotIn('"auth_user"."last_login"', user_queries[0])
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=2)
+    def test_large_counts_estimated_or_capped(self):
+        """Test that big unfiltered lists show an estimate and big filtered
+        ones stop counting at the limit"""
+        cl = self.changelist()
+        self.assertTrue(cl.paginator.estimated)
+        self.assertGreaterEqual(cl.result_count, 5)
+
+        cl = self.changelist(is_staff__exact="0")
+        self.assertTrue(cl.paginator.truncated)
+        self.assertEqual(cl.result_count, 3)
+
+        response = self.client.get(self.url, {"is_staff__exact": "0"})
+        self.assertContains(response, "More than 2")
+
+    def test_exact_count_below_limit(self):
+        """Test that small lists keep their exact count"""
+        cl = self.changelist()
+        self.assertEqual(cl.result_count, 5)
+        self.assertFalse(cl.paginator.estimated or cl.paginator.truncated)
+
+    def test_prefix_search(self):
+        """Test that search matches username and email prefixes and ids"""
+        self.assertEqual(self.usernames(self.changelist(q="car")), ["carol"])
+        self.assertEqual(self.usernames(self.changelist(q="dave@")), ["dave"])
+        self.assertEqual(self.usernames(self.changelist(q="aro")), [])
+        self.assertEqual(
+            self.usernames(self.changelist(q=str(self.admin_user.pk))),
+            ["admin"],
+        )
+
+    @mock.patch.object(UserAdmin, "ordering", ("-pk",))
+    def test_invalid_cursor_starts_over(self):
+        """Test that a malformed cursor shows the first page"""
+        cl = self.changelist(after="not-an-id")
+        self.assertEqual(self.usernames(cl), ["dave", "carol"])
+        self.assertIsNone(cl.previous_url)
+        self.assertIn(f"after={cl.result_list[1].pk}", cl.next_url)
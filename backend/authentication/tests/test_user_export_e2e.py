@@ -0,0 +1,163 @@
+import csv
+import gzip
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework import status
+
+from authentication.serializers import UserSerializer
+from common.base_test_case import BaseTestCase
+
+
+class UserExportE2ETestCase(BaseTestCase):
+    @classmethod
+    def setup_class_data(cls):
+        cls.admin_user = cls.create_test_user(
+            username="exporter", email="exporter@example.com", is_staff=True
+        )
+        cls.admin_user.user_permissions.add(
+            Permission.objects.get(codename="view_user")
+        )
+        for i in range(4):
+            cls.create_test_user(
+                username=f"member{i}",
+                email=f"member{i}@example.com",
+                first_name=f"First{i}",
+            )
+
+    def setup_test_data(self):
+        self.url = reverse("authentication:user_export")
+
+    def download(self, **params):
+        self.authenticate_user(self.admin_user)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b"".join(response.streaming_content)
+
+    def expected_rows(self):
+        users = User.objects.order_by("pk")
+        return [
+            {
+                key: str(value)
+                for key, value in UserSerializer(user).data.items()
+            }
+            for user in users
+        ]
+
+    def test_export_requires_staff(self):
+        """Test that only staff can export users"""
+        self.assertEqual(
+            self.client.get(self.url).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        self.authenticate_user(self.create_test_user())
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+    def test_export_requires_view_permission(self):
+        """Test that staff also need the auth.view_user permission"""
+        self.authenticate_user(self.create_test_user(is_staff=True))
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+    def test_csv_export_streams_batches(self):
+        """Test that the CSV export lists every user with the serializer's
+        fields, reading them in keyset batches"""
+        self.authenticate_user(self.admin_user)
+        with mock.patch("authentication.export.BATCH_SIZE", 2):
+            response = self.client.get(self.url)
+            self.assertTrue(response.streaming)
+            with self.assertNumQueries(3):
+                body = b"".join(response.streaming_content)
+
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual(rows, self.expected_rows())
+        self.assertNotIn("password", rows[0])
+
+    def test_csv_formulas_escaped(self):
+        """Test that CSV cells a spreadsheet would evaluate are prefixed
+        with a quote, and left alone in JSON Lines"""
+        self.create_test_user(
+            username="formula",
+            email="formula@example.com",
+            first_name="=HYPERLINK(1)",
+            last_name="@SUM(A1)",
+        )
+
+        _, body = self.download()
+        row = next(
+            row
+            for row in csv.DictReader(io.StringIO(body.decode()))
+            if row["username"] == "formula"
+        )
+        self.assertEqual(row["first_name"], "'=HYPERLINK(1)")
+        self.assertEqual(row["last_name"], "'@SUM(A1)")
+
+        _, body = self.download(output="jsonl")
+        self.assertIn('"first_name":"=HYPERLINK(1)"', body.decode())
+
+    def test_jsonl_export(self):
+        """Test that JSON Lines rows match the profile representation"""
+        response, body = self.download(output="jsonl")
+
+        self.assertTrue(
+            response["Content-Type"].startswith("application/jsonl")
+        )
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0], dict(UserSerializer(self.admin_user).data))
+
+    def test_export_compressed_on_the_fly(self):
+        """Test that the stream is gzipped for clients accepting it"""
+        self.authenticate_user(self.admin_user)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        body = gzip.decompress(b"".join(response.streaming_content))
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(body.decode().splitlines()), 6)
+
+    def test_unknown_output_rejected(self):
+        """Test that an unsupported file format is a 400"""
+        self.authenticate_user(self.admin_user)
+        response = self.client.get(self.url, {"output": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_command_writes_compressed_file(self):
+        """Test that manage.py export_users writes a gzipped file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "users.jsonl.gz"
+            call_command(
+                "export_users",
+                "--format=jsonl",
+                "--compress=gzip",
+                f"--output={path}",
+                "--batch-size=3",
+                stderr=io.StringIO(),
+            )
+            lines = gzip.decompress(path.read_bytes()).decode().splitlines()
+
+        self.assertEqual(
+            [json.loads(line)["username"] for line in lines],
+            ["exporter", "member0", "member1", "member2", "member3"],
+        )
+
+    def test_command_writes_stdout(self):
+        """Test that the command prints CSV without --output"""
+        out = io.StringIO()
+        call_command("export_users", stdout=out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(rows, self.expected_rows())
+
+        with self.assertRaises(CommandError):
+            call_command("export_users", "--compress=gzip")
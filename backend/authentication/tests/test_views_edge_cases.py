@@ -5,14 +5,17 @@ from common.base_test_case import BaseTestCase
 
 
 class ViewsEdgeCasesTestCase(BaseTestCase):
-    def setup_test_data(self):
-        self.token_url = reverse("authentication:token_obtain_pair")
-        self.test_user = self.create_test_user(
+    @classmethod
+    def setup_class_data(cls):
+        cls.test_user = cls.create_test_user(
             username="edgeuser",
             email="edge@example.com",
             password="edgepass123",
         )
 
+    def setup_test_data(self):
+        self.token_url = reverse("authentication:token_obtain_pair")
+
     def test_custom_token_obtain_pair_view_success(self):
         """Test CustomTokenObtainPairView includes user data on success"""
         credentials = {"username": "edgeuser", "password": "edgepass123"}
@@ -0,0 +1,110 @@
+from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import BlacklistMixin
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .families import (
+    FAMILY_CLAIM,
+    FAMILY_GENERATION_CLAIM,
+    advance_family,
+    check_family,
+    revoke_family,
+    start_family,
+)
+from .grants import add_grant_claims, token_is_current
+from .revocation import add_generation_claim, check_generation
+from .sharding import get_user_by_id, shard_for_user_id
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh token of a token family (see families.py) on the shard of the
+    user it was issued to, carrying the user's grants (see grants.py) and
+    token generation (see revocation.py). Tokens issued before families
+    use the outstanding and blacklist rows on that shard. Use it instead of
+    simplejwt's RefreshToken.
+    """
+
+    # Access tokens do not belong to the family
+    no_copy_claims = (
+        *BaseRefreshToken.no_copy_claims,
+        FAMILY_CLAIM,
+        FAMILY_GENERATION_CLAIM,
+    )
+
+    def verify(self):
+        super().verify()
+        check_generation(self)
+
+    @property
+    def db(self):
+        return shard_for_user_id(self.payload.get(api_settings.USER_ID_CLAIM))
+
+    def check_blacklist(self):
+        if FAMILY_CLAIM in self.payload:
+            check_family(self)
+            return
+        jti = self.payload[api_settings.JTI_CLAIM]
+        blacklisted = BlacklistedToken.objects.using(self.db)
+        if blacklisted.filter(token__jti=jti).exists():
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        if FAMILY_CLAIM in self.payload:
+            revoke_family(self)
+            return None
+        jti = self.payload[api_settings.JTI_CLAIM]
+        exp = self.payload["exp"]
+        token, _ = OutstandingToken.objects.using(self.db).get_or_create(
+            jti=jti,
+            defaults={
+                "token": str(self),
+                "expires_at": datetime_from_epoch(exp),
+            },
+        )
+        return BlacklistedToken.objects.using(self.db).get_or_create(
+            token=token
+        )
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, which writes to the default database
+        token = super(BlacklistMixin, cls).for_user(user)
+        add_grant_claims(token, user)
+        add_generation_claim(token, user)
+        start_family(token, user.pk)
+        return token
+
+    def rotate(self):
+        """Turn this checked token into the next one of its session. The
+        old one stops working; tokens from before families are blacklisted
+        and start one."""
+        legacy = FAMILY_CLAIM not in self.payload
+        if legacy and api_settings.BLACKLIST_AFTER_ROTATION:
+            self.blacklist()
+        self.set_jti()
+        self.set_exp()
+        self.set_iat()
+        if legacy:
+            start_family(self, self[api_settings.USER_ID_CLAIM])
+        else:
+            advance_family(self)
+
+    @property
+    def access_token(self):
+        # Access tokens copy this token's claims: update outdated grants
+        # first, so a rotated refresh token carries them too
+        if not token_is_current(self):
+            try:
+                user = get_user_by_id(self[api_settings.USER_ID_CLAIM])
+            except User.DoesNotExist:
+                raise TokenError(_("User not found")) from None
+            add_grant_claims(self, user)
+        return super().access_token
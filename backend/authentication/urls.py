@@ -1,23 +1,48 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from common.compression import compression_exempt
+
 from .views import (
+    AvailabilityView,
     CustomTokenObtainPairView,
+    EventStreamTicketView,
     LoginView,
+    LogoutAllView,
     LogoutView,
     ProfileView,
     RegisterView,
+    TokenIntrospectionView,
+    UserExportView,
 )
 
 app_name = "authentication"
 
+# Responses carrying tokens or tickets are never compressed (BREACH)
 urlpatterns = [
-    path("register/", RegisterView.as_view(), name="register"),
-    path("login/", LoginView.as_view(), name="login"),
+    path(
+        "register/", compression_exempt(RegisterView.as_view()), name="register"
+    ),
+    path("availability/", AvailabilityView.as_view(), name="availability"),
+    path("login/", compression_exempt(LoginView.as_view()), name="login"),
     path("logout/", LogoutView.as_view(), name="logout"),
+    path("logout/all/", LogoutAllView.as_view(), name="logout_all"),
     path("profile/", ProfileView.as_view(), name="profile"),
     path(
-        "token/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"
+        "token/",
+        compression_exempt(CustomTokenObtainPairView.as_view()),
+        name="token_obtain_pair",
+    ),
+    path(
+        "token/refresh/",
+        compression_exempt(TokenRefreshView.as_view()),
+        name="token_refresh",
+    ),
+    path("introspect/", TokenIntrospectionView.as_view(), name="introspect"),
+    path(
+        "events/ticket/",
+        compression_exempt(EventStreamTicketView.as_view()),
+        name="event_stream_ticket",
     ),
-    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("users/export/", UserExportView.as_view(), name="user_export"),
 ]
@@ -1,15 +1,27 @@
 from .auth_views import (
     CustomTokenObtainPairView,
     LoginView,
+    LogoutAllView,
     LogoutView,
     RegisterView,
 )
+from .availability_views import AvailabilityView
+from .event_views import EventStreamTicketView
+from .export_views import UserExportView
+from .introspection_views import TokenIntrospectionView
+from .jwks_views import JWKSView
 from .user_views import ProfileView
 
 __all__ = [
     "RegisterView",
     "LoginView",
     "LogoutView",
+    "LogoutAllView",
     "CustomTokenObtainPairView",
     "ProfileView",
+    "TokenIntrospectionView",
+    "JWKSView",
+    "AvailabilityView",
+    "UserExportView",
+    "EventStreamTicketView",
 ]
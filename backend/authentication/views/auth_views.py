@@ -1,35 +1,68 @@
 from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
 from rest_framework import status
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from common.idempotency import idempotency_key_parameter, idempotent
+from common.schema import extend_schema
+
+from ..events import publish_user_event
+from ..revocation import revoke_all_tokens
 from ..serializers import (
+    AuthResponseSerializer,
+    LogoutSerializer,
+    MessageSerializer,
     UserLoginSerializer,
     UserRegistrationSerializer,
     UserSerializer,
+    forget_introspection,
+    forget_refresh_result,
 )
+from ..sharding import get_user_by_id, get_user_by_username
+from ..tasks import login_succeeded
+from ..tokens import RefreshToken
+
+
+def token_pair(user):
+    refresh = RefreshToken.for_user(user)
+    return {"access": str(refresh.access_token), "refresh": str(refresh)}
+
+
+def reissue_tokens(request, data):
+    """Fresh tokens for a replayed registration, whose stored response
+    holds none"""
+    try:
+        user = get_user_by_id(data["user"]["id"])
+    except User.DoesNotExist:
+        user = None
+    if user is None or not user.is_active:
+        raise NotFound(_("The registered user no longer exists."))
+    return {**data, "tokens": token_pair(user)}
 
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
 
+    @extend_schema(
+        request=UserRegistrationSerializer,
+        responses={201: AuthResponseSerializer},
+        parameters=[idempotency_key_parameter],
+    )
+    @idempotent(withhold=["tokens"], restore=reissue_tokens)
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
 
             return Response(
                 {
                     "message": "Registration successful",
                     "user": UserSerializer(user).data,
-                    "tokens": {
-                        "access": str(refresh.access_token),
-                        "refresh": str(refresh),
-                    },
+                    "tokens": token_pair(user),
                 },
                 status=status.HTTP_201_CREATED,
             )
@@ -40,11 +73,15 @@ class RegisterView(APIView):
 class LoginView(APIView):
     permission_classes = [AllowAny]
 
+    @extend_schema(
+        request=UserLoginSerializer, responses={200: AuthResponseSerializer}
+    )
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data["user"]
             refresh = RefreshToken.for_user(user)
+            login_succeeded(user)
 
             return Response(
                 {
@@ -64,11 +101,20 @@ class LoginView(APIView):
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @extend_schema(request=LogoutSerializer, responses={200: MessageSerializer})
     def post(self, request):
         try:
             refresh_token = request.data["refresh"]
             token = RefreshToken(refresh_token)
             token.blacklist()
+            publish_user_event(
+                request.user.pk,
+                "session_revoked",
+                {"scope": "session"},
+                using=token.db,
+            )
+            forget_refresh_result(refresh_token)
+            forget_introspection(refresh_token)
 
             return Response(
                 {"message": "Logout successful"}, status=status.HTTP_200_OK
@@ -79,10 +125,25 @@ class LogoutView(APIView):
             )
 
 
+class LogoutAllView(APIView):
+    """End every session of the user: all their access and refresh tokens
+    stop working at once"""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(request=None, responses={200: MessageSerializer})
+    def post(self, request):
+        revoke_all_tokens([request.user.pk])
+        return Response(
+            {"message": "Logged out of all devices"}, status=status.HTTP_200_OK
+        )
+
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
         if response.status_code == 200:
-            user = User.objects.get(username=request.data["username"])
+            user = get_user_by_username(request.data["username"])
             response.data["user"] = UserSerializer(user).data
+            login_succeeded(user)
         return response
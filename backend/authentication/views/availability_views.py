@@ -0,0 +1,27 @@
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.schema import extend_schema
+from common.throttling import ScopedRateThrottle
+
+from ..serializers import AvailabilityResponseSerializer, AvailabilitySerializer
+
+
+class AvailabilityView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "availability"
+
+    @extend_schema(
+        parameters=[AvailabilitySerializer],
+        responses={200: AvailabilityResponseSerializer},
+    )
+    def get(self, request):
+        serializer = AvailabilitySerializer(data=request.query_params)
+        if serializer.is_valid():
+            return Response(serializer.check(), status=status.HTTP_200_OK)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
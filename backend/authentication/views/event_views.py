@@ -0,0 +1,27 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.schema import extend_schema
+
+from ..serializers import EventStreamTicketSerializer
+from ..streams import issue_ticket
+
+
+class EventStreamTicketView(APIView):
+    """A single-use ticket for opening the event stream with EventSource"""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(request=None, responses={200: EventStreamTicketSerializer})
+    def post(self, request):
+        ticket = issue_ticket(str(request.auth))
+        return Response(
+            {
+                "ticket": ticket,
+                "expires_in": settings.EVENT_STREAM_TICKET_SECONDS,
+            },
+            status=status.HTTP_200_OK,
+        )
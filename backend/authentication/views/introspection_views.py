@@ -0,0 +1,30 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.schema import extend_schema
+
+from ..permissions import HasServiceKey
+from ..serializers import (
+    TokenIntrospectionResponseSerializer,
+    TokenIntrospectionSerializer,
+)
+
+
+class TokenIntrospectionView(APIView):
+    authentication_classes = []
+    permission_classes = [HasServiceKey]
+
+    @extend_schema(
+        request=TokenIntrospectionSerializer,
+        responses={200: TokenIntrospectionResponseSerializer},
+    )
+    def post(self, request):
+        serializer = TokenIntrospectionSerializer(data=request.data)
+        if serializer.is_valid():
+            return Response(
+                {"results": serializer.introspect()},
+                status=status.HTTP_200_OK,
+            )
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,39 @@
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+
+from common.schema import extend_schema
+
+from ..serializers import JWKSetSerializer
+from ..signing import current_key_ring
+
+EMPTY_JWKS = b'{"keys":[]}'
+
+
+class JWKSView(APIView):
+    """Public keys that verify this service's tokens, as a JWK set"""
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        operation_id="jwks_retrieve", responses={200: JWKSetSerializer}
+    )
+    def get(self, request):
+        key_ring = current_key_ring()
+        body = key_ring.jwks_json if key_ring is not None else EMPTY_JWKS
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+
+        if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.JWKS_CACHE_SECONDS
+        )
+        return response
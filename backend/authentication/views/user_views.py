@@ -3,22 +3,40 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ..serializers import UserSerializer
+from common.idempotency import idempotency_key_parameter, idempotent
+from common.schema import extend_schema
+
+from ..events import publish_user_event
+from ..serializers import ProfileUpdateResponseSerializer, UserSerializer
 
 
 class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @extend_schema(responses={200: UserSerializer})
     def get(self, request):
         serializer = UserSerializer(request.user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        request=UserSerializer(partial=True),
+        responses={200: ProfileUpdateResponseSerializer},
+        parameters=[idempotency_key_parameter],
+    )
+    @idempotent
     def put(self, request):
         serializer = UserSerializer(
             request.user, data=request.data, partial=True
         )
         if serializer.is_valid():
             serializer.save()
+            if serializer.changed_fields:
+                publish_user_event(
+                    request.user.pk,
+                    "profile_updated",
+                    serializer.data,
+                    using=request.user._state.db,
+                )
             return Response(
                 {
                     "message": "Profile updated successfully",
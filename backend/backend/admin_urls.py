@@ -0,0 +1,9 @@
+"""
+Django admin URLs, imported on the first admin request. Not routed with
+the ``api`` worker profile, which does not install the admin.
+"""
+
+from django.contrib import admin
+
+app_name = "admin"
+urlpatterns = admin.site.get_urls()
@@ -2,6 +2,9 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Event streams (authentication.streams) are answered here, ahead of Django,
+so that each idle stream only costs a coroutine; every other request goes
+to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +16,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importing models needs the apps loaded by get_asgi_application()
+from authentication.availability import prebuild_user_index  # noqa: E402
+from authentication.streams import EVENTS_PATH, event_stream  # noqa: E402
+
+prebuild_user_index()
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == EVENTS_PATH:
+        return await event_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -6,6 +6,22 @@ import os
 
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", "")
+# Number of databases users are hash-sharded over (0 keeps them in default).
+USER_SHARD_COUNT = int(os.getenv("USER_SHARD_COUNT", "0"))
+# Comma-separated URLs of those databases, one per shard in order
+USER_SHARD_DATABASE_URLS = [
+    url for url in os.getenv("USER_SHARD_DATABASE_URLS", "").split(",") if url
+]
+
+# Admin
+# Changelists count at most this many matching rows; unfiltered lists of
+# larger tables show the database's row estimate instead.
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv("ADMIN_EXACT_COUNT_LIMIT", "10000"))
+
+# Workers
+# "full" serves everything. "api" leaves out the admin app and its URLs,
+# for workers that only serve the API.
+WORKER_PROFILE = os.getenv("WORKER_PROFILE", "full")
 
 # Security
 SECRET_KEY = os.getenv(
@@ -32,7 +48,51 @@ JWT_ROTATE_REFRESH_TOKENS = (
 JWT_BLACKLIST_AFTER_ROTATION = (
     os.getenv("JWT_BLACKLIST_AFTER_ROTATION", "True").lower() == "true"
 )
+# HS256 signs with SECRET_KEY. RS256 and EdDSA sign with the newest (or
+# JWT_ACTIVE_KID) of the <kid>.pem private keys in JWT_KEYS_DIR.
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR", "")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID", "")
+# How long clients may cache /.well-known/jwks.json.
+JWKS_CACHE_SECONDS = int(os.getenv("JWKS_CACHE_SECONDS", "300"))
+# Repeated refreshes of one token within this window get the same new pair.
+JWT_REFRESH_GRACE_SECONDS = int(os.getenv("JWT_REFRESH_GRACE_SECONDS", "10"))
+
+# How long each process reuses the version of a user's token grants it
+# read from the cache; grants changed elsewhere may be trusted this long.
+PERMISSIONS_VERSION_CACHE_SECONDS = float(
+    os.getenv("PERMISSIONS_VERSION_CACHE_SECONDS", "5")
+)
+
+# How long the token generation of a user (bumped by logging out of all
+# devices) is cached; without REDIS_URL other workers may accept revoked
+# tokens this long.
+TOKEN_GENERATION_CACHE_SECONDS = int(
+    os.getenv("TOKEN_GENERATION_CACHE_SECONDS", "60")
+)
+
+# Token introspection
+# Comma-separated keys that internal services send in X-Service-Key.
+SERVICE_API_KEYS = [
+    key for key in os.getenv("SERVICE_API_KEYS", "").split(",") if key
+]
+INTROSPECTION_MAX_BATCH = int(os.getenv("INTROSPECTION_MAX_BATCH", "100"))
+
+# Username/email availability
+# How often each worker picks up users created elsewhere, and how often it
+# rebuilds its Bloom filters from the whole table.
+AVAILABILITY_SYNC_SECONDS = float(os.getenv("AVAILABILITY_SYNC_SECONDS", "5"))
+AVAILABILITY_REBUILD_SECONDS = float(
+    os.getenv("AVAILABILITY_REBUILD_SECONDS", "3600")
+)
+AVAILABILITY_ERROR_RATE = float(os.getenv("AVAILABILITY_ERROR_RATE", "0.01"))
+# Checks one client may make, as a DRF throttle rate
+AVAILABILITY_THROTTLE_RATE = os.getenv("AVAILABILITY_THROTTLE_RATE", "60/min")
+
+# Cache
+# Shared cache for all workers, e.g. redis://redis:6379/0. Without it each
+# process keeps its own in-memory cache.
+REDIS_URL = os.getenv("REDIS_URL", "")
 
 # CORS Settings
 CORS_ALLOWED_ORIGINS = os.getenv(
@@ -44,6 +104,110 @@ CORS_ALLOW_CREDENTIALS = (
 CORS_ALLOW_ALL_ORIGINS = (
     os.getenv("CORS_ALLOW_ALL_ORIGINS", "True").lower() == "true"
 )
+# Seconds browsers may reuse a preflight response (Chromium caps it at 7200)
+CORS_PREFLIGHT_MAX_AGE = int(os.getenv("CORS_PREFLIGHT_MAX_AGE", "86400"))
+
+# Password hashing
+# "default" hashes with PBKDF2, "argon2" with Argon2id (both keep verifying
+# the other's hashes and upgrade them at login). "fast" trades all security
+# for speed and is only meant for tests, which use it unless this is set.
+# Run `manage.py calibrate_hashers` to choose the cost parameters.
+PASSWORD_HASHER_PROFILE = os.getenv("PASSWORD_HASHER_PROFILE", "")
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.getenv("PASSWORD_PBKDF2_ITERATIONS", "1000000")
+)
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "2"))
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.getenv("PASSWORD_ARGON2_MEMORY_COST", "102400")
+)  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "8"))
+
+# Response compression
+# Non-streaming /api/ responses smaller than this are sent uncompressed.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+
+# Admission control
+# Requests one process serves at once (its thread count with threaded
+# WSGI servers), the starting concurrency limit of each endpoint, and how
+# long a low priority request may have waited in the backlog (normal
+# priority twice, high four times as long) before it is refused. The
+# production uvicorn workers run Django's synchronous stack one request at
+# a time, so there only the backlog wait sheds load.
+ADMISSION_CONTROL_ENABLED = (
+    os.getenv("ADMISSION_CONTROL_ENABLED", "True").lower() == "true"
+)
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "8"))
+ADMISSION_INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "4"))
+ADMISSION_MAX_QUEUE_MS = float(os.getenv("ADMISSION_MAX_QUEUE_MS", "1000"))
+
+# Idempotency keys
+# Where keys and stored responses live ("cache" or "database"), how long
+# responses are replayed, and how long a request that never finished holds
+# its key.
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "cache")
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+
+# Event streams
+# Seconds between heartbeats on idle streams, how many undelivered events a
+# stream may fall behind before it is closed, the most streams one process
+# keeps open, how long before its access token expires a stream warns, and
+# how long a stream ticket can be redeemed.
+EVENT_STREAM_HEARTBEAT_SECONDS = float(
+    os.getenv("EVENT_STREAM_HEARTBEAT_SECONDS", "15")
+)
+EVENT_STREAM_QUEUE_SIZE = int(os.getenv("EVENT_STREAM_QUEUE_SIZE", "32"))
+EVENT_STREAM_MAX_CONNECTIONS = int(
+    os.getenv("EVENT_STREAM_MAX_CONNECTIONS", "10000")
+)
+EVENT_STREAM_EXPIRY_WARNING_SECONDS = int(
+    os.getenv("EVENT_STREAM_EXPIRY_WARNING_SECONDS", "60")
+)
+EVENT_STREAM_TICKET_SECONDS = int(
+    os.getenv("EVENT_STREAM_TICKET_SECONDS", "30")
+)
+
+# Health checks
+# How long /readyz reuses each dependency check result.
+HEALTH_CHECK_CACHE_SECONDS = float(os.getenv("HEALTH_CHECK_CACHE_SECONDS", "5"))
+
+# Query log
+# Queries slower than QUERY_LOG_SLOW_MS, and SQL run QUERY_LOG_REPEAT_THRESHOLD
+# times in one request, are logged; per-fingerprint totals every
+# QUERY_LOG_SUMMARY_SECONDS.
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "True").lower() == "true"
+QUERY_LOG_SLOW_MS = float(os.getenv("QUERY_LOG_SLOW_MS", "100"))
+QUERY_LOG_REPEAT_THRESHOLD = int(os.getenv("QUERY_LOG_REPEAT_THRESHOLD", "2"))
+QUERY_LOG_SUMMARY_SECONDS = float(os.getenv("QUERY_LOG_SUMMARY_SECONDS", "300"))
+
+# Request profiling
+# Fraction of requests profiled without a trigger token (0 disables).
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "")
+PROFILING_MAX_REPORTS = int(os.getenv("PROFILING_MAX_REPORTS", "100"))
+PROFILING_TOKEN_MAX_AGE = int(
+    os.getenv("PROFILING_TOKEN_MAX_AGE", "3600")
+)  # seconds
+
+# Background tasks
+# Worker threads per process and the most tasks queued in memory; when full
+# the enqueueing request runs the task itself.
+TASK_QUEUE_WORKERS = int(os.getenv("TASK_QUEUE_WORKERS", "4"))
+TASK_QUEUE_MAX_SIZE = int(os.getenv("TASK_QUEUE_MAX_SIZE", "1000"))
+# Keep queued tasks in the database so they survive restarts.
+TASK_QUEUE_DURABLE = os.getenv("TASK_QUEUE_DURABLE", "False").lower() == "true"
+# Run tasks inline instead of on the workers (the default in tests).
+TASK_QUEUE_EAGER = os.getenv("TASK_QUEUE_EAGER", "False").lower() == "true"
+# Failed tasks are retried after TASK_QUEUE_RETRY_DELAY, doubling each time.
+TASK_QUEUE_MAX_RETRIES = int(os.getenv("TASK_QUEUE_MAX_RETRIES", "3"))
+TASK_QUEUE_RETRY_DELAY = float(os.getenv("TASK_QUEUE_RETRY_DELAY", "2"))
+# Durable mode: how often stored tasks are polled for, and how long a
+# worker may hold one before another process takes it over.
+TASK_QUEUE_POLL_SECONDS = float(os.getenv("TASK_QUEUE_POLL_SECONDS", "5"))
+TASK_QUEUE_LEASE_SECONDS = float(os.getenv("TASK_QUEUE_LEASE_SECONDS", "300"))
+TASK_QUEUE_SHUTDOWN_SECONDS = float(
+    os.getenv("TASK_QUEUE_SHUTDOWN_SECONDS", "10")
+)
 
 # Time Zone
 TIME_ZONE = os.getenv("TIME_ZONE", "UTC")
@@ -10,28 +10,90 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 from .constants import (
+    ADMIN_EXACT_COUNT_LIMIT,
+    ADMISSION_CONTROL_ENABLED,
+    ADMISSION_INITIAL_LIMIT,
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_MAX_QUEUE_MS,
     ALLOWED_HOSTS,
+    AVAILABILITY_ERROR_RATE,
+    AVAILABILITY_REBUILD_SECONDS,
+    AVAILABILITY_SYNC_SECONDS,
+    AVAILABILITY_THROTTLE_RATE,
+    COMPRESSION_MIN_SIZE,
     CORS_ALLOW_ALL_ORIGINS,
     CORS_ALLOW_CREDENTIALS,
     CORS_ALLOWED_ORIGINS,
+    CORS_PREFLIGHT_MAX_AGE,
+    DATABASE_URL,
     DEBUG,
+    EVENT_STREAM_EXPIRY_WARNING_SECONDS,
+    EVENT_STREAM_HEARTBEAT_SECONDS,
+    EVENT_STREAM_MAX_CONNECTIONS,
+    EVENT_STREAM_QUEUE_SIZE,
+    EVENT_STREAM_TICKET_SECONDS,
+    HEALTH_CHECK_CACHE_SECONDS,
+    IDEMPOTENCY_LOCK_SECONDS,
+    IDEMPOTENCY_STORE,
+    IDEMPOTENCY_TTL_SECONDS,
+    INTROSPECTION_MAX_BATCH,
+    JWKS_CACHE_SECONDS,
     JWT_ACCESS_TOKEN_LIFETIME,
+    JWT_ACTIVE_KID,
     JWT_ALGORITHM,
     JWT_BLACKLIST_AFTER_ROTATION,
+    JWT_KEYS_DIR,
+    JWT_REFRESH_GRACE_SECONDS,
     JWT_REFRESH_TOKEN_LIFETIME,
     JWT_ROTATE_REFRESH_TOKENS,
     LANGUAGE_CODE,
+    PASSWORD_ARGON2_MEMORY_COST,
+    PASSWORD_ARGON2_PARALLELISM,
+    PASSWORD_ARGON2_TIME_COST,
+    PASSWORD_HASHER_PROFILE,
+    PASSWORD_PBKDF2_ITERATIONS,
+    PERMISSIONS_VERSION_CACHE_SECONDS,
+    PROFILING_DIR,
+    PROFILING_MAX_REPORTS,
+    PROFILING_SAMPLE_RATE,
+    PROFILING_TOKEN_MAX_AGE,
+    QUERY_LOG_ENABLED,
+    QUERY_LOG_REPEAT_THRESHOLD,
+    QUERY_LOG_SLOW_MS,
+    QUERY_LOG_SUMMARY_SECONDS,
+    REDIS_URL,
     SECRET_KEY,
+    SERVICE_API_KEYS,
+    TASK_QUEUE_DURABLE,
+    TASK_QUEUE_EAGER,
+    TASK_QUEUE_LEASE_SECONDS,
+    TASK_QUEUE_MAX_RETRIES,
+    TASK_QUEUE_MAX_SIZE,
+    TASK_QUEUE_POLL_SECONDS,
+    TASK_QUEUE_RETRY_DELAY,
+    TASK_QUEUE_SHUTDOWN_SECONDS,
+    TASK_QUEUE_WORKERS,
     TIME_ZONE,
+    TOKEN_GENERATION_CACHE_SECONDS,
+    USER_SHARD_COUNT,
+    USER_SHARD_DATABASE_URLS,
+    WORKER_PROFILE,
 )
+from .databases import database_from_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -47,8 +109,16 @@ ALLOWED_HOSTS = ALLOWED_HOSTS
 
 # Application definition
 
+WORKER_PROFILE = WORKER_PROFILE
+
+if WORKER_PROFILE == "api":
+    from common.lazy import defer_admindocs
+
+    defer_admindocs()
+
 INSTALLED_APPS = [
-    "django.contrib.admin",
+    # API workers never import the admin (see backend/urls.py)
+    *([] if WORKER_PROFILE == "api" else ["django.contrib.admin"]),
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
@@ -59,18 +129,26 @@ INSTALLED_APPS = [
     "rest_framework_simplejwt.token_blacklist",
     "corsheaders",
     "drf_spectacular",
+    "common",
     "authentication",
 ]
 
 MIDDLEWARE = [
+    "common.middleware.cors.CorsPreflightMiddleware",
+    "common.middleware.health.HealthCheckMiddleware",
+    "common.middleware.querylog.QueryLogMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "common.middleware.compression.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    # Below corsheaders, so shed requests carry CORS headers
+    "common.middleware.admission.AdmissionControlMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "common.middleware.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "backend.urls"
@@ -97,12 +175,56 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+    "default": database_from_url(
+        DATABASE_URL or "sqlite:///db.sqlite3", BASE_DIR
+    )
 }
 
+# User shards, one per URL of USER_SHARD_DATABASE_URLS. Tests always get
+# SQLite shard files instead (three unless USER_SHARD_COUNT says
+# otherwise); sharding itself is only switched on by USER_SHARDS (tests
+# enable it with override_settings).
+if TESTING:
+    for index in range(USER_SHARD_COUNT or 3):
+        DATABASES[f"shard_{index}"] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / f"shard_{index}.sqlite3",
+            "TEST": {"NAME": BASE_DIR / f"test_shard_{index}.sqlite3"},
+        }
+elif len(USER_SHARD_DATABASE_URLS) != USER_SHARD_COUNT:
+    raise ImproperlyConfigured(
+        f"USER_SHARD_COUNT is {USER_SHARD_COUNT} but "
+        f"USER_SHARD_DATABASE_URLS lists {len(USER_SHARD_DATABASE_URLS)} "
+        "databases"
+    )
+else:
+    for index, url in enumerate(USER_SHARD_DATABASE_URLS):
+        DATABASES[f"shard_{index}"] = database_from_url(url, BASE_DIR)
+
+USER_SHARDS = [f"shard_{index}" for index in range(USER_SHARD_COUNT)]
+
+DATABASE_ROUTERS = ["authentication.sharding.UserShardRouter"]
+
+AUTHENTICATION_BACKENDS = ["authentication.backends.ShardedModelBackend"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -127,6 +249,39 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashers
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+
+PASSWORD_HASHER_PROFILE = PASSWORD_HASHER_PROFILE or (
+    "fast" if TESTING else "default"
+)
+
+PASSWORD_HASHER_STACKS = {
+    "default": [
+        "common.hashers.TunedPBKDF2PasswordHasher",
+        "common.hashers.TunedArgon2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "django.contrib.auth.hashers.ScryptPasswordHasher",
+    ],
+    "argon2": [
+        "common.hashers.TunedArgon2PasswordHasher",
+        "common.hashers.TunedPBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "django.contrib.auth.hashers.ScryptPasswordHasher",
+    ],
+    "fast": [
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ],
+}
+
+PASSWORD_HASHERS = PASSWORD_HASHER_STACKS[PASSWORD_HASHER_PROFILE]
+
+PASSWORD_PBKDF2_ITERATIONS = PASSWORD_PBKDF2_ITERATIONS
+PASSWORD_ARGON2_TIME_COST = PASSWORD_ARGON2_TIME_COST
+PASSWORD_ARGON2_MEMORY_COST = PASSWORD_ARGON2_MEMORY_COST
+PASSWORD_ARGON2_PARALLELISM = PASSWORD_ARGON2_PARALLELISM
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -152,7 +307,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "authentication.backends.ShardedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -160,17 +315,42 @@ REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
     ],
+    "DEFAULT_PARSER_CLASSES": [
+        "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_THROTTLE_RATES": {"availability": AVAILABILITY_THROTTLE_RATE},
 }
 
+# Binary alternatives to JSON, chosen by Accept / Content-Type when their
+# optional package is installed. JSON stays first, the default for clients
+# that ask for nothing in particular.
+for module, format_name in (("msgpack", "MessagePack"), ("cbor2", "CBOR")):
+    if find_spec(module) is not None:
+        REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append(
+            f"common.renderers.{format_name}Renderer"
+        )
+        REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"].append(
+            f"common.parsers.{format_name}Parser"
+        )
+
 # Simple JWT
+# RS256 and EdDSA tokens are signed by the key ring in
+# authentication.signing, which replaces simplejwt's backend at startup.
+JWT_ALGORITHM = JWT_ALGORITHM
+JWT_KEYS_DIR = JWT_KEYS_DIR
+JWT_ACTIVE_KID = JWT_ACTIVE_KID
+JWKS_CACHE_SECONDS = JWKS_CACHE_SECONDS
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=JWT_ACCESS_TOKEN_LIFETIME),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=JWT_REFRESH_TOKEN_LIFETIME),
     "ROTATE_REFRESH_TOKENS": JWT_ROTATE_REFRESH_TOKENS,
     "BLACKLIST_AFTER_ROTATION": JWT_BLACKLIST_AFTER_ROTATION,
     "UPDATE_LAST_LOGIN": False,
-    "ALGORITHM": JWT_ALGORITHM,
+    "ALGORITHM": JWT_ALGORITHM if JWT_ALGORITHM.startswith("HS") else "HS256",
     "SIGNING_KEY": SECRET_KEY,
     "VERIFYING_KEY": None,
     "AUDIENCE": None,
@@ -178,12 +358,116 @@ SIMPLE_JWT = {
     "JWK_URL": None,
     "LEEWAY": 0,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": "authentication.serializers."
+    "TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "authentication.serializers."
+    "DeduplicatedTokenRefreshSerializer",
 }
 
+JWT_REFRESH_GRACE_SECONDS = JWT_REFRESH_GRACE_SECONDS
+PERMISSIONS_VERSION_CACHE_SECONDS = PERMISSIONS_VERSION_CACHE_SECONDS
+TOKEN_GENERATION_CACHE_SECONDS = TOKEN_GENERATION_CACHE_SECONDS
+
+# Username/email availability
+AVAILABILITY_SYNC_SECONDS = AVAILABILITY_SYNC_SECONDS
+AVAILABILITY_REBUILD_SECONDS = AVAILABILITY_REBUILD_SECONDS
+AVAILABILITY_ERROR_RATE = AVAILABILITY_ERROR_RATE
+
+# Token introspection for internal services
+SERVICE_API_KEYS = SERVICE_API_KEYS
+INTROSPECTION_MAX_BATCH = INTROSPECTION_MAX_BATCH
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = CORS_ALLOW_ALL_ORIGINS
 CORS_ALLOWED_ORIGINS = CORS_ALLOWED_ORIGINS
 CORS_ALLOW_CREDENTIALS = CORS_ALLOW_CREDENTIALS
+CORS_PREFLIGHT_MAX_AGE = CORS_PREFLIGHT_MAX_AGE
+# Let browser clients back off as told by shed requests
+CORS_EXPOSE_HEADERS = ["Retry-After"]
+
+# Admin
+ADMIN_EXACT_COUNT_LIMIT = ADMIN_EXACT_COUNT_LIMIT
+
+# Admission control
+ADMISSION_CONTROL_ENABLED = ADMISSION_CONTROL_ENABLED
+ADMISSION_MAX_CONCURRENCY = ADMISSION_MAX_CONCURRENCY
+ADMISSION_INITIAL_LIMIT = ADMISSION_INITIAL_LIMIT
+ADMISSION_MAX_QUEUE_MS = ADMISSION_MAX_QUEUE_MS
+# Token refreshes and profile reads go first; new logins and registrations,
+# which mostly hash passwords, are the first to be refused.
+ADMISSION_PRIORITIES = {
+    "authentication:token_refresh": "high",
+    "authentication:profile": "high",
+    "authentication:logout": "high",
+    "authentication:login": "low",
+    "authentication:token_obtain_pair": "low",
+    "authentication:register": "low",
+}
+
+# Idempotency keys
+IDEMPOTENCY_STORE = IDEMPOTENCY_STORE
+IDEMPOTENCY_TTL_SECONDS = IDEMPOTENCY_TTL_SECONDS
+IDEMPOTENCY_LOCK_SECONDS = IDEMPOTENCY_LOCK_SECONDS
+
+# Event streams
+EVENT_STREAM_HEARTBEAT_SECONDS = EVENT_STREAM_HEARTBEAT_SECONDS
+EVENT_STREAM_QUEUE_SIZE = EVENT_STREAM_QUEUE_SIZE
+EVENT_STREAM_MAX_CONNECTIONS = EVENT_STREAM_MAX_CONNECTIONS
+EVENT_STREAM_EXPIRY_WARNING_SECONDS = EVENT_STREAM_EXPIRY_WARNING_SECONDS
+EVENT_STREAM_TICKET_SECONDS = EVENT_STREAM_TICKET_SECONDS
+
+# Health checks
+HEALTH_CHECK_CACHE_SECONDS = HEALTH_CHECK_CACHE_SECONDS
+
+# Response compression
+COMPRESSION_PATH_PREFIXES = ("/api/",)
+COMPRESSION_MIN_SIZE = COMPRESSION_MIN_SIZE
+
+# Query log
+# Off in tests to keep their output clean; tests of the log turn it on
+QUERY_LOG_ENABLED = QUERY_LOG_ENABLED and not TESTING
+QUERY_LOG_SLOW_MS = QUERY_LOG_SLOW_MS
+QUERY_LOG_REPEAT_THRESHOLD = QUERY_LOG_REPEAT_THRESHOLD
+QUERY_LOG_SUMMARY_SECONDS = QUERY_LOG_SUMMARY_SECONDS
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "message": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "querylog": {
+            "class": "logging.StreamHandler",
+            "formatter": "message",
+        },
+    },
+    "loggers": {
+        "querylog": {
+            "handlers": ["querylog"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+# Request profiling
+PROFILING_SAMPLE_RATE = PROFILING_SAMPLE_RATE
+PROFILING_DIR = PROFILING_DIR or BASE_DIR / "profiles"
+PROFILING_MAX_REPORTS = PROFILING_MAX_REPORTS
+PROFILING_TOKEN_MAX_AGE = PROFILING_TOKEN_MAX_AGE
+
+# Background tasks
+# Tests run tasks inline so their effects can be asserted right away
+TASK_QUEUE_WORKERS = TASK_QUEUE_WORKERS
+TASK_QUEUE_MAX_SIZE = TASK_QUEUE_MAX_SIZE
+TASK_QUEUE_DURABLE = TASK_QUEUE_DURABLE
+TASK_QUEUE_EAGER = TASK_QUEUE_EAGER or TESTING
+TASK_QUEUE_MAX_RETRIES = TASK_QUEUE_MAX_RETRIES
+TASK_QUEUE_RETRY_DELAY = TASK_QUEUE_RETRY_DELAY
+TASK_QUEUE_POLL_SECONDS = TASK_QUEUE_POLL_SECONDS
+TASK_QUEUE_LEASE_SECONDS = TASK_QUEUE_LEASE_SECONDS
+TASK_QUEUE_SHUTDOWN_SECONDS = TASK_QUEUE_SHUTDOWN_SECONDS
 
 # DRF Spectacular settings
 SPECTACULAR_SETTINGS = {
@@ -201,4 +485,6 @@ SPECTACULAR_SETTINGS = {
     "PREPROCESSING_HOOKS": [],
     "POSTPROCESSING_HOOKS": [],
     "SCHEMA_PATH_PREFIX": "/api",
+    # Applies common.schema annotations and loads the apps' openapi modules
+    "DEFAULT_GENERATOR_CLASS": "common.openapi.SchemaGenerator",
 }
@@ -15,27 +15,53 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from django.contrib import admin
+from django.conf import settings
 from django.urls import include, path
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+
+from authentication.views import JWKSView
+from common.lazy import LazyView, lazy_include
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
+    # Staff tools and API documentation are loaded on first use
     path("api/auth/", include("authentication.urls")),
+    path(".well-known/jwks.json", JWKSView.as_view(), name="jwks"),
+    path(
+        "api/profiles/",
+        LazyView("common.views.ProfilingReportListView"),
+        name="profiling-reports",
+    ),
+    path(
+        "api/profiles/<str:report_id>/",
+        LazyView("common.views.ProfilingReportDetailView"),
+        name="profiling-report",
+    ),
+    path(
+        "api/tasks/",
+        LazyView("common.views.TaskQueueStatsView"),
+        name="task-queue",
+    ),
     # API Documentation
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path(
+        "api/schema/",
+        LazyView("common.schema_views.PrecompressedSpectacularAPIView"),
+        name="schema",
+    ),
     path(
         "api/docs/",
-        SpectacularSwaggerView.as_view(url_name="schema"),
+        LazyView(
+            "drf_spectacular.views.SpectacularSwaggerView", url_name="schema"
+        ),
         name="swagger-ui",
     ),
     path(
         "api/redoc/",
-        SpectacularRedocView.as_view(url_name="schema"),
+        LazyView(
+            "drf_spectacular.views.SpectacularRedocView", url_name="schema"
+        ),
         name="redoc",
     ),
 ]
+
+if settings.WORKER_PROFILE != "api":
+    # The admin is loaded on first use, and not at all by API workers
+    urlpatterns.append(lazy_include("admin/", "backend.admin_urls", "admin"))
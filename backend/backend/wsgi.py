@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_wsgi_application()
+
+# Importing models needs the apps loaded by get_wsgi_application()
+from authentication.availability import prebuild_user_index  # noqa: E402
+
+prebuild_user_index()
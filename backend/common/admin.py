@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import BackgroundTask
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "enqueued_at", "run_at")
+    list_filter = ("status", "name")
+    readonly_fields = ("enqueued_at", "locked_until", "last_error")
+    actions = ("retry",)
+
+    @admin.action(description="Retry selected tasks now")
+    def retry(self, request, queryset):
+        queryset.filter(status=BackgroundTask.FAILED).update(
+            status=BackgroundTask.PENDING,
+            attempts=0,
+            run_at=timezone.now(),
+        )
@@ -0,0 +1,144 @@
+"""
+Adaptive admission control.
+
+Each endpoint gets a concurrency limit that follows its latency, in the
+manner of TCP Vegas / Netflix's gradient limiter: a long-term average of
+the endpoint's latency stands for how fast it is when healthy, and the
+limit shrinks in proportion when recent requests get slower than that and
+grows again (by about its square root) while they stay fast. Requests over
+the limit are refused at once rather than queued.
+
+Priorities share the worker's capacity unequally: low priority requests
+(new logins and registrations, which spend most of their time hashing
+passwords) may fill only part of it, keeping room for token refreshes and
+profile reads when logins spike.
+"""
+
+import math
+import threading
+import time
+
+# Share of ADMISSION_MAX_CONCURRENCY each priority may fill, and how many
+# ADMISSION_MAX_QUEUE_MS it may have waited in the server's backlog.
+PRIORITIES = {
+    "high": (1.0, 4.0),
+    "normal": (0.8, 2.0),
+    "low": (0.5, 1.0),
+}
+
+# Weights of the latest sample in the short and long latency averages
+SHORT_WEIGHT = 0.1
+LONG_WEIGHT = 0.002
+# Limits move this fraction of the way to their new value per sample
+SMOOTHING = 0.2
+# Recent latency may reach this multiple of the long-term average before
+# the limit shrinks
+TOLERANCE = 1.5
+
+
+class GradientLimit:
+    """Concurrency limit of one endpoint, adjusted after each request"""
+
+    def __init__(self, initial, maximum, minimum=1):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.short_ms = None
+        self.long_ms = None
+
+    @property
+    def current(self):
+        return max(self.minimum, int(self.limit))
+
+    def record(self, latency_ms, in_flight):
+        if self.short_ms is None:
+            self.short_ms = self.long_ms = latency_ms
+            return
+        self.short_ms += SHORT_WEIGHT * (latency_ms - self.short_ms)
+        self.long_ms += LONG_WEIGHT * (latency_ms - self.long_ms)
+        # Recent latency far below the long-term average means the slowdown
+        # is over: let the average catch up so the limit can grow back
+        if self.long_ms / self.short_ms > 2:
+            self.long_ms *= 0.95
+
+        if in_flight < self.limit / 2:
+            return  # not busy enough to learn anything about the limit
+        gradient = max(
+            0.5, min(1.0, TOLERANCE * self.long_ms / max(self.short_ms, 1e-3))
+        )
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit * (1 - SMOOTHING) + target * SMOOTHING
+        self.limit = max(self.minimum, min(self.maximum, limit))
+
+
+class AdmissionController:
+    """Per-process admission decisions for every endpoint"""
+
+    def __init__(self, capacity, initial_limit, max_queue_ms):
+        self.capacity = capacity
+        self.initial_limit = min(initial_limit, capacity)
+        self.max_queue_ms = max_queue_ms
+        self.in_flight = 0
+        self.limits = {}
+        self.counts = {"admitted": 0, "shed": 0, "expired": 0}
+        self._lock = threading.Lock()
+
+    def acquire(self, endpoint, priority, queued_ms=None):
+        """Return a ticket to release when the request finishes, or None
+        when it must be refused"""
+        share, queue_factor = PRIORITIES[priority]
+        if (
+            queued_ms is not None
+            and queued_ms > self.max_queue_ms * queue_factor
+        ):
+            # The client has probably given up already
+            with self._lock:
+                self.counts["expired"] += 1
+            return None
+        with self._lock:
+            limit = self.limits.get(endpoint)
+            if limit is None:
+                limit = self.limits[endpoint] = GradientLimit(
+                    self.initial_limit, self.capacity
+                )
+            if limit.in_flight >= limit.current or self.in_flight >= max(
+                1, int(self.capacity * share)
+            ):
+                self.counts["shed"] += 1
+                return None
+            limit.in_flight += 1
+            self.in_flight += 1
+            self.counts["admitted"] += 1
+        return limit, time.perf_counter()
+
+    def release(self, ticket):
+        limit, started = ticket
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            limit.record(latency_ms, limit.in_flight)
+            limit.in_flight -= 1
+            self.in_flight -= 1
+
+    def retry_after(self, endpoint):
+        """Seconds a refused client should wait: about the time the
+        endpoint needs to serve what is in flight"""
+        limit = self.limits.get(endpoint)
+        if limit is None or limit.short_ms is None:
+            return 1
+        return max(1, math.ceil(limit.short_ms * limit.in_flight / 1000))
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.counts,
+                "in_flight": self.in_flight,
+                "endpoints": {
+                    endpoint: {
+                        "limit": limit.current,
+                        "in_flight": limit.in_flight,
+                        "latency_ms": limit.short_ms,
+                    }
+                    for endpoint, limit in self.limits.items()
+                },
+            }
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class CommonConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "common"
+
+    def ready(self):
+        from django.core.signals import request_finished, request_started
+        from django.utils.module_loading import autodiscover_modules
+
+        from .tasks import hold_tasks_for_request, release_request_tasks
+
+        request_started.connect(hold_tasks_for_request)
+        request_finished.connect(release_request_tasks)
+        autodiscover_modules("tasks")
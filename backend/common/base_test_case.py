@@ -1,27 +1,47 @@
-from django.contrib.auth.models import User
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
 from rest_framework.test import APIClient
-from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.tokens import RefreshToken
+
+from .fixtures import DEFAULT_TEST_PASSWORD, UserFactory
+from .querylog import QueryCollector
 
 
 class BaseTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.setup_class_data()
+
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.setup_test_data()
 
+    @classmethod
+    def setup_class_data(cls):
+        """Override this method in child classes to create data once per
+        class; each test sees its own copy and changes are rolled back"""
+        pass
+
     def setup_test_data(self):
         """Override this method in child classes to set up specific test data"""
         pass
 
+    @classmethod
     def create_test_user(
-        self,
+        cls,
         username="testuser",
         email="test@example.com",
-        password="testpass123",
+        password=DEFAULT_TEST_PASSWORD,
+        **extra,
     ):
         """Create a test user"""
-        return User.objects.create_user(
-            username=username, email=email, password=password
+        return UserFactory.create(
+            username=username, email=email, password=password, **extra
         )
 
     def get_jwt_tokens(self, user):
@@ -46,3 +66,19 @@ class BaseTestCase(TestCase):
     def assert_response_error(self, response):
         """Assert response is an error (4xx or 5xx)"""
         self.assertTrue(response.status_code >= 400)
+
+    @contextmanager
+    def assert_no_repeated_queries(self, threshold=2):
+        """Fail if any SQL statement runs threshold or more times inside the
+        block (an N+1 pattern or a redundant lookup)"""
+        collector = QueryCollector(float("inf"), threshold)
+        with connection.execute_wrapper(collector):
+            yield collector
+        repeated = [
+            f"{collector.counts[sql]}x {sql}" for sql in collector.repeated
+        ]
+        if repeated:
+            self.fail("Repeated queries:\n" + "\n".join(repeated))
+
+    assertResponseSuccess = assert_response_success  # noqa: N815
+    assertResponseError = assert_response_error  # noqa: N815
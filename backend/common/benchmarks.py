@@ -0,0 +1,139 @@
+"""
+Micro-benchmarks of the building blocks behind the API.
+
+A benchmark is registered in an app's ``benchmarks`` module. The decorated
+function sets up its fixtures and returns the operation to time::
+
+    @benchmark("serializers.user")
+    def user_serializer():
+        user = User(username="bench")
+        return lambda: UserSerializer(user).data
+
+``manage.py benchmark`` times each operation in several rounds, each long
+enough for the clock to be precise, and keeps the median and quartiles of
+the per-operation time. A fixed pure-Python workload is timed the same way;
+comparisons use times relative to it, which cancels out most of the
+difference between a laptop and a CI runner.
+
+A result regressed when its relative median is more than ``threshold``
+above the baseline's *and* its interquartile range lies wholly above the
+baseline's, so a noisy round cannot flag a regression on its own.
+"""
+
+import gc
+import statistics
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.test.utils import get_runner
+
+_registry = {}
+
+
+def benchmark(name):
+    def register(setup):
+        if name in _registry:
+            raise ValueError(f"Benchmark {name} is already registered")
+        _registry[name] = setup
+        return setup
+
+    return register
+
+
+def get_benchmarks():
+    return dict(sorted(_registry.items()))
+
+
+def calibration_workload():
+    """Fixed CPU-bound work whose time stands for the machine's speed"""
+    return sorted(str(i * 7919 % 10007) for i in range(1000))
+
+
+def time_rounds(operation, number, rounds):
+    """Seconds per call of ``operation`` in each of ``rounds`` rounds"""
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(number):
+                operation()
+            timings.append((time.perf_counter() - started) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return timings
+
+
+def measure(operation, rounds=15, min_round_seconds=0.02):
+    """Warm up, pick the calls per round, then time the rounds"""
+    operation()
+    number = 1
+    while True:
+        (per_call,) = time_rounds(operation, number, 1)
+        if per_call * number >= min_round_seconds:
+            break
+        number = max(number * 2, int(min_round_seconds / max(per_call, 1e-9)))
+    timings = time_rounds(operation, number, rounds)
+    q1, median, q3 = statistics.quantiles(timings, n=4, method="inclusive")
+    return {
+        "median": median,
+        "q1": q1,
+        "q3": q3,
+        "min": min(timings),
+        "rounds": rounds,
+        "number": number,
+    }
+
+
+def compare(baseline, current, threshold):
+    """[(name, status, change)] for each benchmark in either run, where
+    status is "regressed", "improved", "unchanged", "new" or "missing" and
+    change is the relative median's ratio to the baseline's"""
+    base_unit = baseline.get("calibration", {}).get("median")
+    unit = current.get("calibration", {}).get("median")
+    if not base_unit or not unit:
+        base_unit = unit = 1.0
+
+    rows = []
+    names = sorted(baseline["results"].keys() | current["results"].keys())
+    for name in names:
+        old = baseline["results"].get(name)
+        new = current["results"].get(name)
+        if old is None or new is None:
+            rows.append((name, "new" if old is None else "missing", None))
+            continue
+        change = (new["median"] / unit) / (old["median"] / base_unit)
+        if change > 1 + threshold and new["q1"] / unit > old["q3"] / base_unit:
+            status = "regressed"
+        elif (
+            change < 1 - threshold and new["q3"] / unit < old["q1"] / base_unit
+        ):
+            status = "improved"
+        else:
+            status = "unchanged"
+        rows.append((name, status, change))
+    return rows
+
+
+def isolated_databases():
+    """Run against freshly migrated test databases, dropped afterwards.
+    The test runner has already set them up when running tests."""
+    stack = ExitStack()
+    if not settings.TESTING:
+        runner = get_runner(settings)(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        stack.callback(runner.teardown_databases, old_config)
+    return stack
+
+
+def rolled_back():
+    """Undo what a benchmark wrote, so each starts from the same state"""
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(transaction.atomic(using=alias))
+        stack.callback(transaction.set_rollback, True, using=alias)
+    return stack
@@ -0,0 +1,218 @@
+"""
+Admin changelists for tables too large to count or page through by offset.
+
+``LargeTableAdminMixin`` makes a ModelAdmin:
+
+- count unfiltered lists from the database's row estimate, and filtered
+  ones only up to ADMIN_EXACT_COUNT_LIMIT rows;
+- page with ``?after=`` / ``?before=`` cursors on the first ordering field
+  when it is unique, so every page is an index range scan instead of an
+  OFFSET over the rows before it;
+- load only the columns the list displays (or ``list_only``).
+"""
+
+from django.conf import settings
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+AFTER_VAR = "after"
+BEFORE_VAR = "before"
+CURSOR_VARS = (AFTER_VAR, BEFORE_VAR)
+
+
+def estimate_row_count(model, using):
+    """Row count of the model's table from database statistics, or None
+    when the database keeps none"""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # -1 until the table was first vacuumed or analyzed
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class "
+                "WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(table)],
+            )
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif (
+            connection.vendor == "sqlite"
+            and model._meta.pk.get_internal_type()
+            in ("AutoField", "BigAutoField")
+        ):
+            # No statistics; the highest id is one index seek away and
+            # overcounts only by the deleted rows
+            return model._base_manager.using(using).aggregate(top=Max("pk"))[
+                "top"
+            ]
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that never counts more than ADMIN_EXACT_COUNT_LIMIT rows.
+
+    ``estimated`` is set when ``count`` comes from table statistics and
+    ``truncated`` when counting stopped past the limit.
+    """
+
+    estimated = truncated = False
+
+    @property
+    def limit(self):
+        return settings.ADMIN_EXACT_COUNT_LIMIT
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.limit:
+                self.estimated = True
+                return estimate
+        count = queryset.order_by()[: self.limit + 1].count()
+        self.truncated = count > self.limit
+        return count
+
+
+class CursorChangeList(ChangeList):
+    """ChangeList that pages by cursor on a unique ordering field"""
+
+    def __init__(self, request, *args, **kwargs):
+        self.after = request.GET.get(AFTER_VAR)
+        self.before = request.GET.get(BEFORE_VAR)
+        self.next_url = self.previous_url = None
+        super().__init__(request, *args, **kwargs)
+        # Keep cursors out of the search form's hidden fields
+        for var in CURSOR_VARS:
+            self.params.pop(var, None)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        for var in CURSOR_VARS:
+            lookup_params.pop(var, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Sorting, filtering and facet links start again from the first page
+        return super().get_query_string(
+            new_params, [*(remove or ()), *CURSOR_VARS]
+        )
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        fields = self.model_admin.get_list_only(request, self.list_display)
+        if not fields:
+            return queryset
+        cursor_field = self.get_cursor_field(queryset)
+        if cursor_field is not None:
+            fields = [*fields, cursor_field[0].name]
+        return queryset.only(*fields)
+
+    @cached_property
+    def cursor_field(self):
+        return self.get_cursor_field(self.queryset)
+
+    def get_cursor_field(self, queryset):
+        """The (field, descending) pair pages are keyed on, or None when the
+        ordering does not start with a unique field"""
+        if self.list_editable or not queryset.query.order_by:
+            return None
+        first = queryset.query.order_by[0]
+        if not isinstance(first, str):
+            return None
+        name = first.lstrip("-")
+        try:
+            field = self.lookup_opts.get_field(
+                self.lookup_opts.pk.name if name == "pk" else name
+            )
+        except FieldDoesNotExist:
+            return None
+        if not field.unique:
+            return None
+        return field, first.startswith("-")
+
+    def get_results(self, request):
+        super().get_results(request)
+        if self.cursor_field is None or (self.show_all and self.can_show_all):
+            return
+        field, descending = self.cursor_field
+        per_page = self.list_per_page
+        queryset = self.queryset
+        backwards = self.before is not None and self.after is None
+        cursor = self.before if backwards else self.after
+        if cursor is not None:
+            lookup = "lt" if descending != backwards else "gt"
+            try:
+                queryset = queryset.filter(
+                    **{f"{field.name}__{lookup}": field.to_python(cursor)}
+                )
+            except ValidationError:
+                cursor = None
+                queryset = self.queryset
+        if backwards and cursor is not None:
+            rows = list(queryset.reverse()[: per_page + 1])
+            more = len(rows) > per_page
+            rows = rows[:per_page][::-1]
+            has_previous, has_next = more, True
+        else:
+            rows = list(queryset[: per_page + 1])
+            more = len(rows) > per_page
+            rows = rows[:per_page]
+            has_previous, has_next = cursor is not None, more
+
+        self.result_list = rows
+        self.multi_page = has_previous or has_next
+        if rows and has_next:
+            self.next_url = self.get_query_string(
+                {AFTER_VAR: field.value_to_string(rows[-1])}
+            )
+        if rows and has_previous:
+            self.previous_url = self.get_query_string(
+                {BEFORE_VAR: field.value_to_string(rows[0])}
+            )
+
+
+class LargeTableAdminMixin:
+    """ModelAdmin mixin for tables with millions of rows.
+
+    ``list_only`` names the columns loaded for the list; by default they are
+    the model fields in ``list_display``, or every column when it shows
+    anything else.
+    """
+
+    change_list_template = "admin/cursor_change_list.html"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_only = None
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+    def get_list_only(self, request, list_display):
+        if self.list_only is not None:
+            return self.list_only
+        fields = []
+        for name in list_display:
+            if name == "action_checkbox":
+                continue
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete:
+                return None
+            fields.append(name)
+        return fields
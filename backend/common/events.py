@@ -0,0 +1,208 @@
+"""
+In-process publish/subscribe for server-sent events.
+
+Subscribers are coroutines (one per open event stream) waiting on a
+bounded asyncio queue; publishers may be any thread. ``publish`` never
+blocks: a subscriber whose queue is full is dropped instead, and its stream
+tells the client to reconnect and fetch fresh state. An idle subscriber
+costs one queue and one suspended coroutine.
+
+Without REDIS_URL only streams served by the publishing process hear an
+event. With it, events are published to a Redis pub/sub channel instead,
+and a thread in every process that has subscribers listens on it and
+hands each event to its local subscribers. Events published while that
+thread is disconnected from Redis are lost, so its subscribers are told
+to resync when it reconnects.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+REDIS_CHANNEL = "events"
+RECONNECT_SECONDS = 1
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, broker, channel, loop, max_queue):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(max_queue)
+        self.overflowed = False
+        self.closed = asyncio.Event()
+
+    def deliver(self, message):
+        """Queue a message; runs on the subscriber's event loop"""
+        if self.closed.is_set():
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflow()
+
+    def overflow(self):
+        """Close the subscription, telling the stream to resync"""
+        self.overflowed = True
+        self.close()
+
+    async def get(self, timeout):
+        """Next (id, event, data) message, or None after ``timeout``
+        seconds or once the subscription is closed"""
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        getter = asyncio.ensure_future(self.queue.get())
+        closed = asyncio.ensure_future(self.closed.wait())
+        done, pending = await asyncio.wait(
+            (getter, closed),
+            timeout=timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        for future in pending:
+            future.cancel()
+        return getter.result() if getter in done else None
+
+    def close(self):
+        self.closed.set()
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    def __init__(self):
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, channel, max_queue):
+        """Subscribe the running event loop to a channel"""
+        subscription = Subscription(
+            self, channel, asyncio.get_running_loop(), max_queue
+        )
+        with self._lock:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._channels.values())
+
+    def publish(self, channel, event, data):
+        """Send an event to every subscriber of the channel; returns how
+        many there were"""
+        return self.dispatch(channel, event, json.dumps(data, cls=JSONEncoder))
+
+    def dispatch(self, channel, event, data):
+        """Hand an event with JSON ``data`` to the local subscribers"""
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        if not subscribers:
+            return 0
+        message = (next(self._ids), event, data)
+        for subscription in subscribers:
+            self.call_soon(subscription, subscription.deliver, message)
+        return len(subscribers)
+
+    def resync_all(self):
+        """Tell every local subscriber to resync"""
+        with self._lock:
+            subscribers = [s for subs in self._channels.values() for s in subs]
+        for subscription in subscribers:
+            self.call_soon(subscription, subscription.overflow)
+
+    def call_soon(self, subscription, callback, *args):
+        try:
+            subscription.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:  # its event loop has been closed
+            self.unsubscribe(subscription)
+
+
+class RedisEventBroker(EventBroker):
+    """
+    Broker publishing through Redis, so that streams served by every
+    process hear an event. The listener thread starts with the first
+    subscription of the process.
+    """
+
+    def __init__(self, client, redis_channel=REDIS_CHANNEL):
+        super().__init__()
+        self.client = client
+        self.redis_channel = redis_channel
+        self._listener = None
+
+    def subscribe(self, channel, max_queue):
+        subscription = super().subscribe(channel, max_queue)
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self.listen, name="event-broker", daemon=True
+                )
+                self._listener.start()
+        return subscription
+
+    def publish(self, channel, event, data):
+        """Send an event to the subscribers of every process; returns how
+        many processes listen"""
+        message = json.dumps([channel, event, data], cls=JSONEncoder)
+        return self.client.publish(self.redis_channel, message)
+
+    def listen(self):
+        connected_before = False
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.redis_channel)
+                if connected_before:
+                    self.resync_all()
+                connected_before = True
+                for message in pubsub.listen():
+                    channel, event, data = json.loads(message["data"])
+                    self.dispatch(channel, event, json.dumps(data))
+            except Exception:
+                logger.exception("Event broker lost its Redis connection")
+                time.sleep(RECONNECT_SECONDS)
+
+
+def make_broker():
+    if not settings.REDIS_URL:
+        return EventBroker()
+    if redis is None:
+        raise ImproperlyConfigured(
+            "REDIS_URL needs the redis package (the redis extra)"
+        )
+    return RedisEventBroker(redis.Redis.from_url(settings.REDIS_URL))
+
+
+broker = SimpleLazyObject(make_broker)
+
+
+def publish_on_commit(channel, event, data, using=None):
+    """Publish once the current transaction commits (at once outside one),
+    so subscribers never hear of changes that were rolled back"""
+    transaction.on_commit(
+        lambda: broker.publish(channel, event, data), using=using
+    )
@@ -0,0 +1,70 @@
+"""
+Fixture factories for tests.
+
+Hashing a password is by far the most expensive part of creating a user, so
+the factories hash each known test password once per hasher and reuse the
+encoded value for every user that shares it.
+"""
+
+import itertools
+
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.contrib.auth.models import User
+
+DEFAULT_TEST_PASSWORD = "testpass123"
+
+_password_hashes = {}
+
+
+def cached_password_hash(raw_password):
+    """Return an encoded hash of raw_password, hashing at most once per
+    hasher configuration"""
+    hasher = get_hasher()
+    key = (hasher.algorithm, raw_password)
+    encoded = _password_hashes.get(key)
+    if encoded is None or hasher.must_update(encoded):
+        encoded = make_password(raw_password, hasher=hasher)
+        _password_hashes[key] = encoded
+    return encoded
+
+
+def clear_password_hash_cache():
+    """Forget every cached hash (e.g. after swapping PASSWORD_HASHERS)"""
+    _password_hashes.clear()
+
+
+class UserFactory:
+    """Create users with precomputed password hashes"""
+
+    _sequence = itertools.count(1)
+
+    @classmethod
+    def build(cls, username=None, email=None, password=None, **extra):
+        """Return an unsaved user"""
+        if username is None:
+            username = f"user{next(cls._sequence)}"
+        if email is None:
+            email = f"{username}@example.com"
+        if password is None:
+            password = DEFAULT_TEST_PASSWORD
+        return User(
+            username=User.normalize_username(username),
+            email=User.objects.normalize_email(email),
+            password=cached_password_hash(password),
+            **extra,
+        )
+
+    @classmethod
+    def create(cls, username=None, email=None, password=None, **extra):
+        """Create a user in the database"""
+        user = cls.build(
+            username=username, email=email, password=password, **extra
+        )
+        user.save()
+        return user
+
+    @classmethod
+    def create_batch(cls, size, password=None, **extra):
+        """Create size users with a single INSERT"""
+        users = [cls.build(password=password, **extra) for _ in range(size)]
+        return User.objects.bulk_create(users)
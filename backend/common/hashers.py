@@ -0,0 +1,100 @@
+"""
+Password hashers whose cost parameters come from settings.
+
+Django compares a stored hash against the preferred hasher on every
+successful ``check_password`` call and re-encodes it when the parameters
+differ, so changing these settings upgrades hashes transparently at login.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    get_hasher,
+    identify_hasher,
+)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 using ``PASSWORD_PBKDF2_ITERATIONS``"""
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings,
+            "PASSWORD_PBKDF2_ITERATIONS",
+            PBKDF2PasswordHasher.iterations,
+        )
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id using the ``PASSWORD_ARGON2_*`` settings"""
+
+    @property
+    def time_cost(self):
+        return getattr(
+            settings,
+            "PASSWORD_ARGON2_TIME_COST",
+            Argon2PasswordHasher.time_cost,
+        )
+
+    @property
+    def memory_cost(self):
+        return getattr(
+            settings,
+            "PASSWORD_ARGON2_MEMORY_COST",
+            Argon2PasswordHasher.memory_cost,
+        )
+
+    @property
+    def parallelism(self):
+        return getattr(
+            settings,
+            "PASSWORD_ARGON2_PARALLELISM",
+            Argon2PasswordHasher.parallelism,
+        )
+
+
+COST_ATTRIBUTES = (
+    "iterations",
+    "time_cost",
+    "memory_cost",
+    "parallelism",
+    "work_factor",
+    "block_size",
+    "rounds",
+)
+
+_password_prefixes = {}
+
+
+def current_password_prefix():
+    """Return the encoded-hash prefix (algorithm and cost parameters) that
+    the preferred hasher produces today"""
+    hasher = get_hasher()
+    key = (
+        type(hasher),
+        *(getattr(hasher, name, None) for name in COST_ATTRIBUTES),
+    )
+    prefix = _password_prefixes.get(key)
+    if prefix is None:
+        encoded = hasher.encode("probe", hasher.salt())
+        salt = hasher.decode(encoded)["salt"]
+        prefix = _password_prefixes[key] = encoded.split(salt, 1)[0]
+    return prefix
+
+
+def password_scheme(encoded):
+    """Describe the algorithm and cost parameters of an encoded password,
+    e.g. ``pbkdf2_sha256 iterations=1000000``"""
+    if not encoded or encoded.startswith("!"):
+        return "unusable"
+    try:
+        hasher = identify_hasher(encoded)
+        decoded = hasher.decode(encoded)
+    except ValueError:
+        return "unknown"
+    params = " ".join(
+        f"{name}={decoded[name]}" for name in COST_ATTRIBUTES if name in decoded
+    )
+    return f"{hasher.algorithm} {params}".strip()
@@ -0,0 +1,94 @@
+"""
+Readiness checks with per-process result caching.
+
+Each check runs at most once per HEALTH_CHECK_CACHE_SECONDS no matter how
+often the orchestrator probes, so probe traffic does not turn into database
+load as replicas scale out.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from rest_framework_simplejwt import state
+
+
+def databases_in_use():
+    """The default database and the user shards, if any"""
+    return [DEFAULT_DB_ALIAS, *settings.USER_SHARDS]
+
+
+def check_database():
+    """Run a trivial query on every database in use"""
+    for alias in databases_in_use():
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+
+def check_migrations():
+    """Fail while any migration is unapplied on a database in use"""
+    pending = []
+    for alias in databases_in_use():
+        executor = MigrationExecutor(connections[alias])
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        pending += [f"{alias}:{m.app_label}.{m.name}" for m, _ in plan]
+    if pending:
+        raise RuntimeError(f"Unapplied migrations: {', '.join(pending)}")
+
+
+def check_signing_key():
+    """Sign and verify a probe token with the configured JWT keys"""
+    if not settings.SIMPLE_JWT.get("SIGNING_KEY"):
+        raise RuntimeError("SIMPLE_JWT SIGNING_KEY is not configured")
+    token = state.token_backend.encode({"probe": True})
+    if state.token_backend.decode(token).get("probe") is not True:
+        raise RuntimeError("Signed probe token did not verify")
+
+
+class ReadinessChecker:
+    """Run named checks and cache each result for ``ttl`` seconds.
+
+    A passing check listed in ``sticky`` is never re-run: applied
+    migrations do not become unapplied while the process is alive.
+    """
+
+    def __init__(self, checks, ttl, sticky=()):
+        self.checks = checks
+        self.ttl = ttl
+        self.sticky = set(sticky)
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Return (ready, {name: result})"""
+        results = {}
+        with self._lock:
+            for name, check in self.checks.items():
+                results[name] = self._result(name, check)
+        return all(r["ok"] for r in results.values()), results
+
+    def reset(self):
+        with self._lock:
+            self._results.clear()
+
+    def _result(self, name, check):
+        now = time.monotonic()
+        cached = self._results.get(name)
+        if cached is not None:
+            checked_at, result = cached
+            if (result["ok"] and name in self.sticky) or (
+                now - checked_at < self.ttl
+            ):
+                return {**result, "cached": True}
+
+        started = time.perf_counter()
+        try:
+            check()
+            result = {"ok": True}
+        except Exception as exc:
+            result = {"ok": False, "error": str(exc)}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        self._results[name] = (now, result)
+        return {**result, "cached": False}
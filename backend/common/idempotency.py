@@ -0,0 +1,237 @@
+"""
+Idempotency-Key support for unsafe API requests.
+
+A client retrying a request sends the same ``Idempotency-Key`` header. The
+first request with a key runs the view; its response is stored under the
+key and the caller's identity (user, or client IP when anonymous) for
+IDEMPOTENCY_TTL_SECONDS, and retries get it back, marked with
+``Idempotent-Replayed: true``, without running the view again. A retry
+arriving while the first request is still running gets a 409 with
+Retry-After at once rather than holding a worker while it waits. Reusing
+a key for a different request body is a 422. Anonymous callers are told
+apart by common.throttling.client_ip, which they cannot spoof.
+
+Credentials are never stored: a view names the response fields holding
+them with ``withhold``, and ``restore`` issues fresh ones when a stored
+success is replayed.
+
+Server errors are not stored, so they can be retried. A request whose
+worker died holds its key for IDEMPOTENCY_LOCK_SECONDS.
+
+IDEMPOTENCY_STORE picks where keys live: "cache" (the Django cache; shared
+between workers only with REDIS_URL) or "database".
+"""
+
+import functools
+import hashlib
+import itertools
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyRecord
+from .throttling import client_ip
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+IN_PROGRESS_RETRY_AFTER = 1  # seconds
+# Responses that say nothing final about the request
+NOT_STORED = {status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS}
+
+
+def idempotency_key_parameter():
+    """The header in the API schema (see common.schema)"""
+    from drf_spectacular.types import OpenApiTypes
+    from drf_spectacular.utils import OpenApiParameter
+
+    return OpenApiParameter(
+        HEADER,
+        OpenApiTypes.STR,
+        OpenApiParameter.HEADER,
+        description="Unique key of this request; retries with the same key "
+        "get the first response back instead of repeating it.",
+    )
+
+
+class CacheIdempotencyStore:
+    """Records as dicts in the Django cache"""
+
+    def cache_key(self, key):
+        return f"idempotency:{key}"
+
+    def claim(self, key, fingerprint):
+        """Take the key and return None, or return the record of the
+        request that has it"""
+        record = {"fingerprint": fingerprint, "status_code": None}
+        while True:
+            if cache.add(
+                self.cache_key(key), record, settings.IDEMPOTENCY_LOCK_SECONDS
+            ):
+                return None
+            existing = cache.get(self.cache_key(key))
+            if existing is not None:
+                return existing
+
+    def complete(self, key, fingerprint, status_code, data):
+        cache.set(
+            self.cache_key(key),
+            {
+                "fingerprint": fingerprint,
+                "status_code": status_code,
+                "data": data,
+            },
+            settings.IDEMPOTENCY_TTL_SECONDS,
+        )
+
+    def release(self, key):
+        cache.delete(self.cache_key(key))
+
+
+class DatabaseIdempotencyStore:
+    """Records as IdempotencyRecord rows; expired rows are taken over, and
+    deleted in bulk every PURGE_EVERY claims"""
+
+    PURGE_EVERY = 100
+
+    def __init__(self):
+        self._claims = itertools.count(1)
+
+    def claim(self, key, fingerprint):
+        now = timezone.now()
+        records = IdempotencyRecord.objects
+        if next(self._claims) % self.PURGE_EVERY == 0:
+            records.filter(expires_at__lt=now).delete()
+        values = {
+            "fingerprint": fingerprint,
+            "status_code": None,
+            "data": None,
+            "expires_at": now
+            + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+        }
+        try:
+            with transaction.atomic():
+                records.create(key=key, **values)
+            return None
+        except IntegrityError:
+            pass
+        if records.filter(key=key, expires_at__lt=now).update(**values):
+            return None
+        record = records.filter(key=key).values().first()
+        if record is None:  # released meanwhile
+            return self.claim(key, fingerprint)
+        return record
+
+    def complete(self, key, fingerprint, status_code, data):
+        IdempotencyRecord.objects.filter(key=key).update(
+            status_code=status_code,
+            data=data,
+            expires_at=timezone.now()
+            + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        )
+
+    def release(self, key):
+        IdempotencyRecord.objects.filter(key=key).delete()
+
+
+STORES = {
+    "cache": CacheIdempotencyStore,
+    "database": DatabaseIdempotencyStore,
+}
+_stores = {}
+
+
+def get_store():
+    name = settings.IDEMPOTENCY_STORE
+    if name not in _stores:
+        _stores[name] = STORES[name]()
+    return _stores[name]
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256()
+    for part in (request.method, request.path, request.body):
+        digest.update(part if isinstance(part, bytes) else part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def scoped_key(request, key):
+    if request.user.is_authenticated:
+        owner = f"user:{request.user.pk}"
+    else:
+        owner = f"ip:{client_ip(request)}"
+    return hashlib.sha256(f"{owner}\0{key}".encode()).hexdigest()
+
+
+def replay(record, request, restore):
+    data = record["data"]
+    if restore is not None and status.is_success(record["status_code"]):
+        data = restore(request, data)
+    response = Response(data, status=record["status_code"])
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(handler=None, *, withhold=(), restore=None):
+    """Honour Idempotency-Key on an APIView handler method. It runs after
+    authentication, so keys of signed-in users are theirs alone.
+
+    The top-level response fields in ``withhold`` are left out of the
+    stored response; ``restore(request, data)`` returns the data of a
+    replayed success with them filled in again."""
+    if handler is None:
+        return functools.partial(idempotent, withhold=withhold, restore=restore)
+
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        store = get_store()
+        key = scoped_key(request, key)
+        fingerprint = request_fingerprint(request)
+        record = store.claim(key, fingerprint)
+        if record is not None:
+            if record["fingerprint"] != fingerprint:
+                return Response(
+                    {"error": f"{HEADER} was used for a different request"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if record["status_code"] is not None:
+                return replay(record, request, restore)
+            response = Response(
+                {"error": "A request with this key is still in progress"},
+                status=status.HTTP_409_CONFLICT,
+            )
+            response["Retry-After"] = str(IN_PROGRESS_RETRY_AFTER)
+            return response
+
+        try:
+            response = handler(view, request, *args, **kwargs)
+        except BaseException:
+            store.release(key)
+            raise
+        if response.status_code >= 500 or response.status_code in NOT_STORED:
+            store.release(key)
+        else:
+            # What the JSON renderer would make of it, for any store
+            data = json.loads(json.dumps(response.data, cls=JSONEncoder))
+            for field in withhold:
+                data.pop(field, None)
+            store.complete(key, fingerprint, response.status_code, data)
+        return response
+
+    return wrapper
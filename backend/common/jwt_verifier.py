@@ -0,0 +1,140 @@
+"""
+Local verification of this service's access tokens for other Python
+services.
+
+Only PyJWT (with cryptography) is needed; Django is not. The JWK set is
+fetched once and kept in memory, so verifying a token makes no network
+call. It is fetched again when a token names an unknown kid (a key was
+rotated in), at most once per ``min_refresh_interval``, and when it is
+older than ``max_age`` (so removed keys stop verifying)::
+
+    verifier = JWKSVerifier("https://api.example.com/.well-known/jwks.json")
+    claims = verifier.verify(request_token)
+"""
+
+import json
+import threading
+import time
+import urllib.request
+
+import jwt
+
+DEFAULT_ALGORITHMS = ("RS256", "EdDSA")
+
+
+def fetch_jwks(url, timeout=5.0):
+    """Download a JWK set over HTTP(S)"""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.load(response)
+
+
+class JWKSVerifier:
+    """Verify tokens against a cached JWK set"""
+
+    def __init__(
+        self,
+        jwks_url,
+        algorithms=DEFAULT_ALGORITHMS,
+        token_type="access",
+        audience=None,
+        issuer=None,
+        leeway=0,
+        max_age=3600.0,
+        min_refresh_interval=30.0,
+        timeout=5.0,
+        fetch=fetch_jwks,
+    ):
+        self.jwks_url = jwks_url
+        self.algorithms = tuple(algorithms)
+        self.token_type = token_type
+        self.audience = audience
+        self.issuer = issuer
+        self.leeway = leeway
+        self.max_age = max_age
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.fetch = fetch
+
+        self._keys = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def verify(self, token):
+        """Return the token's claims, or raise jwt.InvalidTokenError"""
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.get_key(kid)
+        claims = jwt.decode(
+            token,
+            key.key,
+            algorithms=[key.algorithm_name],
+            audience=self.audience,
+            issuer=self.issuer,
+            leeway=self.leeway,
+            options={"verify_aud": self.audience is not None},
+        )
+        if (
+            self.token_type is not None
+            and claims.get("token_type") != self.token_type
+        ):
+            raise jwt.InvalidTokenError(f"Expected a {self.token_type} token")
+        return claims
+
+    def get_key(self, kid):
+        """Return the PyJWK for kid, fetching the JWK set if needed"""
+        if kid is None:
+            raise jwt.InvalidTokenError("Token has no kid")
+
+        key = self._keys.get(kid)
+        if key is not None and not self._expired():
+            return key
+
+        with self._lock:
+            # Another thread may have refreshed while this one waited
+            if kid not in self._keys or self._expired():
+                self._refresh(unknown_kid=kid not in self._keys)
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid}")
+        return key
+
+    def refresh(self):
+        """Fetch the JWK set now"""
+        with self._lock:
+            self._refresh(unknown_kid=True, throttle=False)
+
+    def _expired(self):
+        return (
+            self._fetched_at is None
+            or time.monotonic() - self._fetched_at > self.max_age
+        )
+
+    def _refresh(self, unknown_kid, throttle=True):
+        now = time.monotonic()
+        if not self._expired():
+            if not unknown_kid:
+                return
+            if throttle and now - self._fetched_at < self.min_refresh_interval:
+                return
+
+        try:
+            jwks = self.fetch(self.jwks_url, timeout=self.timeout)
+        except (OSError, ValueError):
+            if not self._keys:
+                raise
+            # Keep verifying with the keys we have and retry later
+            self._fetched_at = now - self.max_age + self.min_refresh_interval
+            return
+
+        keys = {}
+        for data in jwks.get("keys", ()):
+            if data.get("use", "sig") != "sig" or "kid" not in data:
+                continue
+            try:
+                key = jwt.PyJWK.from_dict(data)
+            except jwt.PyJWKError:
+                continue
+            if key.algorithm_name in self.algorithms:
+                keys[data["kid"]] = key
+
+        self._keys = keys
+        self._fetched_at = now
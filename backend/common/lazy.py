@@ -0,0 +1,92 @@
+"""
+URL helpers that defer importing views until they are first requested, so
+that workers serving only the API never load the admin or the schema
+generator.
+"""
+
+import importlib
+import sys
+import threading
+import types
+
+from django.urls import URLResolver
+from django.urls.resolvers import RoutePattern
+from django.utils.module_loading import import_string
+
+
+class LazyView:
+    """Import a class-based view by dotted path on its first request"""
+
+    def __init__(self, view_path, **initkwargs):
+        self.view_path = view_path
+        self.initkwargs = initkwargs
+        self._view = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<LazyView {self.view_path}>"
+
+    @property
+    def view(self):
+        if self._view is None:
+            with self._lock:
+                if self._view is None:
+                    view_class = import_string(self.view_path)
+                    self._view = view_class.as_view(**self.initkwargs)
+        return self._view
+
+    @property
+    def csrf_exempt(self):
+        return getattr(self.view, "csrf_exempt", False)
+
+    def __call__(self, request, *args, **kwargs):
+        return self.view(request, *args, **kwargs)
+
+
+def lazy_include(route, urlconf, namespace):
+    """Like ``path(route, include((urlconf, namespace)))``, but the URLconf
+    module is imported when a URL under route is first resolved or a name
+    in namespace first reversed"""
+    return URLResolver(
+        RoutePattern(route, is_endpoint=False),
+        urlconf,
+        app_name=namespace,
+        namespace=namespace,
+    )
+
+
+ADMINDOCS_VIEWS = "django.contrib.admindocs.views"
+
+
+def load_admindocs_views():
+    """The real django.contrib.admindocs.views, imported now if deferred"""
+    module = sys.modules.get(ADMINDOCS_VIEWS)
+    if module is None or isinstance(module, DeferredAdmindocsViews):
+        sys.modules.pop(ADMINDOCS_VIEWS, None)
+        module = importlib.import_module(ADMINDOCS_VIEWS)
+    return module
+
+
+class DeferredAdmindocsViews(types.ModuleType):
+    """Stands in for django.contrib.admindocs.views until one of its names
+    is used"""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            # Looked up by the import system, e.g. __path__
+            raise AttributeError(name)
+        return getattr(load_admindocs_views(), name)
+
+    @staticmethod
+    def simplify_regex(pattern):
+        return load_admindocs_views().simplify_regex(pattern)
+
+
+def defer_admindocs():
+    """
+    DRF's schema generators import simplify_regex from admindocs at import
+    time, and admindocs imports the whole admin. Stand in for the module so
+    that the admin is only imported if a schema is generated.
+    """
+    if ADMINDOCS_VIEWS not in sys.modules:
+        sys.modules[ADMINDOCS_VIEWS] = DeferredAdmindocsViews(ADMINDOCS_VIEWS)
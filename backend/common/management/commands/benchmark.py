@@ -0,0 +1,133 @@
+import json
+import platform
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from common.benchmarks import (
+    calibration_workload,
+    compare,
+    get_benchmarks,
+    isolated_databases,
+    measure,
+    rolled_back,
+)
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the micro-benchmarks of the apps' benchmarks modules against a "
+        "fresh test database and compare them with the stored baseline. "
+        "Fails when a benchmark regressed by more than --threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help="Only run benchmarks whose name starts with one of these",
+        )
+        parser.add_argument(
+            "--baseline",
+            type=Path,
+            default=DEFAULT_BASELINE,
+            help="JSON file of the baseline results",
+        )
+        parser.add_argument(
+            "--save",
+            action="store_true",
+            help="Store this run as the new baseline",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Slowdown of the median, as a fraction, that is reported",
+        )
+        parser.add_argument("--rounds", type=int, default=15)
+        parser.add_argument(
+            "--min-time",
+            type=float,
+            default=0.02,
+            help="Shortest round, in seconds",
+        )
+
+    def handle(self, *args, **options):
+        autodiscover_modules("benchmarks")
+        benchmarks = {
+            name: setup
+            for name, setup in get_benchmarks().items()
+            if not options["names"] or name.startswith(tuple(options["names"]))
+        }
+        if not benchmarks:
+            raise CommandError("No benchmark matches.")
+        rounds = max(2, options["rounds"])
+
+        run = {
+            "created": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "calibration": measure(
+                calibration_workload, rounds, options["min_time"]
+            ),
+            "results": {},
+        }
+        with isolated_databases():
+            for name, setup in benchmarks.items():
+                with rolled_back():
+                    result = measure(setup(), rounds, options["min_time"])
+                run["results"][name] = result
+                self.stdout.write(
+                    f"  {name:<40} {result['median'] * 1e6:12.2f} us  "
+                    f"(IQR {result['q1'] * 1e6:.2f}-"
+                    f"{result['q3'] * 1e6:.2f})"
+                )
+
+        path = options["baseline"]
+        regressed = []
+        if path.exists():
+            baseline = json.loads(path.read_text())
+            if options["names"]:
+                baseline["results"] = {
+                    name: result
+                    for name, result in baseline["results"].items()
+                    if name in run["results"]
+                }
+            regressed = self.report(
+                compare(baseline, run, options["threshold"])
+            )
+        elif not options["save"]:
+            self.stdout.write(
+                self.style.WARNING(f"No baseline at {path}; run with --save.")
+            )
+
+        if options["save"]:
+            if path.exists():
+                # Keep benchmarks this run skipped
+                stored = json.loads(path.read_text())["results"]
+                run["results"] = {**stored, **run["results"]}
+            path.write_text(json.dumps(run, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {path}"))
+        elif regressed:
+            raise CommandError(
+                f"{len(regressed)} benchmark(s) regressed by more than "
+                f"{options['threshold']:.0%}: {', '.join(regressed)}"
+            )
+
+    def report(self, rows):
+        self.stdout.write(self.style.MIGRATE_HEADING("Against the baseline:"))
+        styles = {
+            "regressed": self.style.ERROR,
+            "improved": self.style.SUCCESS,
+        }
+        for name, status, change in rows:
+            line = f"  {name:<40} {status:<10}"
+            if change is not None:
+                line += f" {change - 1:+7.1%}"
+            self.stdout.write(styles.get(status, str)(line))
+        return [name for name, status, _ in rows if status == "regressed"]
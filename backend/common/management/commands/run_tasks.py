@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from common.tasks import task_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the background tasks stored by the durable task queue, "
+        "including those left behind by stopped workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the tasks that are due now in this thread, then exit",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.TASK_QUEUE_WORKERS,
+            help="Worker threads (default: TASK_QUEUE_WORKERS)",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.TASK_QUEUE_DURABLE:
+            raise CommandError("Set TASK_QUEUE_DURABLE to store tasks")
+
+        if options["once"]:
+            total = 0
+            while ran := task_queue.run_due():
+                total += ran
+            self.stdout.write(f"Ran {total} tasks")
+            return
+
+        task_queue.start(workers=options["workers"])
+        self.stdout.write(
+            f"Running stored tasks with {options['workers']} workers, "
+            "press CONTROL-C to stop"
+        )
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            task_queue.stop()
@@ -0,0 +1,110 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from common.startup import IMPORTTIME_PREFIX, package_totals, parse_importtime
+
+
+class Command(BaseCommand):
+    help = (
+        "Start a fresh worker process and report how long each import, "
+        "each INSTALLED_APPS entry, the URLconf and the middleware take to "
+        "load and how much resident memory each adds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            choices=("full", "api"),
+            help="WORKER_PROFILE of the measured process (default: current)",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=15,
+            help="Modules and packages to list (default: 15)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the measurements and every import as JSON",
+        )
+
+    def handle(self, *args, **options):
+        report = self.measure(options["profile"])
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        top = options["top"]
+        self.stdout.write(
+            f"Worker profile: {report['worker_profile']}\n"
+            f"Startup: {report['total_ms']:.0f} ms, "
+            f"RSS {report['rss_kib'] / 1024:.1f} MiB "
+            f"(interpreter {report['python_rss_kib'] / 1024:.1f} MiB)\n"
+        )
+        self.stdout.write(
+            f"{'Step':<44}{'import':>8}{'models':>8}{'ready':>8}"
+            f"{'total ms':>10}{'RSS KiB':>10}"
+        )
+        steps = [
+            ("settings", report["settings"]),
+            *((app.pop("app"), app) for app in report["apps"]),
+            ("urls", report["urls"]),
+            ("middleware", report["middleware"]),
+        ]
+        for name, cost in steps:
+            phases = "".join(
+                f"{cost[f'{phase}_ms']:>8.1f}"
+                if f"{phase}_ms" in cost
+                else f"{'':>8}"
+                for phase in ("import", "models", "ready")
+            )
+            self.stdout.write(
+                f"{name:<44}{phases}{cost['total_ms']:>10.1f}"
+                f"{cost['rss_kib']:>10}"
+            )
+
+        modules = report["imports"]
+        self.stdout.write("\nSlowest top-level imports (cumulative ms)")
+        top_level = [module for module in modules if module["depth"] == 0]
+        for module in sorted(top_level, key=lambda m: -m["cumulative_us"])[
+            :top
+        ]:
+            self.stdout.write(
+                f"{module['cumulative_us'] / 1000:>10.1f}  {module['module']}"
+            )
+        self.stdout.write("\nPackages by own import time (ms)")
+        for package, own_us in package_totals(modules)[:top]:
+            self.stdout.write(f"{own_us / 1000:>10.1f}  {package}")
+
+    def measure(self, profile):
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+        }
+        if profile:
+            env["WORKER_PROFILE"] = profile
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "common.startup"],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            errors = [
+                line
+                for line in result.stderr.splitlines()
+                if not line.startswith(IMPORTTIME_PREFIX)
+            ]
+            raise CommandError(
+                "Measuring startup failed:\n" + "\n".join(errors[-20:])
+            )
+        report = json.loads(result.stdout)
+        report["imports"] = parse_importtime(result.stderr)
+        return report
@@ -0,0 +1,82 @@
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from django.urls import Resolver404, get_resolver
+
+from ..admission import AdmissionController
+
+MAX_RETRY_AFTER = 30  # seconds
+
+
+def queued_ms(request):
+    """How long the request waited before a worker took it, from the
+    X-Request-Start header set by the proxy ("t=<seconds since the epoch>",
+    also accepted in milliseconds or microseconds), or None"""
+    value = request.META.get("HTTP_X_REQUEST_START", "")
+    try:
+        started = float(value.removeprefix("t="))
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(0.0, (time.time() - started) * 1000)
+
+
+class AdmissionControlMiddleware:
+    """
+    Refuse requests with 503 and Retry-After while their endpoint is at its
+    adaptive concurrency limit, or while the worker is too busy for their
+    priority, instead of letting them queue until they time out.
+    Priorities come from ADMISSION_PRIORITIES (URL name to "high", "normal"
+    or "low"); requests that already waited in the backlog for longer than
+    their priority allows are refused too.
+    """
+
+    def __init__(self, get_response):
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.controller = AdmissionController(
+            capacity=settings.ADMISSION_MAX_CONCURRENCY,
+            initial_limit=settings.ADMISSION_INITIAL_LIMIT,
+            max_queue_ms=settings.ADMISSION_MAX_QUEUE_MS,
+        )
+        self.priorities = settings.ADMISSION_PRIORITIES
+        # Keyed by path, so bounded for paths carrying ids
+        self.classify = lru_cache(maxsize=1024)(self.classify)
+
+    def classify(self, path):
+        """Return the (endpoint, priority) of a path; endpoints are URL
+        patterns, so /users/1/ and /users/2/ share a limit"""
+        try:
+            match = get_resolver().resolve(path)
+        except Resolver404:
+            return "unresolved", "normal"
+        return match.route, self.priorities.get(match.view_name, "normal")
+
+    def __call__(self, request):
+        endpoint, priority = self.classify(request.path_info)
+        ticket = self.controller.acquire(endpoint, priority, queued_ms(request))
+        if ticket is None:
+            return self.busy(endpoint)
+        try:
+            return self.get_response(request)
+        finally:
+            self.controller.release(ticket)
+
+    def busy(self, endpoint):
+        response = JsonResponse(
+            {"detail": "The server is busy, please retry shortly."},
+            status=503,
+        )
+        retry_after = min(
+            MAX_RETRY_AFTER, self.controller.retry_after(endpoint)
+        )
+        response["Retry-After"] = str(retry_after)
+        response["Cache-Control"] = "no-store"
+        return response
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from ..compression import (
+    acompress_stream,
+    compress,
+    compress_stream,
+    negotiate_encoding,
+)
+
+
+class CompressionMiddleware:
+    """
+    Compress API responses with brotli or gzip, whichever the client
+    prefers. Regular responses are compressed only above
+    COMPRESSION_MIN_SIZE bytes, streaming responses are compressed chunk by
+    chunk, and responses that already carry a Content-Encoding (such as the
+    precompressed schema) or come from views marked compression_exempt
+    (those returning tokens) pass through untouched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.path_prefixes = tuple(settings.COMPRESSION_PATH_PREFIXES)
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.path.startswith(self.path_prefixes):
+            return self.process_response(request, response)
+        return response
+
+    def process_response(self, request, response):
+        if getattr(response, "compression_exempt", False):
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        if "no-transform" in response.get("Cache-Control", ""):
+            return response
+        if response.get("Content-Type", "").startswith("text/event-stream"):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(
+                    response.streaming_content, encoding
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    response.streaming_content, encoding
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,87 @@
+import re
+from urllib.parse import urlsplit
+
+from corsheaders.conf import conf
+from django.http import HttpResponse
+
+
+def origin_key(origin):
+    """Scheme and host of an origin, as corsheaders compares them"""
+    try:
+        url = urlsplit(origin)
+    except ValueError:
+        return None
+    return (url.scheme, url.netloc)
+
+
+class CorsPreflightMiddleware:
+    """
+    Answer CORS preflights from allowed origins before any other middleware
+    runs. The origins of CORS_ALLOWED_ORIGINS are parsed once and the
+    response headers built once per process; a preflight then costs a set
+    lookup. Preflights are cached by browsers for CORS_PREFLIGHT_MAX_AGE
+    seconds (Chromium caps this at two hours).
+
+    The headers are the ones corsheaders' CorsMiddleware sends. Other
+    origins, such as those matched by CORS_ALLOWED_ORIGIN_REGEXES or a
+    check_request_enabled receiver, and every other request go down the
+    stack to it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.urls_regex = re.compile(conf.CORS_URLS_REGEX)
+        self.allow_all = conf.CORS_ALLOW_ALL_ORIGINS
+        self.allowed_origins = frozenset(
+            origin_key(origin) for origin in conf.CORS_ALLOWED_ORIGINS
+        )
+        self.wildcard = self.allow_all and not conf.CORS_ALLOW_CREDENTIALS
+
+        headers = {
+            "Content-Length": "0",
+            "Vary": "origin",
+            "Access-Control-Allow-Headers": ", ".join(conf.CORS_ALLOW_HEADERS),
+            "Access-Control-Allow-Methods": ", ".join(conf.CORS_ALLOW_METHODS),
+        }
+        if self.wildcard:
+            headers["Access-Control-Allow-Origin"] = "*"
+        if conf.CORS_ALLOW_CREDENTIALS:
+            headers["Access-Control-Allow-Credentials"] = "true"
+        if conf.CORS_EXPOSE_HEADERS:
+            headers["Access-Control-Expose-Headers"] = ", ".join(
+                conf.CORS_EXPOSE_HEADERS
+            )
+        if conf.CORS_PREFLIGHT_MAX_AGE:
+            headers["Access-Control-Max-Age"] = str(conf.CORS_PREFLIGHT_MAX_AGE)
+        self.preflight_headers = headers
+
+    def __call__(self, request):
+        if (
+            request.method == "OPTIONS"
+            and "access-control-request-method" in request.headers
+        ):
+            origin = request.headers.get("origin")
+            if origin and self.is_allowed(origin, request):
+                return self.preflight_response(origin, request)
+        return self.get_response(request)
+
+    def is_allowed(self, origin, request):
+        if not self.urls_regex.match(request.path_info):
+            # Only enabled through the signal, checked by corsheaders
+            return False
+        key = origin_key(origin)
+        if key is None:
+            return False
+        return self.allow_all or key in self.allowed_origins
+
+    def preflight_response(self, origin, request):
+        response = HttpResponse(headers=self.preflight_headers)
+        if not self.wildcard:
+            response["Access-Control-Allow-Origin"] = origin
+        if (
+            conf.CORS_ALLOW_PRIVATE_NETWORK
+            and request.headers.get("access-control-request-private-network")
+            == "true"
+        ):
+            response["Access-Control-Allow-Private-Network"] = "true"
+        return response
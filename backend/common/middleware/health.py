@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.http import JsonResponse
+
+from ..health import (
+    ReadinessChecker,
+    check_database,
+    check_migrations,
+    check_signing_key,
+)
+
+LIVENESS_PATHS = ("/healthz", "/healthz/")
+READINESS_PATHS = ("/readyz", "/readyz/")
+
+
+class HealthCheckMiddleware:
+    """
+    Answer orchestrator probes before any other middleware runs: no
+    session, authentication, CSRF or host validation is involved.
+
+    ``/healthz`` only proves the worker is serving requests. ``/readyz``
+    reports database connectivity, pending migrations and the JWT signing
+    key, with per-check latency, from results cached per process.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.checker = ReadinessChecker(
+            {
+                "database": check_database,
+                "migrations": check_migrations,
+                "signing_key": check_signing_key,
+            },
+            ttl=settings.HEALTH_CHECK_CACHE_SECONDS,
+            sticky=("migrations",),
+        )
+
+    def __call__(self, request):
+        if request.path in LIVENESS_PATHS:
+            return JsonResponse({"status": "ok"})
+        if request.path in READINESS_PATHS:
+            ready, checks = self.checker.run()
+            return JsonResponse(
+                {"status": "ok" if ready else "unavailable", "checks": checks},
+                status=200 if ready else 503,
+            )
+        return self.get_response(request)
@@ -0,0 +1,53 @@
+import random
+
+from django.conf import settings
+
+from ..profiling import RequestProfiler, check_trigger_token
+
+HEADER = "HTTP_X_PROFILE"
+QUERY_PARAMETER = "_profile"
+
+
+class ProfilingMiddleware:
+    """
+    Profile the rest of the request when it carries a signed trigger
+    token (``X-Profile`` header or ``?_profile=``, from ``manage.py
+    profiling_token``) or is picked by PROFILING_SAMPLE_RATE. Other requests
+    only pay for a header lookup and, when sampling, one random number.
+
+    The report id is returned in the ``X-Profile-Id`` response header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = self.trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        profiler = RequestProfiler()
+        response = profiler.run(self.get_response, request)
+        match = request.resolver_match
+        response["X-Profile-Id"] = profiler.save(
+            trigger=trigger,
+            method=request.method,
+            path=request.path,
+            view=match.view_name if match else None,
+            status=response.status_code,
+        )
+        return response
+
+    def trigger(self, request):
+        token = request.META.get(HEADER)
+        if token is None and QUERY_PARAMETER in request.META.get(
+            "QUERY_STRING", ""
+        ):
+            token = request.GET.get(QUERY_PARAMETER)
+        if token is not None and check_trigger_token(token):
+            return "token"
+
+        rate = settings.PROFILING_SAMPLE_RATE
+        if rate and random.random() < rate:
+            return "sample"
+        return None
@@ -0,0 +1,41 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from ..querylog import QueryCollector, log, query_stats
+
+
+class QueryLogMiddleware:
+    """
+    Watch every query the rest of the request runs and log slow and
+    repeated ones, attributed to the resolved view name (e.g.
+    ``authentication:token_obtain_pair``). Disabled by QUERY_LOG_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_LOG_ENABLED:
+            return self.get_response(request)
+
+        collector = QueryCollector(
+            settings.QUERY_LOG_SLOW_MS, settings.QUERY_LOG_REPEAT_THRESHOLD
+        )
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(collector)
+                )
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view = match.view_name if match else None
+        for event in collector.events(view):
+            log(logging.WARNING, event)
+        query_stats.add(collector, view)
+        if query_stats.flush_due():
+            query_stats.flush()
+        return response
@@ -0,0 +1,49 @@
+from django.db import models
+
+
+class BackgroundTask(models.Model):
+    """A queued task of the durable task queue (see common.tasks)"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    enqueued_at = models.DateTimeField()
+    run_at = models.DateTimeField()
+    # A running task whose lease has expired lost its worker
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_at"])]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class IdempotencyRecord(models.Model):
+    """A request made with an Idempotency-Key and, once it finished, its
+    response (see common.idempotency)"""
+
+    key = models.CharField(max_length=64, primary_key=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    data = models.JSONField(null=True, blank=True)
+    # Until then an unfinished request holds the key, a finished one keeps
+    # its response
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
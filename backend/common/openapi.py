@@ -0,0 +1,59 @@
+"""
+Schema generation, imported only by the schema view and ``manage.py
+spectacular`` (DEFAULT_GENERATOR_CLASS).
+
+Schema extensions live in the ``openapi`` module of an app and are
+imported here, not from ``AppConfig.ready``, so that workers never load
+drf_spectacular.
+"""
+
+from django.utils.module_loading import autodiscover_modules
+from drf_spectacular.generators import EndpointEnumerator
+from drf_spectacular.generators import (
+    SchemaGenerator as SpectacularSchemaGenerator,
+)
+from drf_spectacular.utils import extend_schema
+
+from .lazy import LazyView
+from .schema import SCHEMA_ARGUMENTS, resolve
+
+
+def unwrap(callback):
+    """The view behind a common.lazy.LazyView, imported now"""
+    return callback.view if isinstance(callback, LazyView) else callback
+
+
+def apply_schema_arguments(view_class):
+    """Apply the common.schema.extend_schema arguments of a view's
+    methods with drf_spectacular, once"""
+    for name in view_class.http_method_names:
+        method = getattr(view_class, name, None)
+        arguments = getattr(method, SCHEMA_ARGUMENTS, None)
+        if arguments is None or "schema" in getattr(method, "kwargs", {}):
+            continue
+        extend_schema(**resolve(arguments))(method)
+
+
+class LazyViewEndpointEnumerator(EndpointEnumerator):
+    """Also list the views routed through LazyView"""
+
+    def should_include_endpoint(self, path, callback):
+        return super().should_include_endpoint(path, unwrap(callback))
+
+    def get_allowed_methods(self, callback):
+        return super().get_allowed_methods(unwrap(callback))
+
+
+class SchemaGenerator(SpectacularSchemaGenerator):
+    endpoint_inspector_cls = LazyViewEndpointEnumerator
+
+    def __init__(self, *args, **kwargs):
+        autodiscover_modules("openapi")
+        super().__init__(*args, **kwargs)
+
+    def create_view(self, callback, method, request=None):
+        callback = unwrap(callback)
+        view_class = getattr(callback, "cls", None)
+        if view_class is not None:
+            apply_schema_arguments(view_class)
+        return super().create_view(callback, method, request)
@@ -0,0 +1,30 @@
+"""
+Parsers for the binary formats of common.renderers.
+"""
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import CBORRenderer, MessagePackRenderer, cbor2, msgpack
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}") from exc
+
+
+class CBORParser(BaseParser):
+    media_type = "application/cbor"
+    renderer_class = CBORRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return cbor2.loads(stream.read())
+        except (ValueError, cbor2.CBORDecodeError) as exc:
+            raise ParseError(f"CBOR parse error - {exc}") from exc
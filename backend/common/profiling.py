@@ -0,0 +1,241 @@
+"""
+Per-request profiling.
+
+A profile records a pruned call tree from cProfile, every database query
+with its duration, and the time spent hashing passwords and signing or
+verifying tokens. Reports are written to PROFILING_DIR as ``<id>.json``
+next to the raw ``<id>.prof`` (for pstats or snakeviz), keeping the newest
+PROFILING_MAX_REPORTS.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+from contextlib import ExitStack
+from datetime import UTC, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.utils.crypto import get_random_string
+
+TOKEN_SALT = "common.profiling"
+
+# (file suffix, function names) whose cumulative time is reported apart
+CATEGORIES = {
+    "password_hashing": (
+        ("django/contrib/auth/hashers.py", {"check_password", "make_password"}),
+    ),
+    "token_signing": (
+        ("rest_framework_simplejwt/backends.py", {"encode", "decode"}),
+        ("authentication/signing.py", {"encode", "decode"}),
+    ),
+}
+
+CALL_TREE_MIN_FRACTION = 0.01
+CALL_TREE_MAX_DEPTH = 20
+
+
+def make_trigger_token():
+    """Return a value for the X-Profile header or ?_profile= parameter"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def check_trigger_token(value):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            value, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def reports_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+class QueryRecorder:
+    """Database execute wrapper keeping every query and its duration"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "duration_ms": (time.perf_counter() - started) * 1000,
+                }
+            )
+
+
+class RequestProfiler:
+    """Profile one call and describe where its time went"""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.queries = QueryRecorder()
+        self.duration = 0.0
+
+    def run(self, func, *args):
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(self.queries)
+                )
+            self.profiler.enable()
+            try:
+                return func(*args)
+            finally:
+                self.profiler.disable()
+                self.duration = time.perf_counter() - started
+
+    def report(self, **details):
+        stats = pstats.Stats(self.profiler).stats
+        queries = self.queries.queries
+        return {
+            **details,
+            "duration_ms": self.duration * 1000,
+            "query_count": len(queries),
+            "query_ms": sum(query["duration_ms"] for query in queries),
+            **{
+                f"{name}_ms": category_time(stats, matchers) * 1000
+                for name, matchers in CATEGORIES.items()
+            },
+            "queries": queries,
+            "call_tree": call_tree(stats),
+        }
+
+    def save(self, **details):
+        """Write the report and raw profile; return the report id"""
+        directory = reports_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        now = datetime.now(UTC)
+        report_id = f"{now:%Y%m%dT%H%M%S%f}-{get_random_string(6).lower()}"
+        report = self.report(
+            id=report_id, created_at=now.isoformat(), **details
+        )
+        (directory / f"{report_id}.json").write_text(json.dumps(report))
+        self.profiler.dump_stats(directory / f"{report_id}.prof")
+        prune_reports(directory, settings.PROFILING_MAX_REPORTS)
+        return report_id
+
+
+def function_label(func):
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    return f"{filename}:{lineno}({name})"
+
+
+def category_time(stats, matchers):
+    """Cumulative seconds in matching functions, not counting calls made
+    from one matching function to another"""
+
+    def matches(func):
+        filename, _, name = func
+        return any(
+            filename.endswith(suffix) and name in names
+            for suffix, names in matchers
+        )
+
+    total = 0.0
+    for func, (_, _, _, _, callers) in stats.items():
+        if not matches(func):
+            continue
+        for caller, caller_stats in callers.items():
+            if not matches(caller):
+                total += caller_stats[3]
+    return total
+
+
+def call_tree(stats):
+    """Build the call tree from pstats' caller edges, dropping branches
+    under CALL_TREE_MIN_FRACTION of the total time"""
+    children = {}
+    roots = []
+    for func, (_, _, _, cumulative, callers) in stats.items():
+        if not callers:
+            roots.append((func, cumulative, stats[func][1]))
+        for caller, (_, calls, _, edge_cumulative) in callers.items():
+            children.setdefault(caller, []).append(
+                (func, edge_cumulative, calls)
+            )
+
+    total = sum(cumulative for _, cumulative, _ in roots) or 1.0
+
+    def node(func, cumulative, calls, path):
+        branch = {
+            "function": function_label(func),
+            "calls": calls,
+            "own_ms": stats[func][2] * 1000,
+            "cumulative_ms": cumulative * 1000,
+            "children": [],
+        }
+        if len(path) < CALL_TREE_MAX_DEPTH:
+            for child, child_cumulative, child_calls in sorted(
+                children.get(func, ()), key=lambda edge: -edge[1]
+            ):
+                if child_cumulative / total < CALL_TREE_MIN_FRACTION:
+                    break
+                if child in path:
+                    continue
+                branch["children"].append(
+                    node(child, child_cumulative, child_calls, path | {child})
+                )
+        return branch
+
+    return [
+        node(func, cumulative, calls, {func})
+        for func, cumulative, calls in sorted(roots, key=lambda r: -r[1])
+        if cumulative / total >= CALL_TREE_MIN_FRACTION
+    ]
+
+
+def prune_reports(directory, keep):
+    reports = sorted(directory.glob("*.json"))
+    for stale in reports[: max(0, len(reports) - keep)]:
+        for path in (stale, stale.with_suffix(".prof")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def list_reports():
+    """Summaries of saved reports, newest first"""
+    summaries = []
+    for path in sorted(reports_dir().glob("*.json"), reverse=True):
+        try:
+            report = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        summaries.append(
+            {
+                key: value
+                for key, value in report.items()
+                if key not in ("queries", "call_tree")
+            }
+        )
+    return summaries
+
+
+def load_report(report_id):
+    """Return a saved report, or None"""
+    if not report_id.replace("-", "").isalnum():
+        return None
+    path = reports_dir() / f"{report_id}.json"
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,211 @@
+"""
+Slow query and repeated query (N+1) logging with view attribution.
+
+Every query of a request goes through ``QueryCollector``. Queries slower
+than QUERY_LOG_SLOW_MS and SQL statements executed QUERY_LOG_REPEAT_THRESHOLD
+times or more in one request are logged to the ``querylog`` logger as one
+JSON object per line, with the view that ran them and a stack trimmed to
+project code. All queries are also aggregated per fingerprint (the SQL with
+literals and IN lists collapsed) and a summary per fingerprint is logged
+every QUERY_LOG_SUMMARY_SECONDS.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+import traceback
+from collections import Counter
+from functools import lru_cache
+from hashlib import sha1
+
+from django.conf import settings
+
+logger = logging.getLogger("querylog")
+
+TRANSACTION_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK", "BEGIN")
+STACK_DEPTH = 8
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|\$\d+)\s*,?)+\)", re.I)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize(sql):
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    return sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+def trimmed_stack():
+    """The innermost project frames of the current stack, outermost first"""
+    root = str(settings.BASE_DIR)
+    frames = [
+        f"{frame.filename.removeprefix(root + '/')}:{frame.lineno} "
+        f"in {frame.name}"
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(root)
+        and "site-packages" not in frame.filename
+        and "/common/middleware/" not in frame.filename
+        and not frame.filename.endswith(("querylog.py", "manage.py"))
+    ]
+    return frames[-STACK_DEPTH:]
+
+
+class QueryCollector:
+    """Database execute wrapper flagging the slow and repeated queries of
+    one request"""
+
+    def __init__(self, slow_ms, repeat_threshold):
+        self.slow_ms = slow_ms
+        self.repeat_threshold = repeat_threshold
+        self.queries = []
+        self.counts = Counter()
+        self.slow = []
+        self.repeated = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, (time.perf_counter() - started) * 1000)
+
+    def record(self, sql, duration_ms):
+        self.queries.append((sql, duration_ms))
+        if sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+            return
+
+        self.counts[sql] += 1
+        if duration_ms >= self.slow_ms:
+            self.slow.append(
+                {
+                    "sql": sql,
+                    "duration_ms": round(duration_ms, 3),
+                    "stack": trimmed_stack(),
+                }
+            )
+        if self.counts[sql] == self.repeat_threshold:
+            self.repeated[sql] = trimmed_stack()
+
+    def events(self, view):
+        """Log records for this request's slow and repeated queries"""
+        events = [
+            {
+                "event": "slow_query",
+                "view": view,
+                "fingerprint": fingerprint(query["sql"]),
+                **query,
+            }
+            for query in self.slow
+        ]
+        for sql, stack in self.repeated.items():
+            durations = [ms for text, ms in self.queries if text == sql]
+            events.append(
+                {
+                    "event": "repeated_query",
+                    "view": view,
+                    "fingerprint": fingerprint(sql),
+                    "sql": sql,
+                    "count": self.counts[sql],
+                    "duration_ms": round(sum(durations), 3),
+                    "stack": stack,
+                }
+            )
+        return events
+
+
+class QueryStats:
+    """Per-fingerprint totals across requests, logged and reset
+    periodically"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._stats = {}
+
+    def add(self, collector, view):
+        slow = Counter(fingerprint(query["sql"]) for query in collector.slow)
+        repeated = {fingerprint(sql) for sql in collector.repeated}
+        with self._lock:
+            for sql, duration_ms in collector.queries:
+                key = fingerprint(sql)
+                entry = self._stats.get(key)
+                if entry is None:
+                    entry = self._stats[key] = {
+                        "fingerprint": key,
+                        "sql": normalize(sql),
+                        "count": 0,
+                        "total_ms": 0.0,
+                        "max_ms": 0.0,
+                        "slow": 0,
+                        "repeated_in_requests": 0,
+                        "views": Counter(),
+                    }
+                entry["count"] += 1
+                entry["total_ms"] += duration_ms
+                entry["max_ms"] = max(entry["max_ms"], duration_ms)
+                entry["views"][view] += 1
+            for key, count in slow.items():
+                self._stats[key]["slow"] += count
+            for key in repeated:
+                self._stats[key]["repeated_in_requests"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {
+                    **entry,
+                    "total_ms": round(entry["total_ms"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "views": dict(entry["views"].most_common(5)),
+                }
+                for entry in sorted(
+                    self._stats.values(), key=lambda e: -e["total_ms"]
+                )
+            ]
+
+    def flush_due(self):
+        return (
+            time.monotonic() - self._started
+            >= settings.QUERY_LOG_SUMMARY_SECONDS
+        )
+
+    def flush(self):
+        """Log one summary record per fingerprint and start over"""
+        entries = self.snapshot()
+        with self._lock:
+            period = time.monotonic() - self._started
+            self._stats = {}
+            self._started = time.monotonic()
+        for entry in entries:
+            log(
+                logging.INFO,
+                {
+                    "event": "query_summary",
+                    "period_s": round(period, 1),
+                    **entry,
+                },
+            )
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._started = time.monotonic()
+
+
+def log(level, event):
+    if logger.isEnabledFor(level):
+        logger.log(level, json.dumps(event, default=str))
+
+
+query_stats = QueryStats()
@@ -0,0 +1,51 @@
+"""
+Binary renderers for clients that would rather not parse JSON.
+
+MessagePack needs the optional ``msgpack`` package and CBOR the optional
+``cbor2`` package; settings only offer the formats whose package is
+installed. Values JSON cannot hold natively (dates, decimals, UUIDs, lazy
+strings) are converted the way DRF's JSONRenderer converts them, so every
+format carries the same data.
+"""
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+_json_default = JSONEncoder().default
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_json_default, use_bin_type=True)
+
+
+class CBORRenderer(BaseRenderer):
+    media_type = "application/cbor"
+    format = "cbor"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return cbor2.dumps(
+            data,
+            default=lambda encoder, value: encoder.encode(_json_default(value)),
+        )
@@ -0,0 +1,34 @@
+"""
+API schema annotations that cost nothing at worker startup.
+
+``extend_schema`` takes the arguments of drf_spectacular's, but only
+records them on the view method; common.openapi.SchemaGenerator applies
+them with drf_spectacular when a schema is generated. drf_spectacular and
+its OpenApi* types are therefore never imported by a worker that does not
+serve the schema. Arguments that need those types are given as functions
+returning them (at any depth of lists and dicts), called at generation
+time.
+"""
+
+import inspect
+
+SCHEMA_ARGUMENTS = "_schema_arguments"
+
+
+def extend_schema(**kwargs):
+    def decorator(method):
+        setattr(method, SCHEMA_ARGUMENTS, kwargs)
+        return method
+
+    return decorator
+
+
+def resolve(value):
+    """Call the deferred parts of a recorded argument"""
+    if inspect.isfunction(value):
+        return value()
+    if isinstance(value, list | tuple):
+        return type(value)(resolve(item) for item in value)
+    if isinstance(value, dict):
+        return {key: resolve(item) for key, item in value.items()}
+    return value
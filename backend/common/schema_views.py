@@ -0,0 +1,74 @@
+import hashlib
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import translation
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.views import SpectacularAPIView
+
+from .compression import compress, negotiate_encoding
+
+
+class PrecompressedSpectacularAPIView(SpectacularAPIView):
+    """
+    OpenAPI schema view that generates the schema once per process and
+    keeps the rendered bytes, plus a brotli and a gzip copy compressed at
+    the highest level, in memory.
+    """
+
+    _payloads = {}
+
+    @classmethod
+    def clear_cache(cls):
+        cls._payloads.clear()
+
+    def _get_schema_response(self, request):
+        key = (
+            request.accepted_media_type,
+            translation.get_language(),
+            self.api_version or request.version,
+            request.GET.get("version"),
+        )
+        payload = self._payloads.get(key)
+        if payload is None:
+            payload = self._payloads[key] = self._render_payload(request)
+
+        etag = payload["etag"]
+        if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+            response = HttpResponseNotModified()
+        else:
+            encoding = negotiate_encoding(
+                request.META.get("HTTP_ACCEPT_ENCODING", "")
+            )
+            if encoding is None:
+                body = payload["identity"]
+            else:
+                body = payload.get(encoding)
+                if body is None:
+                    body = payload[encoding] = compress(
+                        payload["identity"], encoding, static=True
+                    )
+            response = HttpResponse(body, content_type=payload["content_type"])
+            response["Content-Disposition"] = payload["content_disposition"]
+            if encoding is not None:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
+
+    def _render_payload(self, request):
+        schema_response = super()._get_schema_response(request)
+        renderer = request.accepted_renderer
+        content = renderer.render(
+            schema_response.data,
+            request.accepted_media_type,
+            self.get_renderer_context(),
+        )
+        content_type = request.accepted_media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        return {
+            "identity": content,
+            "content_type": content_type,
+            "content_disposition": schema_response["Content-Disposition"],
+            "etag": f'"{hashlib.md5(content).hexdigest()}"',
+        }
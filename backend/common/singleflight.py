@@ -0,0 +1,63 @@
+"""
+Single-flight execution backed by the Django cache.
+
+Concurrent callers asking for the same key share one computation: the first
+caller computes and stores the result for ``ttl`` seconds, everybody else
+(in this process or, with a shared cache, in other workers) waits for and
+returns that stored result.
+"""
+
+import threading
+import time
+import zlib
+
+from django.core.cache import cache
+
+# Striped in-process locks: bounded memory however many keys are in flight.
+_LOCK_STRIPES = 64
+_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+
+def _local_lock(key):
+    return _locks[zlib.crc32(key.encode()) % _LOCK_STRIPES]
+
+
+def single_flight(key, compute, ttl, wait_timeout=5.0, poll_interval=0.02):
+    """Return the cached result for key, or compute it exactly once.
+
+    Exceptions from ``compute`` are not cached; waiting callers then compute
+    for themselves.
+    """
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    with _local_lock(key):
+        result = cache.get(key)
+        if result is not None:
+            return result
+
+        lock_key = f"{key}:lock"
+        if cache.add(lock_key, 1, timeout=wait_timeout):
+            try:
+                result = compute()
+                cache.set(key, result, ttl)
+                return result
+            finally:
+                cache.delete(lock_key)
+
+        # Another worker holds the lock: wait for its result.
+        deadline = time.monotonic() + wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            result = cache.get(key)
+            if result is not None:
+                return result
+            if cache.get(lock_key) is None:
+                break
+        return compute()
+
+
+def forget(key):
+    """Drop a stored result so the next caller computes again"""
+    cache.delete(key)
@@ -0,0 +1,160 @@
+"""
+Startup cost of a worker process.
+
+``manage.py startup_report`` runs ``python -X importtime -m common.startup``
+in a fresh interpreter so that nothing is imported when measuring starts.
+That process sets Django up the way a WSGI worker does, timing each
+INSTALLED_APPS entry (import, models, ready()) and the resident memory it
+adds, then loads the URLconf and the middleware. It prints the result as
+JSON on stdout, while Python writes the time of every import to stderr.
+
+A module imported by several apps is charged to the first one.
+"""
+
+import json
+import os
+import sys
+import time
+
+IMPORTTIME_PREFIX = "import time:"
+
+
+def rss_kib():
+    """Resident set size of this process in KiB"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        # No procfs: the peak is the closest available measure
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class Meter:
+    """Accumulate wall time and RSS growth under named keys"""
+
+    def __init__(self):
+        self.costs = {}
+
+    def cost(self, key):
+        return self.costs.setdefault(key, {"rss_kib": 0})
+
+    def measure(self, key, phase, func, *args, **kwargs):
+        started, rss_before = time.perf_counter(), rss_kib()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            cost = self.cost(key)
+            cost[f"{phase}_ms"] = (
+                cost.get(f"{phase}_ms", 0.0)
+                + (time.perf_counter() - started) * 1000
+            )
+            cost["rss_kib"] += rss_kib() - rss_before
+
+    def wrap(self, key, phase, func):
+        def measured(*args, **kwargs):
+            return self.measure(key, phase, func, *args, **kwargs)
+
+        return measured
+
+
+def measure_startup():
+    """Set Django up in this process and return what each step cost"""
+    started, rss_start = time.perf_counter(), rss_kib()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    meter = Meter()
+
+    def load_settings():
+        import django
+        from django.conf import settings
+
+        settings.INSTALLED_APPS  # noqa: B018
+        return django
+
+    django = meter.measure("settings", "load", load_settings)
+
+    from django.apps.config import AppConfig
+
+    create = AppConfig.create.__func__
+    import_models = AppConfig.import_models
+
+    def measured_create(cls, entry):
+        app_config = meter.measure(entry, "import", create, cls, entry)
+        app_config._startup_entry = entry
+        app_config.ready = meter.wrap(entry, "ready", app_config.ready)
+        return app_config
+
+    def measured_import_models(self):
+        meter.measure(self._startup_entry, "models", import_models, self)
+
+    AppConfig.create = classmethod(measured_create)
+    AppConfig.import_models = measured_import_models
+    try:
+        django.setup(set_prefix=False)
+    finally:
+        AppConfig.create = classmethod(create)
+        AppConfig.import_models = import_models
+
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.urls import get_resolver
+
+    meter.measure("urls", "load", lambda: get_resolver().url_patterns)
+    meter.measure("middleware", "load", WSGIHandler)
+
+    def entry_cost(key):
+        cost = meter.costs.pop(key, {"rss_kib": 0})
+        cost["total_ms"] = sum(
+            value for name, value in cost.items() if name.endswith("_ms")
+        )
+        return cost
+
+    return {
+        "worker_profile": settings.WORKER_PROFILE,
+        "python_rss_kib": rss_start,
+        "settings": entry_cost("settings"),
+        "apps": [
+            {"app": entry, **entry_cost(entry)}
+            for entry in settings.INSTALLED_APPS
+        ],
+        "urls": entry_cost("urls"),
+        "middleware": entry_cost("middleware"),
+        "total_ms": (time.perf_counter() - started) * 1000,
+        "rss_kib": rss_kib(),
+    }
+
+
+def parse_importtime(output):
+    """Parse ``-X importtime`` lines into module records in import order"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        own, cumulative, name = line[len(IMPORTTIME_PREFIX) :].split("|")
+        if not own.strip().isdigit():
+            continue  # the header line
+        modules.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_us": int(own),
+                "cumulative_us": int(cumulative),
+            }
+        )
+    return modules
+
+
+def package_totals(modules):
+    """Own import time per top-level package, slowest first"""
+    totals = {}
+    for module in modules:
+        package = module["module"].split(".")[0]
+        totals[package] = totals.get(package, 0) + module["self_us"]
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+if __name__ == "__main__":
+    json.dump(measure_startup(), sys.stdout)
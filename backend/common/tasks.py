@@ -0,0 +1,488 @@
+"""
+In-process background tasks for work that should not delay the response.
+
+Functions decorated with ``@task`` (in an app's ``tasks`` module) are queued
+with ``.enqueue(*args, **kwargs)``. A task enqueued inside a transaction, on
+any database, is queued only once every open transaction commits and is
+dropped if one of them rolls back;
+one enqueued while a request is handled waits until the response has been
+sent. A bounded pool of TASK_QUEUE_WORKERS threads runs the tasks and
+retries failures up to ``max_retries`` times with exponential backoff.
+
+By default the queue lives in memory and tasks still queued when the
+process exits are lost. With TASK_QUEUE_DURABLE each task is also written
+to the BackgroundTask table in the caller's transaction (on the default
+database). Workers claim rows with a lease, so the task of a worker that
+died is picked up again by any process once its lease expires. Such tasks
+are found by polling every TASK_QUEUE_POLL_SECONDS. ``manage.py run_tasks``
+drains the table from a dedicated process.
+
+Arguments must be JSON serializable in both modes.
+"""
+
+import atexit
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SAMPLES = 1000
+
+_registry = {}
+# Tasks enqueued while this context handles a request, or None
+_request_tasks = ContextVar("request_tasks", default=None)
+
+
+class Task:
+    def __init__(self, func, name, max_retries=None, retry_delay=None):
+        self.func = func
+        self.name = name
+        self._max_retries = max_retries
+        self._retry_delay = retry_delay
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<Task {self.name}>"
+
+    @property
+    def max_retries(self):
+        if self._max_retries is None:
+            return settings.TASK_QUEUE_MAX_RETRIES
+        return self._max_retries
+
+    @property
+    def retry_delay(self):
+        if self._retry_delay is None:
+            return settings.TASK_QUEUE_RETRY_DELAY
+        return self._retry_delay
+
+    def enqueue(self, *args, **kwargs):
+        """Run the task in the background once the current transaction
+        commits and the current response has been sent"""
+        return task_queue.enqueue(self, args, kwargs)
+
+
+def task(func=None, *, name=None, max_retries=None, retry_delay=None):
+    """Register a function as a background task::
+
+    @task(max_retries=5)
+    def send_welcome_email(user_id): ...
+
+    send_welcome_email.enqueue(user.pk)
+    """
+
+    def register(func):
+        task_name = name or f"{func.__module__}.{func.__qualname__}"
+        if task_name in _registry:
+            raise ValueError(f"Task {task_name} is already registered")
+        _registry[task_name] = Task(func, task_name, max_retries, retry_delay)
+        return _registry[task_name]
+
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    return _registry.get(name)
+
+
+def on_commit_everywhere(callback):
+    """Run ``callback`` once the open transactions of every database have
+    committed (at once outside any), never if one of them rolls back"""
+    pending = {
+        connection.alias
+        for connection in connections.all(initialized_only=True)
+        if connection.in_atomic_block
+    }
+    if not pending:
+        callback()
+        return
+
+    def committed(alias):
+        pending.discard(alias)
+        if not pending:
+            callback()
+
+    for alias in list(pending):
+        transaction.on_commit(partial(committed, alias), using=alias)
+
+
+class Job:
+    """One queued run of a task"""
+
+    def __init__(self, name, args, kwargs, enqueued_at=None, attempts=0):
+        self.name = name
+        self.args = list(args)
+        self.kwargs = dict(kwargs)
+        self.enqueued_at = enqueued_at or time.time()
+        self.run_at = self.enqueued_at
+        self.attempts = attempts
+        self.row_id = None
+
+
+def hold_tasks_for_request(sender, **kwargs):
+    """request_started receiver: hold this request's tasks until the
+    response has been sent"""
+    _request_tasks.set([])
+
+
+def release_request_tasks(sender, **kwargs):
+    """request_finished receiver: queue the tasks the request enqueued"""
+    jobs = _request_tasks.get()
+    _request_tasks.set(None)
+    for job in jobs or ():
+        task_queue.submit(job)
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class TaskQueueMetrics:
+    """Counters and recent queue wait and run times"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(
+                ("enqueued", "completed", "retried", "failed", "overflowed"),
+                0,
+            )
+            self.wait_ms = deque(maxlen=LATENCY_SAMPLES)
+            self.run_ms = deque(maxlen=LATENCY_SAMPLES)
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def timing(self, wait_ms, run_ms):
+        with self._lock:
+            self.wait_ms.append(wait_ms)
+            self.run_ms.append(run_ms)
+
+    def snapshot(self):
+        with self._lock:
+            timings = {"wait_ms": sorted(self.wait_ms)}
+            timings["run_ms"] = sorted(self.run_ms)
+            counts = dict(self.counts)
+        return {
+            **counts,
+            **{
+                name: {
+                    "p50": percentile(values, 0.5),
+                    "p95": percentile(values, 0.95),
+                    "max": values[-1] if values else None,
+                }
+                for name, values in timings.items()
+            },
+        }
+
+
+class TaskQueue:
+    """Bounded pool of worker threads running queued jobs in run_at order"""
+
+    def __init__(self):
+        self.metrics = TaskQueueMetrics()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._cond = threading.Condition(threading.Lock())
+        self._heap = []
+        self._order = itertools.count()
+        self._queued_rows = set()
+        self._running = 0
+        self._threads = []
+        self._stopping = False
+        self._stop_polling = threading.Event()
+
+    # Enqueueing
+
+    def enqueue(self, task, args, kwargs):
+        job = Job(task.name, args, kwargs)
+        if settings.TASK_QUEUE_DURABLE:
+            now = timezone.now()
+            job.row_id = BackgroundTask.objects.create(
+                name=job.name,
+                args=job.args,
+                kwargs=job.kwargs,
+                enqueued_at=now,
+                run_at=now,
+            ).pk
+        on_commit_everywhere(partial(self._dispatch, job))
+        return job
+
+    def _dispatch(self, job):
+        self.metrics.count("enqueued")
+        request_jobs = _request_tasks.get()
+        if request_jobs is not None:
+            request_jobs.append(job)
+        else:
+            self.submit(job)
+
+    def submit(self, job):
+        """Queue a job now"""
+        if settings.TASK_QUEUE_EAGER:
+            self._run(job)
+            return
+
+        self.start()
+        with self._cond:
+            full = len(self._heap) >= settings.TASK_QUEUE_MAX_SIZE
+            if not full:
+                self._push(job)
+        if full:
+            self.metrics.count("overflowed")
+            if job.row_id is None:
+                # Nowhere to keep it: the caller pays for it instead
+                self._run(job)
+
+    def _push(self, job):
+        heapq.heappush(self._heap, (job.run_at, next(self._order), job))
+        if job.row_id is not None:
+            self._queued_rows.add(job.row_id)
+        self._cond.notify()
+
+    # Workers
+
+    def start(self, workers=None):
+        """Start the worker threads (and the durable poller) of this
+        process, if not yet running"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked: the parent's threads do not exist here
+                self._reset()
+            if self._threads:
+                return
+            for index in range(workers or settings.TASK_QUEUE_WORKERS):
+                self._spawn(self._work, f"task-worker-{index}")
+            if settings.TASK_QUEUE_DURABLE:
+                self._spawn(self._poll, "task-poller")
+            atexit.unregister(self.stop)
+            atexit.register(self.stop)
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Finish the jobs that are due and stop the threads"""
+        if timeout is None:
+            timeout = settings.TASK_QUEUE_SHUTDOWN_SECONDS
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._stop_polling.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        with self._lock, self._cond:
+            if self._heap:
+                logger.warning(
+                    "Task queue stopped with %d tasks left", len(self._heap)
+                )
+            self._reset()
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                delay = None
+                if self._heap:
+                    delay = self._heap[0][0] - time.time()
+                    if delay <= 0:
+                        job = heapq.heappop(self._heap)[2]
+                        self._queued_rows.discard(job.row_id)
+                        self._running += 1
+                        return job
+                if self._stopping:
+                    return None
+                self._cond.wait(delay)
+
+    def _work(self):
+        while (job := self._next_job()) is not None:
+            try:
+                self._run(job)
+            finally:
+                with self._cond:
+                    self._running -= 1
+
+    def _run(self, job):
+        close_old_connections()
+        try:
+            if job.row_id is not None and not self._claim(job):
+                return
+            task = get_task(job.name)
+            due = job.run_at
+            started = time.time()
+            try:
+                if task is None:
+                    raise LookupError(f"Unknown task {job.name}")
+                task.func(*job.args, **job.kwargs)
+            except Exception as error:
+                self._failed(job, task, error)
+            else:
+                self._completed(job)
+            finally:
+                self.metrics.timing(
+                    (started - due) * 1000,
+                    (time.time() - started) * 1000,
+                )
+        finally:
+            close_old_connections()
+
+    def _completed(self, job):
+        self.metrics.count("completed")
+        if job.row_id is not None:
+            BackgroundTask.objects.filter(pk=job.row_id).delete()
+
+    def _failed(self, job, task, error):
+        job.attempts += 1
+        if task is not None and job.attempts <= task.max_retries:
+            delay = task.retry_delay * 2 ** (job.attempts - 1)
+            if settings.TASK_QUEUE_EAGER:
+                delay = 0
+            logger.warning(
+                "Task %s failed (attempt %d), retrying in %ss",
+                job.name,
+                job.attempts,
+                delay,
+                exc_info=error,
+            )
+            self.metrics.count("retried")
+            job.run_at = time.time() + delay
+            self._save_row(job, pending=True, error=error)
+            if settings.TASK_QUEUE_EAGER:
+                self._run(job)
+            else:
+                with self._cond:
+                    self._push(job)
+            return
+
+        logger.error(
+            "Task %s failed after %d attempts",
+            job.name,
+            job.attempts,
+            exc_info=error,
+        )
+        self.metrics.count("failed")
+        self._save_row(job, pending=False, error=error)
+
+    # Durable mode
+
+    def _claim(self, job):
+        """Take the job's row, unless another worker has it"""
+        now = timezone.now()
+        claimable = Q(status=BackgroundTask.PENDING, run_at__lte=now) | Q(
+            status=BackgroundTask.RUNNING, locked_until__lt=now
+        )
+        return bool(
+            BackgroundTask.objects.filter(claimable, pk=job.row_id).update(
+                status=BackgroundTask.RUNNING,
+                locked_until=now
+                + timedelta(seconds=settings.TASK_QUEUE_LEASE_SECONDS),
+                attempts=F("attempts") + 1,
+            )
+        )
+
+    def _save_row(self, job, pending, error):
+        if job.row_id is None:
+            return
+        BackgroundTask.objects.filter(pk=job.row_id).update(
+            status=BackgroundTask.PENDING if pending else BackgroundTask.FAILED,
+            run_at=timezone.now()
+            + timedelta(seconds=max(0.0, job.run_at - time.time())),
+            locked_until=None,
+            last_error=repr(error),
+        )
+
+    def due_jobs(self, limit):
+        """Jobs for rows that are due or whose worker died"""
+        now = timezone.now()
+        rows = (
+            BackgroundTask.objects.filter(
+                Q(status=BackgroundTask.PENDING, run_at__lte=now)
+                | Q(status=BackgroundTask.RUNNING, locked_until__lt=now)
+            )
+            .exclude(pk__in=list(self._queued_rows))
+            .order_by("run_at")[:limit]
+        )
+        jobs = []
+        for row in rows:
+            job = Job(
+                row.name,
+                row.args,
+                row.kwargs,
+                enqueued_at=row.enqueued_at.timestamp(),
+                attempts=row.attempts,
+            )
+            job.run_at = row.run_at.timestamp()
+            job.row_id = row.pk
+            jobs.append(job)
+        return jobs
+
+    def run_due(self, limit=100):
+        """Run due durable jobs in this thread; return how many ran"""
+        jobs = self.due_jobs(limit)
+        for job in jobs:
+            self._run(job)
+        return len(jobs)
+
+    def _poll(self):
+        while not self._stop_polling.wait(settings.TASK_QUEUE_POLL_SECONDS):
+            try:
+                with self._cond:
+                    room = settings.TASK_QUEUE_MAX_SIZE - len(self._heap)
+                jobs = self.due_jobs(room) if room > 0 else []
+                with self._cond:
+                    for job in jobs:
+                        self._push(job)
+            except Exception:
+                logger.exception("Polling the task table failed")
+            finally:
+                close_old_connections()
+
+    # Metrics
+
+    def stats(self):
+        with self._cond:
+            depth = len(self._heap)
+            running = self._running
+        stats = {
+            "depth": depth,
+            "running": running,
+            "workers": settings.TASK_QUEUE_WORKERS,
+            "durable": settings.TASK_QUEUE_DURABLE,
+            **self.metrics.snapshot(),
+        }
+        if settings.TASK_QUEUE_DURABLE:
+            stats["stored"] = {
+                status: BackgroundTask.objects.filter(status=status).count()
+                for status, _ in BackgroundTask.STATUS_CHOICES
+            }
+        return stats
+
+
+task_queue = TaskQueue()
@@ -0,0 +1,24 @@
+"""
+Client identification for anonymous rate limits and scoping.
+
+DRF's throttles identify clients by X-Forwarded-For, which clients can set
+to anything. nginx overwrites X-Real-IP with the address it accepted the
+connection from, so that (or the direct peer's address when there is no
+proxy) is what anonymous requests are keyed by here.
+"""
+
+from rest_framework import throttling
+
+
+def client_ip(request):
+    """Address of the client as seen by nginx, or of the direct peer"""
+    return request.META.get("HTTP_X_REAL_IP") or request.META.get(
+        "REMOTE_ADDR", ""
+    )
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle):
+    """DRF's ScopedRateThrottle keyed by client_ip()"""
+
+    def get_ident(self, request):
+        return client_ip(request)
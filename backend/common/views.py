@@ -0,0 +1,51 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from authentication.permissions import HasPermissions, IsStaff
+
+from .profiling import list_reports, load_report
+from .schema import extend_schema
+from .tasks import task_queue
+
+# Free-form JSON, as the reports and stats have no fixed shape
+OBJECT = {"type": "object", "additionalProperties": True}
+
+
+class ProfilingReportListView(APIView):
+    """Saved request profiles, newest first"""
+
+    permission_classes = [IsStaff]
+
+    @extend_schema(
+        operation_id="profiles_list",
+        responses={200: {"type": "array", "items": OBJECT}},
+    )
+    def get(self, request):
+        return Response(list_reports())
+
+
+class ProfilingReportDetailView(APIView):
+    """One saved request profile with its queries and call tree"""
+
+    permission_classes = [IsStaff]
+
+    @extend_schema(operation_id="profiles_retrieve", responses={200: OBJECT})
+    def get(self, request, report_id):
+        report = load_report(report_id)
+        if report is None:
+            raise NotFound()
+        return Response(report)
+
+
+class TaskQueueStatsView(APIView):
+    """This process's background task queue depth, counters and latency"""
+
+    permission_classes = [
+        IsStaff,
+        HasPermissions.require("common.view_backgroundtask"),
+    ]
+
+    @extend_schema(operation_id="tasks_stats", responses={200: OBJECT})
+    def get(self, request):
+        return Response(task_queue.stats())